@@ -0,0 +1,43 @@
+from hashlib import blake2b
+from uuid import uuid4
+from fastapi import Request
+from fastapi.responses import Response
+from app.config import get_settings
+
+# Version counters live in process memory and restart at zero, so tag every
+# ETag with a per-process epoch to keep validators from a previous run invalid.
+# With shared state the counters live in Redis and every worker must produce
+# the same ETag, so the epoch is derived from the Redis location instead.
+_settings = get_settings()
+_EPOCH = (
+    blake2b(f"{_settings.redis_url}|{_settings.redis_key_prefix}".encode(), digest_size=4).hexdigest()
+    if _settings.redis_url
+    else uuid4().hex[:8]
+)
+
+
+def weak_etag(version: int, *variant) -> str:
+    """Weak ETag for a versioned collection and a request variant (filters, limits)"""
+    digest = blake2b(repr(variant).encode(), digest_size=6).hexdigest()
+    return f'W/"{_EPOCH}-{version}-{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Weak If-None-Match comparison (RFC 9110 13.1.2)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def set_validators(response: Response, etag: str):
+    # no-cache: clients may store the body but must revalidate before reuse
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
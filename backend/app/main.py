@@ -1,29 +1,93 @@
+import asyncio
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from app.config import get_settings
-from app.routers import settings, memory, simulation, google_integration, vision
+from app.responses import FastJSONResponse
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.slow_requests import SlowRequestMiddleware
+from app.routers import settings, memory, conversations, analytics, session, simulation, google_integration, vision, admin, vapi_webhook, recording
+from app.services.analytics import session_analytics
+from app.services.event_bus import event_bus
+from app.services.frame_stream import frame_stream_service
+from app.services.google_credentials import google_credential_store
+from app.services.llm_cache import llm_cache
+from app.services.memory_compaction import memory_compactor
+from app.services.profiler_service import slow_request_recorder
+from app.services.shared_state import shared_state
+from app.services.text_index import text_index
+from app.services.upstream_clients import upstream_clients
+from app.services.vector_store import vector_store
+from app.services.warmup import warm_up
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting up Voice Engine Studio Backend...")
+    slow_request_recorder.start()
+    await shared_state.start()
+    if shared_state.enabled:
+        event_bus.set_forwarder(shared_state.forward_event)
+        shared_state.listen_events(event_bus.deliver)
+    llm_cache.start()
+    if vector_store.enabled:
+        await vector_store.start()
+        event_bus.subscribe("memory.created", vector_store.on_memory_created, local_only=True)
+        event_bus.subscribe("memory.deleted", vector_store.on_memory_deleted, local_only=True)
+    event_bus.subscribe("memory.created", memory_compactor.on_memory_created, local_only=True)
+    event_bus.subscribe("memory.deleted", memory_compactor.on_memory_deleted)
+    memory_compactor.start(memory.compact_user_memories)
+    # Every worker keeps its own search indexes, so these are not local_only
+    event_bus.subscribe("memory.created", text_index.on_memory_created)
+    event_bus.subscribe("memory.deleted", text_index.on_memory_deleted)
+    event_bus.subscribe("conversation.logged", text_index.on_conversation_logged)
+    event_bus.subscribe("vapi.transcript", conversations.ingest_transcript, local_only=True)
+    event_bus.subscribe("*", session_analytics.on_event)
+    event_bus.subscribe("google.credentials.updated", google_credential_store.on_credentials_updated)
+    google_credential_store.start()
+    # SDK imports and upstream connections happen in the background so the
+    # worker starts serving immediately
+    warm_up.start()
     yield
     # Shutdown
+    # The server has stopped accepting requests and finished in-flight ones;
+    # let background work complete, then flush write-behind buffers
     print("Shutting down Voice Engine Studio Backend...")
+    try:
+        async with asyncio.timeout(get_settings().shutdown_drain_timeout_seconds):
+            await vapi_webhook.drain()
+            await event_bus.drain()
+    except TimeoutError:
+        print("Shutdown drain timed out; abandoning background tasks")
+    await warm_up.stop()
+    await memory_compactor.close()
+    await frame_stream_service.close()
+    await google_credential_store.close()
+    await llm_cache.close()
+    await vector_store.close()
+    event_bus.set_forwarder(None)
+    await shared_state.close()
+    await upstream_clients.close()
+    slow_request_recorder.stop()
 
 
+settings_config = get_settings()
+
 app = FastAPI(
     title="Voice Engine Studio API",
     description="AI Voice Agent Web Prototype Backend",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=(
+        FastJSONResponse if settings_config.fast_json_responses else JSONResponse
+    ),
 )
 
 # CORS Configuration
-settings_config = get_settings()
 origins = settings_config.backend_cors_origins.split(",")
 
 app.add_middleware(
@@ -33,13 +97,21 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=settings_config.compression_minimum_size)
+app.add_middleware(SlowRequestMiddleware)
 
 # Include routers
 app.include_router(settings.router, prefix="/api/settings", tags=["Settings"])
 app.include_router(memory.router, prefix="/api/memory", tags=["Memory"])
+app.include_router(conversations.router, prefix="/api/conversations", tags=["Conversations"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(session.router, prefix="/api/session", tags=["Session"])
 app.include_router(simulation.router, prefix="/api/simulation", tags=["Simulation"])
 app.include_router(google_integration.router, prefix="/api/google", tags=["Google Integration"])
 app.include_router(vision.router, prefix="/api/vision", tags=["Vision"])
+app.include_router(recording.router, prefix="/api/recording", tags=["Recording"])
+app.include_router(vapi_webhook.router, prefix="/api/vapi", tags=["VAPI"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
 @app.get("/")
@@ -50,3 +122,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Per-worker readiness: warm-up finished and shared state connected"""
+    timeout = settings_config.readiness_warmup_timeout_seconds
+    warm = warm_up.ready or (timeout > 0 and await warm_up.wait(timeout))
+    ready = warm and shared_state.connected
+    return JSONResponse(
+        {"status": "ready" if ready else "starting", "worker": os.getpid(), "warm_up_ms": warm_up.timings_ms},
+        status_code=200 if ready else 503,
+    )
@@ -0,0 +1,154 @@
+import zlib
+from functools import partial
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=31 -> gzip container
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class CompressionMiddleware:
+    """Size-thresholded brotli/gzip compression for JSON and text responses
+
+    Brotli is preferred when the client accepts it and the `brotli` package is
+    installed; otherwise gzip. Responses below `minimum_size`, already encoded
+    responses and non-text media types pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 5, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and _accepts(accept_encoding, "br"):
+            encoder_factory = partial(_BrotliEncoder, self.brotli_quality)
+        elif _accepts(accept_encoding, "gzip"):
+            encoder_factory = partial(_GzipEncoder, self.gzip_level)
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressionResponder(self.app, self.minimum_size, encoder_factory)(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app, minimum_size: int, encoder_factory):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoder_factory = encoder_factory
+        self.initial_message = None
+        self.passthrough = False
+        self.encoder = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the headers until the first body chunk decides the encoding
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if self.initial_message is not None:
+                await self.send(self.initial_message)
+                self.initial_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self.encoder = self.encoder_factory()
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = self.encoder.name
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                message["body"] = self.encoder.compress(body) + self.encoder.flush()
+            else:
+                message["body"] = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(message["body"]))
+            # Weak validators survive re-encoding; strong ones would not
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if more_body:
+            message["body"] = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            message["body"] = self.encoder.compress(body) + self.encoder.finish()
+        await self.send(message)
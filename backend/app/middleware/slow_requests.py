@@ -0,0 +1,29 @@
+from app.services.profiler_service import slow_request_recorder
+
+
+class SlowRequestMiddleware:
+    """ASGI middleware feeding request timings to the slow-request recorder"""
+
+    def __init__(self, app, recorder=slow_request_recorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.recorder.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        recorder = self.recorder
+        token = recorder.begin(
+            scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1")
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                recorder.response_started(token, message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            recorder.end(token)
@@ -0,0 +1,47 @@
+import json
+from typing import Any
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def dumps_bytes(content: Any) -> bytes:
+    """Serialize JSON-compatible content to UTF-8 bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def loads_bytes(data: bytes) -> Any:
+    """Parse a JSON request body (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def preserialize(payload: Any) -> bytes:
+    """Serialize an immutable payload once so handlers can return the bytes as-is"""
+    return dumps_bytes(jsonable_encoder(payload))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson
+
+    Enabled app-wide with FAST_JSON_RESPONSES=true. Output is byte-compatible
+    with the default encoder for the payloads this API returns.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+class RawJSONResponse(Response):
+    """Response for JSON that is already serialized to bytes"""
+
+    media_type = "application/json"
@@ -0,0 +1,144 @@
+import asyncio
+import secrets
+import threading
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from typing import Optional, List
+
+from app.config import get_settings
+from app.services.admission import admission_controller
+from app.services.frame_stream import frame_stream_service
+from app.services.google_credentials import google_credential_store
+from app.services.llm_cache import llm_cache
+from app.services.memory_compaction import memory_compactor
+from app.services.text_index import text_index
+from app.services.profiler_service import (
+    sampling_profiler,
+    slow_request_recorder,
+    format_collapsed,
+)
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(default=None)):
+    """Guard admin endpoints with the configured admin API key"""
+    admin_api_key = get_settings().admin_api_key
+    if not admin_api_key:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, admin_api_key):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+class SlowRequestRecord(BaseModel):
+    method: str
+    path: str
+    query: str
+    status: Optional[int] = None
+    recorded_at: str
+    timings_ms: dict
+    samples: int
+    loop_idle_ratio: Optional[float] = None
+    stacks: str
+
+
+@router.get("/profile")
+async def profile_process(
+    seconds: float = Query(default=5.0, gt=0),
+    interval_ms: Optional[float] = Query(default=None, gt=0),
+    loop_only: bool = False,
+    format: str = Query(default="collapsed", pattern="^(collapsed|json)$"),
+):
+    """Run a time-boxed sampling profile of this worker
+
+    Returns collapsed stacks (flamegraph.pl / speedscope compatible) by default.
+    """
+    settings = get_settings()
+    if seconds > settings.profiler_max_seconds:
+        raise HTTPException(
+            status_code=400,
+            detail=f"seconds must be <= {settings.profiler_max_seconds}",
+        )
+    if sampling_profiler.busy:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    interval = (interval_ms or settings.profiler_sample_interval_ms) / 1000
+    thread_id = threading.get_ident() if loop_only else None
+
+    try:
+        samples = await asyncio.to_thread(
+            sampling_profiler.profile, seconds, interval, thread_id
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "json":
+        return {
+            "seconds": seconds,
+            "interval_ms": interval * 1000,
+            "samples": sum(samples.values()),
+            "stacks": [{"stack": s, "count": n} for s, n in samples.most_common(100)],
+        }
+
+    return PlainTextResponse(
+        format_collapsed(samples),
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed.txt"'},
+    )
+
+
+@router.get("/slow-requests", response_model=List[SlowRequestRecord])
+async def get_slow_requests(limit: int = Query(default=20, le=100)):
+    """Get recorded slow requests, newest first"""
+    return slow_request_recorder.get_records()[:limit]
+
+
+@router.delete("/slow-requests")
+async def clear_slow_requests():
+    """Clear the slow-request ring buffer"""
+    slow_request_recorder.clear()
+    return {"message": "Slow request records cleared"}
+
+
+@router.get("/llm-cache")
+async def get_llm_cache_stats():
+    """LLM cache outcomes and token usage per feature"""
+    return llm_cache.get_stats()
+
+
+@router.delete("/llm-cache")
+async def clear_llm_cache():
+    """Drop in-memory LLM cache entries"""
+    llm_cache.clear()
+    return {"message": "LLM cache cleared"}
+
+
+@router.get("/admission")
+async def get_admission_stats():
+    """Current upstream concurrency limits, queue depths and rejections"""
+    return admission_controller.get_stats()
+
+
+@router.get("/memory-compaction")
+async def get_memory_compaction_stats():
+    """Compaction runs, removals and pending users on this worker"""
+    return memory_compactor.get_stats()
+
+
+@router.get("/text-index")
+async def get_text_index_stats():
+    """Bigram search indexes held by this worker"""
+    return text_index.get_stats()
+
+
+@router.get("/vision-streams")
+async def get_vision_stream_stats():
+    """Continuous camera streams on this worker: frames received vs analyzed"""
+    return frame_stream_service.get_stats()
+
+
+@router.get("/google-credentials")
+async def get_google_credential_stats():
+    """Linked Google accounts on this worker and token refresh counters"""
+    return google_credential_store.get_stats()
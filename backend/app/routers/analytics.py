@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List
+from uuid import UUID
+
+from app.services.analytics import session_analytics
+
+router = APIRouter()
+
+
+@router.get("/overview")
+async def get_overview(days: int = Query(default=1, ge=1, le=90)):
+    """All users over the last `days` days: sessions, messages, tool mix, vision, latencies"""
+    return session_analytics.overview(days)
+
+
+@router.get("/daily")
+async def get_daily_rollups(days: int = Query(default=7, ge=1, le=90)):
+    """Per-day rollups across all users, newest first"""
+    return session_analytics.daily(days=days)
+
+
+@router.get("/users/{user_id}")
+async def get_user_analytics(user_id: UUID, days: int = Query(default=7, ge=1, le=90)):
+    """One user's rollup over the last `days` days"""
+    return session_analytics.user_summary(str(user_id), days)
+
+
+@router.get("/users/{user_id}/daily")
+async def get_user_daily_rollups(user_id: UUID, days: int = Query(default=7, ge=1, le=90)):
+    """One user's per-day rollups, newest first"""
+    return session_analytics.daily(str(user_id), days)
+
+
+@router.get("/users/{user_id}/sessions", response_model=List[dict])
+async def get_user_sessions(user_id: UUID, limit: int = Query(default=20, le=100)):
+    """A user's most recent sessions with their rollups"""
+    return session_analytics.user_sessions(str(user_id), limit)
+
+
+@router.get("/sessions/{session_id}")
+async def get_session_analytics(session_id: str):
+    """Rollup for one session (VAPI call id or conversation session id)"""
+    summary = session_analytics.session_summary(session_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return summary
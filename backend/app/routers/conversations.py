@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Query
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from uuid import UUID, NAMESPACE_URL, uuid4, uuid5
+from datetime import datetime
+from enum import Enum
+
+from app.services.event_bus import event_bus
+from app.services.shared_state import shared_state
+from app.services.text_index import CONVERSATION, text_index
+
+router = APIRouter()
+
+
+class ConversationRole(str, Enum):
+    USER = "user"
+    ASSISTANT = "assistant"
+    SYSTEM = "system"
+
+
+class ConversationLogCreate(BaseModel):
+    session_id: UUID
+    role: ConversationRole
+    content: str
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class ConversationLogResponse(ConversationLogCreate):
+    id: UUID
+    user_id: UUID
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationSearchResult(BaseModel):
+    log: ConversationLogResponse
+    score: float
+
+
+# In-memory storage for development (will be replaced with Supabase
+# conversation_logs); append-only, kept in shared state in multi-worker mode
+conversation_store: dict = {}  # {user_id: [logs]}
+
+
+async def load_conversation_logs(user_id: UUID) -> List[ConversationLogResponse]:
+    if shared_state.enabled:
+        _, items = await shared_state.list_items("conversation", str(user_id))
+        return [ConversationLogResponse.model_validate_json(item) for item in items]
+    return conversation_store.get(str(user_id), [])
+
+
+async def append_conversation_log(user_id: UUID, log: ConversationLogCreate) -> ConversationLogResponse:
+    entry = ConversationLogResponse(id=uuid4(), user_id=user_id, created_at=datetime.now(), **log.model_dump())
+    if shared_state.enabled:
+        await shared_state.list_append("conversation", str(user_id), entry.model_dump_json().encode())
+    else:
+        conversation_store.setdefault(str(user_id), []).append(entry)
+
+    event_bus.publish("conversation.logged", {"user_id": str(user_id), "log": entry.model_dump(mode="json")})
+    return entry
+
+
+async def _conversation_documents(user_id: UUID):
+    return [
+        (str(log.id), log.content, log.model_dump(mode="json"))
+        for log in await load_conversation_logs(user_id)
+    ]
+
+
+async def ingest_transcript(event: dict):
+    """Store final VAPI transcripts (vapi.transcript events) as conversation logs"""
+    message = event.get("message") or {}
+    if message.get("transcriptType") != "final" or not event.get("user_id") or not message.get("transcript"):
+        return
+    call_id = (message.get("call") or {}).get("id") or ""
+    try:
+        session_id = UUID(call_id)
+    except ValueError:
+        session_id = uuid5(NAMESPACE_URL, f"vapi-call:{call_id}")
+    await append_conversation_log(
+        UUID(event["user_id"]),
+        ConversationLogCreate(
+            session_id=session_id,
+            role=ConversationRole.ASSISTANT if message.get("role") == "assistant" else ConversationRole.USER,
+            content=message["transcript"],
+            metadata={"source": "vapi", "call_id": call_id} if call_id else {"source": "vapi"},
+        ),
+    )
+
+
+@router.get("/{user_id}", response_model=List[ConversationLogResponse])
+async def get_conversation_logs(
+    user_id: UUID,
+    session_id: Optional[UUID] = None,
+    limit: int = Query(default=100, le=500),
+):
+    """Get the most recent conversation logs, oldest first"""
+    logs = await load_conversation_logs(user_id)
+    if session_id:
+        logs = [log for log in logs if log.session_id == session_id]
+    return logs[-limit:]
+
+
+@router.post("/{user_id}", response_model=ConversationLogResponse)
+async def create_conversation_log(user_id: UUID, log: ConversationLogCreate):
+    """Append a message to a user's conversation log"""
+    return await append_conversation_log(user_id, log)
+
+
+@router.post("/{user_id}/search", response_model=List[ConversationSearchResult])
+async def search_conversation_logs(
+    user_id: UUID,
+    query: str,
+    limit: int = Query(default=20, le=100),
+):
+    """Keyword search over a user's conversation logs (all terms must appear)"""
+    index = await text_index.get(user_id, CONVERSATION, _conversation_documents)
+    return [
+        ConversationSearchResult(log=ConversationLogResponse.model_validate(payload), score=score)
+        for _, score, payload in index.search(query, limit)
+    ]
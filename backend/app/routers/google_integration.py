@@ -2,6 +2,11 @@ from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+from uuid import UUID
+
+from app.config import get_settings
+from app.services.google_credentials import google_credential_store
+from app.services.google_service import google_service
 
 router = APIRouter()
 
@@ -31,28 +36,53 @@ class DocumentResponse(BaseModel):
     url: Optional[str] = None
 
 
+def _redirect_uri(request: Request) -> str:
+    return get_settings().google_oauth_redirect_uri or str(request.url_for("auth_callback"))
+
+
+def _require_oauth_client():
+    if not get_settings().google_client_id:
+        raise HTTPException(status_code=503, detail="Google OAuth is not configured (GOOGLE_CLIENT_ID is not set)")
+
+
 @router.get("/auth/url")
-async def get_auth_url():
-    """Get Google OAuth authorization URL"""
-    # TODO: Implement with google-auth-oauthlib
-    return {
-        "auth_url": "https://accounts.google.com/o/oauth2/auth?...",
-        "message": "OAuth URLを実装予定",
-    }
-
-
-@router.post("/auth/callback")
-async def auth_callback(code: str):
-    """Handle OAuth callback"""
-    # TODO: Exchange code for tokens
-    return {"message": "OAuth callback処理を実装予定", "code": code}
-
-
-@router.get("/auth/status")
-async def get_auth_status():
-    """Check if user is authenticated with Google"""
-    # TODO: Check token validity
-    return {"authenticated": False, "message": "認証状態確認を実装予定"}
+async def get_auth_url(user_id: UUID, request: Request):
+    """Get the Google OAuth authorization URL that links an account to the user"""
+    _require_oauth_client()
+    state = google_service.oauth_state(str(user_id))
+    return {"auth_url": google_service.get_auth_url(_redirect_uri(request), state=state)}
+
+
+@router.get("/auth/callback")
+async def auth_callback(code: str, state: str, request: Request):
+    """Handle the OAuth redirect: store the tokens as the user's own account"""
+    _require_oauth_client()
+    user_id = google_service.user_from_state(state)
+    if user_id is None:
+        raise HTTPException(status_code=400, detail="Invalid or expired OAuth state")
+    try:
+        await google_service.exchange_code(code, _redirect_uri(request), account_id=user_id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Google authorization failed: {e}")
+    return {"user_id": user_id, "authenticated": True}
+
+
+@router.get("/auth/status/{user_id}")
+async def get_auth_status(user_id: UUID):
+    """Check if the user has linked a Google account"""
+    try:
+        credentials = await google_credential_store.get(str(user_id))
+    except ValueError:
+        # The refresh token was revoked; the account has just been unlinked
+        credentials = None
+    return {"user_id": str(user_id), "authenticated": credentials is not None}
+
+
+@router.delete("/auth/{user_id}")
+async def unlink_account(user_id: UUID):
+    """Unlink the user's Google account"""
+    await google_credential_store.delete(str(user_id))
+    return {"user_id": str(user_id), "authenticated": False}
 
 
 # Calendar endpoints
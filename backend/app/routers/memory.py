@@ -1,10 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from uuid import UUID, uuid4
 from datetime import datetime
 from enum import Enum
 
+from app.http_cache import weak_etag, is_not_modified, not_modified, set_validators
+from app.responses import loads_bytes
+from app.services.event_bus import event_bus
+from app.services.memory_compaction import memory_compactor
+from app.services.memory_service import memory_service
+from app.services.shared_state import shared_state
+from app.services.text_index import MEMORY, reciprocal_rank_fusion, text_index
+from app.services.vector_store import vector_store
+
 router = APIRouter()
 
 
@@ -33,17 +42,59 @@ class MemoryResponse(MemoryBase):
 
 
 # In-memory storage for development (will be replaced with Supabase + Vector search)
+# With shared state enabled (multi-worker mode) these are a per-worker replica
+# of the shared lists, refreshed when the shared version moves.
 memory_store: dict = {}  # {user_id: [memories]}
+memory_versions: dict = {}  # {user_id: version}, bumped on every write
+context_cache: dict = {}  # {user_id: (version, context payload)}
+
+
+def get_memory_version(user_id: UUID) -> int:
+    return memory_versions.get(str(user_id), 0)
+
+
+def bump_memory_version(user_id: UUID):
+    memory_versions[str(user_id)] = get_memory_version(user_id) + 1
+
+
+async def load_user_memories(user_id: UUID) -> Tuple[int, List[MemoryResponse]]:
+    """A user's (version, memories), picking up writes made by other workers"""
+    key = str(user_id)
+    if shared_state.enabled:
+        version = await shared_state.get_version("memory", key)
+        if version != memory_versions.get(key, 0):
+            version, items = await shared_state.list_items("memory", key)
+            memory_store[key] = [MemoryResponse.model_validate_json(item) for item in items]
+            memory_versions[key] = version
+    return memory_versions.get(key, 0), memory_store.get(key, [])
+
+
+def _apply_shared_write(user_id: UUID, version: int) -> bool:
+    """Record a shared write; False if another worker wrote in between"""
+    key = str(user_id)
+    if version == memory_versions.get(key, 0) + 1:
+        memory_versions[key] = version
+        return True
+    # The replica missed a write; drop it so the next read reloads
+    memory_store.pop(key, None)
+    memory_versions[key] = -1
+    return False
 
 
 @router.get("/{user_id}", response_model=List[MemoryResponse])
 async def get_memories(
     user_id: UUID,
+    request: Request,
+    response: Response,
     category: Optional[MemoryCategory] = None,
     limit: int = Query(default=50, le=100),
 ):
     """Get memories for a user, optionally filtered by category"""
-    user_memories = memory_store.get(str(user_id), [])
+    version, user_memories = await load_user_memories(user_id)
+    etag = weak_etag(version, category, limit)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
 
     if category:
         user_memories = [m for m in user_memories if m.category == category]
@@ -62,45 +113,155 @@ async def create_memory(user_id: UUID, memory: MemoryCreate):
         created_at=datetime.now(),
     )
 
-    if str(user_id) not in memory_store:
-        memory_store[str(user_id)] = []
-
-    memory_store[str(user_id)].append(new_memory)
+    if shared_state.enabled:
+        version = await shared_state.list_append(
+            "memory", str(user_id), new_memory.model_dump_json().encode()
+        )
+        if _apply_shared_write(user_id, version):
+            memory_store.setdefault(str(user_id), []).append(new_memory)
+    else:
+        if str(user_id) not in memory_store:
+            memory_store[str(user_id)] = []
+
+        memory_store[str(user_id)].append(new_memory)
+        bump_memory_version(user_id)
+
+    event_bus.publish(
+        "memory.created",
+        {
+            "user_id": str(user_id),
+            "memory_id": str(new_memory.id),
+            "content": new_memory.content,
+            "category": new_memory.category.value,
+            "created_at": new_memory.created_at.isoformat(),
+        },
+    )
     return new_memory
 
 
-@router.delete("/{user_id}/{memory_id}")
-async def delete_memory(user_id: UUID, memory_id: UUID):
-    """Delete a specific memory"""
+def _publish_deleted(user_id: UUID, memory_id: UUID):
+    event_bus.publish("memory.deleted", {"user_id": str(user_id), "memory_id": str(memory_id)})
+
+
+async def remove_memory(user_id: UUID, memory_id: UUID) -> bool:
+    """Delete a memory; False if the user has no such memory"""
+    if shared_state.enabled:
+        _, items = await shared_state.list_items("memory", str(user_id))
+        for item in items:
+            if loads_bytes(item)["id"] == str(memory_id):
+                version = await shared_state.list_remove("memory", str(user_id), item)
+                if version is None:
+                    return False
+                if _apply_shared_write(user_id, version):
+                    memory_store[str(user_id)] = [
+                        m for m in memory_store.get(str(user_id), []) if m.id != memory_id
+                    ]
+                _publish_deleted(user_id, memory_id)
+                return True
+        return False
+
     user_memories = memory_store.get(str(user_id), [])
     for i, m in enumerate(user_memories):
         if m.id == memory_id:
             del user_memories[i]
-            return {"message": "Memory deleted successfully"}
+            bump_memory_version(user_id)
+            _publish_deleted(user_id, memory_id)
+            return True
+    return False
+
+
+@router.delete("/{user_id}/{memory_id}")
+async def delete_memory(user_id: UUID, memory_id: UUID):
+    """Delete a specific memory"""
+    if await remove_memory(user_id, memory_id):
+        return {"message": "Memory deleted successfully"}
 
     raise HTTPException(status_code=404, detail="Memory not found")
 
 
+async def compact_user_memories(user_id: UUID, dry_run: bool = False) -> dict:
+    """Remove near-duplicate memories added since the user's last compaction"""
+    _, user_memories = await load_user_memories(user_id)
+    return await memory_compactor.compact(user_id, list(user_memories), remove_memory, dry_run)
+
+
+@router.post("/{user_id}/compact")
+async def compact_memories(user_id: UUID, dry_run: bool = False):
+    """Drop near-duplicate memories (dry_run only reports the plan)"""
+    return await compact_user_memories(user_id, dry_run)
+
+
+@router.get("/{user_id}/compaction-log")
+async def get_compaction_log(user_id: UUID, limit: int = Query(default=50, le=500)):
+    """Memories removed by compaction, newest first, with their content"""
+    return await memory_compactor.get_audit(user_id, limit)
+
+
+async def _memory_documents(user_id: UUID):
+    _, user_memories = await load_user_memories(user_id)
+    return [(str(m.id), m.content, m.model_dump(mode="json")) for m in user_memories]
+
+
 @router.post("/{user_id}/search")
 async def search_memories(
     user_id: UUID,
     query: str,
+    category: Optional[MemoryCategory] = None,
     limit: int = Query(default=5, le=20),
 ):
-    """Search memories using vector similarity (placeholder for Supabase implementation)"""
-    # TODO: Implement vector search with OpenAI embeddings + Supabase
-    user_memories = memory_store.get(str(user_id), [])
-
-    # Simple text search for now
-    results = [m for m in user_memories if query.lower() in m.content.lower()]
-
-    return results[:limit]
+    """Search memories by keyword, fused with vector similarity when pgvector is enabled
+
+    `category` restricts both rankings, so it is applied before `limit`.
+    """
+    # Rank deeper than `limit` so fusion can promote results found by both
+    depth = limit * 4
+    index = await text_index.get(user_id, MEMORY, _memory_documents)
+    where = (lambda payload: payload["category"] == category.value) if category else None
+    hits = index.search(query, depth, where)
+    found = {ref: payload for ref, _, payload in hits}
+    rankings = [[ref for ref, _, _ in hits]]
+
+    if vector_store.enabled:
+        embedding = await memory_service.create_embedding(query)
+        if embedding:
+            rows = await vector_store.search(
+                user_id, embedding, depth, category.value if category else None
+            )
+            for row in rows:
+                found.setdefault(str(row["id"]), row)
+            rankings.append([str(row["id"]) for row in rows])
+
+    return [
+        MemoryResponse.model_validate(found[ref])
+        for ref, _ in reciprocal_rank_fusion(rankings)[:limit]
+    ]
 
 
 @router.get("/{user_id}/context")
-async def get_context_for_conversation(user_id: UUID):
+async def get_context_for_conversation(user_id: UUID, request: Request, response: Response):
     """Get relevant context for AI conversation"""
-    user_memories = memory_store.get(str(user_id), [])
+    version, user_memories = await load_user_memories(user_id)
+    etag = weak_etag(version, "context")
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_validators(response, etag)
+
+    return get_cached_context(user_id, version, user_memories)
+
+
+def get_cached_context(user_id: UUID, version: int, user_memories: List[MemoryResponse]) -> dict:
+    """build_context for a memory version, reused until the version moves"""
+    cached = context_cache.get(str(user_id))
+    if cached and cached[0] == version:
+        return cached[1]
+
+    context = build_context(user_memories)
+    context_cache[str(user_id)] = (version, context)
+    return context
+
+
+def build_context(user_memories: List[MemoryResponse]) -> dict:
+    """Build the AI context payload from a user's memories"""
 
     # Organize by category
     profile = [m for m in user_memories if m.category == MemoryCategory.PROFILE]
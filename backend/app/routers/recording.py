@@ -0,0 +1,94 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
+
+from app.services.recording_service import recording_service, RecordingError
+
+router = APIRouter()
+
+
+class RecordingCreate(BaseModel):
+    content_type: str = "audio/webm"
+
+
+class RecordingComplete(BaseModel):
+    sha256: str
+
+
+class RecordingStatus(BaseModel):
+    id: str
+    user_id: str
+    content_type: str
+    size: int
+    next_index: int
+    completed: bool
+    sha256: Optional[str] = None
+    created_at: str
+
+
+def _http_error(e: RecordingError) -> HTTPException:
+    return HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@router.post("/{user_id}", response_model=RecordingStatus)
+async def create_recording(user_id: UUID, recording: RecordingCreate):
+    """Start a chunked recording upload"""
+    return (await recording_service.create(user_id, recording.content_type)).to_dict()
+
+
+@router.get("/{user_id}/{recording_id}", response_model=RecordingStatus)
+async def get_recording_status(user_id: UUID, recording_id: str):
+    """Upload progress; clients resume from `next_index` at byte `size`"""
+    try:
+        return (await recording_service.get(user_id, recording_id)).to_dict()
+    except RecordingError as e:
+        raise _http_error(e)
+
+
+@router.put("/{user_id}/{recording_id}/chunks/{index}", response_model=RecordingStatus)
+async def upload_chunk(user_id: UUID, recording_id: str, index: int, offset: int, request: Request):
+    """Append chunk `index` (raw bytes body) at byte `offset`"""
+    try:
+        session = await recording_service.append_chunk(
+            user_id, recording_id, index, offset, request.stream()
+        )
+    except RecordingError as e:
+        raise _http_error(e)
+    return session.to_dict()
+
+
+@router.post("/{user_id}/{recording_id}/complete", response_model=RecordingStatus)
+async def complete_recording(user_id: UUID, recording_id: str, body: RecordingComplete):
+    """Finalize a recording, verifying its SHA-256 checksum"""
+    try:
+        return (await recording_service.complete(user_id, recording_id, body.sha256)).to_dict()
+    except RecordingError as e:
+        raise _http_error(e)
+
+
+@router.get("/{user_id}/{recording_id}/audio")
+async def download_recording(user_id: UUID, recording_id: str):
+    """Download a completed recording"""
+    try:
+        session = await recording_service.get(user_id, recording_id)
+    except RecordingError as e:
+        raise _http_error(e)
+    if not session.completed:
+        raise HTTPException(status_code=409, detail="Recording is not completed")
+    return FileResponse(
+        session.path,
+        media_type=session.content_type,
+        filename=session.filename,
+    )
+
+
+@router.delete("/{user_id}/{recording_id}")
+async def delete_recording(user_id: UUID, recording_id: str):
+    """Delete a recording"""
+    try:
+        await recording_service.delete(user_id, recording_id)
+    except RecordingError as e:
+        raise _http_error(e)
+    return {"message": "Recording deleted successfully"}
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Request
+from typing import Optional, Tuple
+from uuid import UUID
+
+from app.http_cache import weak_etag, is_not_modified, not_modified, set_validators
+from app.responses import RawJSONResponse, preserialize
+from app.routers import memory, settings
+from app.services.vapi_service import vapi_service
+
+router = APIRouter()
+
+# {user_id: ((settings version, memory version), etag, serialized payload)}
+bootstrap_cache: dict = {}
+
+
+def assemble_system_prompt(studio_prompt: Optional[str], context: str) -> str:
+    """Studio system prompt followed by the user's memory context"""
+    parts = [studio_prompt or settings.DEFAULT_SETTINGS.system_prompt]
+    if context:
+        parts.append(context)
+    return "\n\n".join(parts)
+
+
+async def get_bootstrap(user_id: UUID) -> Tuple[str, bytes]:
+    """(etag, payload) for a user's session, rebuilt only when settings or memories change"""
+    settings_version = await settings.get_settings_version(user_id)
+    memory_version, user_memories = await memory.load_user_memories(user_id)
+    cached = bootstrap_cache.get(str(user_id))
+    if cached and cached[0] == (settings_version, memory_version):
+        return cached[1], cached[2]
+
+    settings_version, studio = await settings.load_settings(user_id)
+    context = memory.get_cached_context(user_id, memory_version, user_memories)["context"]
+    system_prompt = assemble_system_prompt(studio.system_prompt, context)
+    payload = {
+        "user_id": str(user_id),
+        "settings_version": settings_version,
+        "memory_version": memory_version,
+        "system_prompt": system_prompt,
+        "voice_id": studio.voice_id,
+        "speed": studio.speed,
+        "silence_sensitivity": studio.silence_sensitivity,
+        "assistant_overrides": vapi_service.build_assistant_overrides(
+            system_prompt,
+            voice_id=studio.voice_id,
+            speed=studio.speed,
+            metadata={"user_id": str(user_id)},
+        ),
+    }
+    etag = weak_etag(settings_version, "bootstrap", memory_version)
+    body = preserialize(payload)
+    bootstrap_cache[str(user_id)] = ((settings_version, memory_version), etag, body)
+    return etag, body
+
+
+@router.get("/{user_id}/bootstrap")
+async def bootstrap_session(user_id: UUID, request: Request):
+    """Everything needed to start a conversation, in one call
+
+    Returns the assembled system prompt (studio prompt + memory context),
+    voice settings and ready-to-use VAPI assistantOverrides.
+    """
+    etag, body = await get_bootstrap(user_id)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    response = RawJSONResponse(body)
+    set_validators(response, etag)
+    return response
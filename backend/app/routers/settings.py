@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Tuple
 from uuid import UUID
 from datetime import datetime
 
+from app.responses import RawJSONResponse, preserialize
+from app.services.shared_state import shared_state
+
 router = APIRouter()
 
 
@@ -32,25 +35,74 @@ class StudioSettingsResponse(StudioSettingsBase):
         from_attributes = True
 
 
-# In-memory storage for development (will be replaced with Supabase)
+# In-memory storage for development (will be replaced with Supabase);
+# bypassed in favour of shared state in multi-worker mode
 settings_store: dict = {}
+settings_versions: dict = {}  # {user_id: version}, bumped on every write
+
+DEFAULT_SETTINGS = StudioSettingsBase(
+    system_prompt="あなたは親切なAIアシスタントです。",
+    voice_id="default",
+    speed=1.0,
+    silence_sensitivity=50,
+)
+# Default settings only vary by user id and timestamps, so serialize the rest once
+_DEFAULT_SETTINGS_JSON = preserialize(DEFAULT_SETTINGS)[:-1]
+
+
+def _default_settings_response(user_id: UUID) -> RawJSONResponse:
+    now = datetime.now().isoformat()
+    return RawJSONResponse(
+        b"%s,\"id\":\"%s\",\"user_id\":\"%s\",\"created_at\":\"%s\",\"updated_at\":\"%s\"}"
+        % (_DEFAULT_SETTINGS_JSON, str(user_id).encode(), str(user_id).encode(), now.encode(), now.encode())
+    )
+
+
+def _bump_settings_version(user_id: UUID):
+    settings_versions[str(user_id)] = settings_versions.get(str(user_id), 0) + 1
+
+
+async def get_settings_version(user_id: UUID) -> int:
+    """Version of a user's settings; moves on every save or delete"""
+    if shared_state.enabled:
+        return await shared_state.get_version("settings", str(user_id))
+    return settings_versions.get(str(user_id), 0)
+
+
+async def load_settings(user_id: UUID) -> Tuple[int, StudioSettingsBase]:
+    """A user's (settings version, settings), defaults when none are saved
+
+    The version is read first, so a concurrent write can only make the
+    settings newer than their version, never older.
+    """
+    version = await get_settings_version(user_id)
+    return version, await _load_settings(user_id) or DEFAULT_SETTINGS
+
+
+async def _load_settings(user_id: UUID) -> Optional[StudioSettingsResponse]:
+    if shared_state.enabled:
+        raw = await shared_state.get("settings", str(user_id))
+        return StudioSettingsResponse.model_validate_json(raw) if raw else None
+    return settings_store.get(str(user_id))
+
+
+async def _save_settings(user_id: UUID, value: StudioSettingsResponse):
+    if shared_state.enabled:
+        await shared_state.set("settings", str(user_id), value.model_dump_json().encode())
+    else:
+        settings_store[str(user_id)] = value
+        _bump_settings_version(user_id)
 
 
 @router.get("/{user_id}", response_model=StudioSettingsResponse)
 async def get_settings(user_id: UUID):
     """Get studio settings for a user"""
+    if shared_state.enabled:
+        raw = await shared_state.get("settings", str(user_id))
+        return RawJSONResponse(raw) if raw else _default_settings_response(user_id)
     if str(user_id) not in settings_store:
         # Return default settings
-        return StudioSettingsResponse(
-            id=user_id,
-            user_id=user_id,
-            system_prompt="あなたは親切なAIアシスタントです。",
-            voice_id="default",
-            speed=1.0,
-            silence_sensitivity=50,
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
-        )
+        return _default_settings_response(user_id)
     return settings_store[str(user_id)]
 
 
@@ -65,39 +117,55 @@ async def create_settings(user_id: UUID, settings: StudioSettingsCreate):
         created_at=now,
         updated_at=now,
     )
-    settings_store[str(user_id)] = new_settings
+    await _save_settings(user_id, new_settings)
     return new_settings
 
 
-@router.put("/{user_id}", response_model=StudioSettingsResponse)
-async def update_settings(user_id: UUID, settings: StudioSettingsUpdate):
-    """Update studio settings for a user"""
-    existing = settings_store.get(str(user_id))
+def _updated_settings(
+    user_id: UUID, existing: Optional[StudioSettingsResponse], settings: StudioSettingsUpdate
+) -> StudioSettingsResponse:
     now = datetime.now()
-
     if existing:
-        updated = existing.model_copy(
+        return existing.model_copy(
             update={**settings.model_dump(exclude_unset=True), "updated_at": now}
         )
-        settings_store[str(user_id)] = updated
-        return updated
-    else:
-        # Create new if not exists
-        new_settings = StudioSettingsResponse(
-            id=user_id,
-            user_id=user_id,
-            **settings.model_dump(),
-            created_at=now,
-            updated_at=now,
-        )
-        settings_store[str(user_id)] = new_settings
-        return new_settings
+    # Create new if not exists
+    return StudioSettingsResponse(
+        id=user_id,
+        user_id=user_id,
+        **settings.model_dump(),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+@router.put("/{user_id}", response_model=StudioSettingsResponse)
+async def update_settings(user_id: UUID, settings: StudioSettingsUpdate):
+    """Update studio settings for a user"""
+    if shared_state.enabled:
+        # Partial updates from different workers must not overwrite each other
+        def apply(raw: Optional[bytes]) -> bytes:
+            existing = StudioSettingsResponse.model_validate_json(raw) if raw else None
+            return _updated_settings(user_id, existing, settings).model_dump_json().encode()
+
+        raw, _ = await shared_state.update("settings", str(user_id), apply)
+        return RawJSONResponse(raw)
+
+    updated = _updated_settings(user_id, await _load_settings(user_id), settings)
+    await _save_settings(user_id, updated)
+    return updated
 
 
 @router.delete("/{user_id}")
 async def delete_settings(user_id: UUID):
     """Delete studio settings for a user"""
+    if shared_state.enabled:
+        deleted, _ = await shared_state.delete("settings", str(user_id))
+        if deleted:
+            return {"message": "Settings deleted successfully"}
+        raise HTTPException(status_code=404, detail="Settings not found")
     if str(user_id) in settings_store:
         del settings_store[str(user_id)]
+        _bump_settings_version(user_id)
         return {"message": "Settings deleted successfully"}
     raise HTTPException(status_code=404, detail="Settings not found")
@@ -3,6 +3,8 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 
+from app.responses import RawJSONResponse, preserialize
+
 router = APIRouter()
 
 
@@ -37,12 +39,13 @@ PRESET_LOCATIONS = {
     "station": GPSLocation(latitude=35.6814, longitude=139.7670, name="東京駅"),
     "convenience_store": GPSLocation(latitude=35.6850, longitude=139.7700, name="コンビニ"),
 }
+PRESET_LOCATIONS_JSON = preserialize(PRESET_LOCATIONS)
 
 
 @router.get("/locations")
 async def get_preset_locations():
     """Get list of preset locations for simulation"""
-    return PRESET_LOCATIONS
+    return RawJSONResponse(PRESET_LOCATIONS_JSON)
 
 
 @router.post("/geofence/trigger")
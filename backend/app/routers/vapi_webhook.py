@@ -0,0 +1,305 @@
+import asyncio
+import secrets
+import time
+from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Awaitable, Callable, Dict, Optional
+from uuid import UUID
+
+from app.config import get_settings
+from app.responses import RawJSONResponse, dumps_bytes, loads_bytes
+from app.routers import memory, vision
+from app.services.event_bus import event_bus
+from app.services.google_service import google_service
+from app.services.vapi_service import vapi_service
+from app.services.vision_service import vision_service
+
+router = APIRouter()
+
+# How long a camera capture stays usable for the camera tool
+CAPTURE_MAX_AGE_SECONDS = 15.0
+
+ACK_LONG_RUNNING = "確認しています。少々お待ちください。"
+FALLBACK_DEFAULT = "すみません、処理に時間がかかっています。もう一度お願いできますか？"
+GOOGLE_NOT_LINKED = "Googleアカウントが連携されていません。アプリの設定から連携してください。"
+
+ToolHandler = Callable[[dict, dict], Awaitable[str]]
+
+
+class ToolSpec:
+    """Dispatch entry for one VAPI function tool"""
+
+    __slots__ = ("handler", "deadline", "long_running", "fallback")
+
+    def __init__(
+        self,
+        handler: ToolHandler,
+        deadline: float = 3.0,
+        long_running: bool = False,
+        fallback: str = FALLBACK_DEFAULT,
+    ):
+        self.handler = handler
+        self.deadline = deadline
+        self.long_running = long_running
+        self.fallback = fallback
+
+
+def _user_id(call: dict) -> Optional[UUID]:
+    metadata = call.get("metadata") or (call.get("assistantOverrides") or {}).get("metadata") or {}
+    value = metadata.get("user_id") or metadata.get("userId")
+    try:
+        return UUID(value) if value else None
+    except ValueError:
+        return None
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+# Tool handlers: (arguments, call) -> text for the assistant to speak
+async def _capture_photo(args: dict, call: dict) -> str:
+    capture = vision.find_capture(call.get("id"), _user_id(call))
+    if not capture or time.monotonic() - capture[0] > CAPTURE_MAX_AGE_SECONDS:
+        return "カメラの画像がまだ届いていません。カメラを起動してからもう一度お試しください。"
+    return await vision_service.analyze_for_vapi(capture[1], context=args.get("prompt"))
+
+
+async def _start_recording(args: dict, call: dict) -> str:
+    event_bus.publish("recording.start", {"call_id": call.get("id"), "user_id": str(_user_id(call) or "")})
+    return "録音を開始します。"
+
+
+async def _stop_recording(args: dict, call: dict) -> str:
+    event_bus.publish("recording.stop", {"call_id": call.get("id"), "user_id": str(_user_id(call) or "")})
+    return "録音を停止しました。"
+
+
+async def _search_memory(args: dict, call: dict) -> str:
+    user_id = _user_id(call)
+    if not user_id:
+        return "ユーザー情報が見つかりませんでした。"
+    results = await memory.search_memories(user_id, query=args.get("query", ""), limit=5)
+    if not results:
+        return "該当する記憶は見つかりませんでした。"
+    return "\n".join(m.content for m in results)
+
+
+async def _save_memory(args: dict, call: dict) -> str:
+    user_id = _user_id(call)
+    if not user_id:
+        return "ユーザー情報が見つからないため、記憶できませんでした。"
+    await memory.create_memory(
+        user_id,
+        memory.MemoryCreate(content=args["content"], category=args.get("category", "context")),
+    )
+    return "覚えておきます。"
+
+
+def _google_tool(handler: Callable[[dict, str], Awaitable[str]]) -> ToolHandler:
+    """Run a Google tool against the caller's linked account"""
+
+    async def run(args: dict, call: dict) -> str:
+        user_id = _user_id(call)
+        account_id = await google_service.resolve_account(str(user_id) if user_id else None)
+        if account_id is None:
+            return GOOGLE_NOT_LINKED
+        return await handler(args, account_id)
+
+    return run
+
+
+async def _get_calendar_events(args: dict, account_id: str) -> str:
+    start = _parse_datetime(args.get("start_date")) or datetime.utcnow()
+    end = _parse_datetime(args.get("end_date")) or start + timedelta(days=1)
+    events = await google_service.get_calendar_events(
+        start, end, int(args.get("max_results", 5)), account_id=account_id
+    )
+    if not events:
+        return "この期間の予定はありません。"
+    lines = []
+    for event in events:
+        start_info = event.get("start", {})
+        when = start_info.get("dateTime") or start_info.get("date") or ""
+        lines.append(f"{when} {event.get('summary', '(無題)')}")
+    return "\n".join(lines)
+
+
+async def _create_calendar_event(args: dict, account_id: str) -> str:
+    event = await google_service.create_calendar_event(
+        summary=args["summary"],
+        start_time=_parse_datetime(args["start_time"]),
+        end_time=_parse_datetime(args["end_time"]),
+        description=args.get("description"),
+        location=args.get("location"),
+        account_id=account_id,
+    )
+    return f"「{event.get('summary', args['summary'])}」を予定に追加しました。"
+
+
+async def _read_document(args: dict, account_id: str) -> str:
+    document = await google_service.get_document(args["doc_id"], account_id=account_id)
+    return document["content"][:2000] or "ドキュメントは空です。"
+
+
+async def _create_document(args: dict, account_id: str) -> str:
+    document = await google_service.create_document(
+        args["title"], args.get("content"), account_id=account_id
+    )
+    return f"ドキュメント「{document['title']}」を作成しました。"
+
+
+async def _append_document(args: dict, account_id: str) -> str:
+    await google_service.update_document(args["doc_id"], args["content"], account_id=account_id)
+    return "ドキュメントに追記しました。"
+
+
+# Precompiled dispatch table, keyed by the function name configured in VAPI
+TOOLS: Dict[str, ToolSpec] = {
+    "capture_photo": ToolSpec(
+        _capture_photo, deadline=10.0, long_running=True,
+        fallback="画像の解析に時間がかかっています。もう一度「撮影して」と言ってください。",
+    ),
+    "start_recording": ToolSpec(_start_recording, deadline=1.0),
+    "stop_recording": ToolSpec(_stop_recording, deadline=1.0),
+    "search_memory": ToolSpec(
+        _search_memory, deadline=1.5, fallback="記憶の検索に失敗しました。"
+    ),
+    "save_memory": ToolSpec(_save_memory, deadline=1.5, fallback="記憶の保存に失敗しました。"),
+    "get_calendar_events": ToolSpec(
+        _google_tool(_get_calendar_events), deadline=8.0, long_running=True,
+        fallback="カレンダーに接続できませんでした。後でもう一度確認しますね。",
+    ),
+    "create_calendar_event": ToolSpec(
+        _google_tool(_create_calendar_event), deadline=8.0, long_running=True,
+        fallback="予定の登録に時間がかかっています。後でカレンダーを確認してください。",
+    ),
+    "read_document": ToolSpec(
+        _google_tool(_read_document), deadline=8.0, long_running=True,
+        fallback="ドキュメントを読み込めませんでした。",
+    ),
+    "create_document": ToolSpec(
+        _google_tool(_create_document), deadline=8.0, long_running=True,
+        fallback="ドキュメントの作成に時間がかかっています。",
+    ),
+    "append_document": ToolSpec(
+        _google_tool(_append_document), deadline=8.0, long_running=True,
+        fallback="ドキュメントへの書き込みに時間がかかっています。",
+    ),
+}
+
+_background_tasks: set = set()
+
+
+async def drain():
+    """Let acknowledged long-running tools finish and deliver their results"""
+    if _background_tasks:
+        await asyncio.gather(*list(_background_tasks), return_exceptions=True)
+
+
+async def _run_tool(spec: ToolSpec, name: str, args: dict, call: dict) -> str:
+    """Run a tool under its deadline, degrading to the spoken fallback"""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        # asyncio.timeout runs the handler inline; wait_for would spawn a task per call
+        async with asyncio.timeout(spec.deadline):
+            return await spec.handler(args, call)
+    except TimeoutError:
+        outcome = "timeout"
+        return spec.fallback
+    except Exception as e:
+        outcome = "error"
+        print(f"VAPI tool error ({name}): {e}")
+        return spec.fallback
+    finally:
+        event_bus.publish(
+            "vapi.tool_call",
+            {
+                "name": name,
+                "call_id": call.get("id"),
+                "user_id": str(_user_id(call) or ""),
+                "outcome": outcome,
+                "duration_ms": (time.perf_counter() - started) * 1000,
+            },
+        )
+
+
+async def _deliver_later(spec: ToolSpec, name: str, args: dict, call: dict, control_url: str):
+    result = await _run_tool(spec, name, args, call)
+    try:
+        await vapi_service.send_control_message(control_url, result)
+    except Exception as e:
+        print(f"VAPI control message error ({name}): {e}")
+
+
+async def _dispatch(tool_call: dict, call: dict, control_url: Optional[str]) -> dict:
+    tool_call_id = tool_call.get("id")
+    function = tool_call.get("function") or {}
+    name = function.get("name")
+    spec = TOOLS.get(name)
+    if spec is None:
+        return {"toolCallId": tool_call_id, "error": f"Unknown tool: {name}"}
+
+    args: Any = function.get("arguments") or {}
+    if isinstance(args, str):
+        try:
+            args = loads_bytes(args.encode()) if args.strip() else {}
+        except ValueError:
+            return {"toolCallId": tool_call_id, "error": "Invalid tool arguments: not JSON"}
+    if not isinstance(args, dict):
+        return {"toolCallId": tool_call_id, "error": "Invalid tool arguments: expected an object"}
+
+    if spec.long_running and control_url:
+        # Acknowledge now so the assistant keeps talking; the result is pushed
+        # into the live call through the control URL when it is ready
+        task = asyncio.create_task(_deliver_later(spec, name, args, call, control_url))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        return {"toolCallId": tool_call_id, "result": ACK_LONG_RUNNING}
+
+    return {"toolCallId": tool_call_id, "result": await _run_tool(spec, name, args, call)}
+
+
+@router.post("/webhook")
+async def vapi_webhook(request: Request):
+    """VAPI server URL: tool calls and call lifecycle messages"""
+    # Tools read and write the user's memories and Google data, so the
+    # webhook stays closed until a shared secret is configured
+    secret = get_settings().vapi_server_secret
+    if not secret:
+        raise HTTPException(status_code=503, detail="VAPI webhook is disabled (VAPI_SERVER_SECRET is not set)")
+    if not secrets.compare_digest(request.headers.get("x-vapi-secret", ""), secret):
+        raise HTTPException(status_code=401, detail="Invalid VAPI secret")
+
+    try:
+        message = loads_bytes(await request.body()).get("message") or {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+    message_type = message.get("type")
+    call = message.get("call") or {}
+
+    if message_type == "tool-calls":
+        control_url = (call.get("monitor") or {}).get("controlUrl")
+        tool_calls = message.get("toolCallList") or message.get("toolCalls") or []
+        if len(tool_calls) == 1:
+            results = [await _dispatch(tool_calls[0], call, control_url)]
+        else:
+            results = await asyncio.gather(*(_dispatch(tc, call, control_url) for tc in tool_calls))
+        return RawJSONResponse(dumps_bytes({"results": results}))
+
+    # Transcripts, status updates, end-of-call reports, ...
+    event_bus.publish(f"vapi.{message_type}", {"message": message, "user_id": str(_user_id(call) or "")})
+    return RawJSONResponse(b"{}")
+
+
+@router.get("/tools")
+async def list_tools():
+    """Names of the tools this webhook can dispatch"""
+    return {
+        "tools": [
+            {"name": name, "long_running": spec.long_running, "deadline_seconds": spec.deadline}
+            for name, spec in TOOLS.items()
+        ]
+    }
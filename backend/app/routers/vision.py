@@ -1,15 +1,28 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File
 from pydantic import BaseModel
 from typing import Optional
+from uuid import UUID
 import base64
+import time
 from datetime import datetime
 
+from app.config import get_settings
+from app.services.event_bus import event_bus
+from app.services.frame_stream import FrameDecodeError, frame_stream_service
+
 router = APIRouter()
 
+# Most recent camera capture per call ("call:<id>") and per user
+# ("user:<id>"), read by the VAPI camera tool
+latest_captures: dict = {}  # {key: (monotonic time, image_base64)}
+MAX_TRACKED_CAPTURES = 100
+
 
 class ImageAnalysisRequest(BaseModel):
     image_base64: str
     prompt: Optional[str] = "この画像に何が写っていますか？"
+    session_id: Optional[str] = None  # VAPI call id
+    user_id: Optional[UUID] = None
 
 
 class ImageAnalysisResponse(BaseModel):
@@ -18,12 +31,61 @@ class ImageAnalysisResponse(BaseModel):
     tokens_used: Optional[int] = None
 
 
+class FrameResponse(BaseModel):
+    session_id: str
+    selected: bool
+    change_score: float
+    pending_frames: int
+    analyzing: bool
+    description: Optional[str] = None
+    analyzed_at: Optional[datetime] = None
+
+
+class FrameStreamStatus(BaseModel):
+    session_id: str
+    user_id: Optional[str] = None
+    frames: int
+    selected_frames: int
+    pending_frames: int
+    analyzing: bool
+    analyses: int
+    frames_analyzed: int
+    tokens_used: int
+    errors: int
+    description: Optional[str] = None
+    analyzed_at: Optional[datetime] = None
+
+
 class CaptureResponse(BaseModel):
     success: bool
     message: str
     analysis: Optional[ImageAnalysisResponse] = None
 
 
+def _capture_keys(session_id: Optional[str], user_id: Optional[UUID]) -> list:
+    keys = []
+    if session_id:
+        keys.append(f"call:{session_id}")
+    if user_id:
+        keys.append(f"user:{user_id}")
+    return keys
+
+
+def store_capture(image_base64: str, session_id: Optional[str] = None, user_id: Optional[UUID] = None):
+    now = time.monotonic()
+    for key in _capture_keys(session_id, user_id):
+        latest_captures.pop(key, None)
+        latest_captures[key] = (now, image_base64)
+    while len(latest_captures) > MAX_TRACKED_CAPTURES:
+        del latest_captures[next(iter(latest_captures))]
+
+
+def find_capture(session_id: Optional[str], user_id: Optional[UUID]) -> Optional[tuple]:
+    """Newest capture sent for this call or by this user; never another caller's"""
+    captures = [latest_captures[k] for k in _capture_keys(session_id, user_id) if k in latest_captures]
+    return max(captures, key=lambda c: c[0]) if captures else None
+
+
 @router.post("/analyze", response_model=ImageAnalysisResponse)
 async def analyze_image(request: ImageAnalysisRequest):
     """Analyze an image using GPT-4 Vision"""
@@ -61,6 +123,13 @@ async def analyze_uploaded_image(
 async def process_camera_capture(request: ImageAnalysisRequest):
     """Process a camera capture from the frontend (triggered by 'capture' hotword)"""
     # TODO: Implement with OpenAI GPT-4 Vision API
+    if not request.session_id and not request.user_id:
+        raise HTTPException(status_code=400, detail="session_id or user_id is required")
+    store_capture(request.image_base64, request.session_id, request.user_id)
+    event_bus.publish(
+        "vision.captured",
+        {"session_id": request.session_id, "user_id": str(request.user_id) if request.user_id else None},
+    )
 
     # This endpoint is called when user says "撮影して"
     return CaptureResponse(
@@ -72,3 +141,75 @@ async def process_camera_capture(request: ImageAnalysisRequest):
             tokens_used=0,
         ),
     )
+
+
+async def _read_frame(request: Request, max_bytes: int) -> bytes:
+    """Request body, refused with 413 as soon as it is known to exceed max_bytes
+
+    A declared Content-Length is checked before anything is read; without
+    one (chunked uploads) the body is read only up to the cap.
+    """
+    declared = request.headers.get("content-length")
+    if declared is not None:
+        if not declared.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid Content-Length")
+        if int(declared) > max_bytes:
+            raise HTTPException(status_code=413, detail="Frame is too large")
+
+    body = bytearray()
+    async for piece in request.stream():
+        body += piece
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail="Frame is too large")
+    return bytes(body)
+
+
+@router.post("/stream/{session_id}/frames", response_model=FrameResponse)
+async def push_stream_frame(session_id: str, request: Request, user_id: Optional[UUID] = None):
+    """Continuous camera mode: send one JPEG frame (raw body) at a low, fixed rate
+
+    Frames are analyzed only when the scene has changed; the latest
+    description is returned with every frame.
+    """
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("image/"):
+        raise HTTPException(status_code=415, detail="Frame body must be an image")
+    body = await _read_frame(request, get_settings().vision_stream_max_frame_bytes)
+
+    try:
+        stream, score, selected = frame_stream_service.add_frame(
+            session_id, body, str(user_id) if user_id else None
+        )
+    except FrameDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if selected:
+        # The VAPI camera tool answers from the latest changed frame
+        store_capture(stream.latest_image, session_id, user_id)
+
+    return FrameResponse(
+        session_id=session_id,
+        selected=selected,
+        change_score=round(score, 4),
+        pending_frames=len(stream.pending),
+        analyzing=stream.analyzing,
+        description=stream.description,
+        analyzed_at=stream.analyzed_at,
+    )
+
+
+@router.get("/stream/{session_id}", response_model=FrameStreamStatus)
+async def get_stream_status(session_id: str):
+    """Latest scene description and frame/analysis counts of a stream"""
+    stream = frame_stream_service.get(session_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return stream.to_dict()
+
+
+@router.delete("/stream/{session_id}", response_model=FrameStreamStatus)
+async def close_stream(session_id: str):
+    """End continuous camera mode for a session"""
+    stream = frame_stream_service.stop(session_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return stream.to_dict()
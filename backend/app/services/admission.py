@@ -0,0 +1,223 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from app.config import get_settings
+
+# Priority classes: lower value is admitted first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Feature -> priority class for calls made through the LLM call layer
+FEATURE_PRIORITIES = {
+    "vision": INTERACTIVE,
+    "memory_extraction": BACKGROUND,
+    "embedding": BACKGROUND,
+}
+
+
+class AdmissionRejected(Exception):
+    """A call could not get an upstream slot before its queue deadline"""
+
+    def __init__(self, upstream: str, priority: int, waited_ms: float):
+        super().__init__(
+            f"{upstream} is saturated: no {PRIORITY_NAMES[priority]} slot after {waited_ms:.0f}ms"
+        )
+        self.upstream = upstream
+        self.priority = priority
+        self.waited_ms = waited_ms
+
+
+def is_throttled(error: BaseException) -> bool:
+    """True for provider rate-limit responses (HTTP 429)"""
+    return getattr(error, "status_code", None) == 429
+
+
+class Slot:
+    """A granted upstream slot; released by the controller when the call ends"""
+
+    __slots__ = ("priority", "started")
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self.started = time.monotonic()
+
+
+class UpstreamLimiter:
+    """Priority-queued concurrency limit for one upstream, adjusted by AIMD
+
+    The limit grows by ~1 per limit-worth of fast successes and is multiplied
+    by `backoff` on a 429 or a response slower than `target_latency`. Only
+    calls started after the last decrease can trigger another one, so a burst
+    of slow responses from the same congested period backs off once.
+
+    Background calls may use at most `background_share` of the limit, which
+    keeps headroom for interactive calls arriving while extraction is busy.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        target_latency: float,
+        background_share: float,
+        backoff: float = 0.7,
+    ):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.background_share = background_share
+        self.backoff = backoff
+        self.in_flight = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+        self.stats = {
+            cls: {"admitted": 0, "queued": 0, "rejected": 0, "throttled": 0}
+            for cls in PRIORITY_NAMES.values()
+        }
+        self.decreases = 0
+
+    def _capacity(self, priority: int) -> bool:
+        total = self.in_flight[INTERACTIVE] + self.in_flight[BACKGROUND]
+        if total >= int(self.limit):
+            return False
+        if priority == BACKGROUND:
+            return self.in_flight[BACKGROUND] < max(1, int(self.limit * self.background_share))
+        return True
+
+    def _grant(self, priority: int) -> Slot:
+        self.in_flight[priority] += 1
+        self.stats[PRIORITY_NAMES[priority]]["admitted"] += 1
+        return Slot(priority)
+
+    def _wake(self):
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._capacity(priority):
+                # The head is the most urgent waiter; lower classes wait behind it
+                return
+            heapq.heappop(self._waiters)
+            future.set_result(self._grant(priority))
+
+    async def acquire(self, priority: int, queue_timeout: float) -> Slot:
+        # Drop waiters that already timed out so they do not block the fast path
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        head_priority = self._waiters[0][0] if self._waiters else None
+        if (head_priority is None or head_priority > priority) and self._capacity(priority):
+            return self._grant(priority)
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self.stats[PRIORITY_NAMES[priority]]["queued"] += 1
+        try:
+            async with asyncio.timeout(queue_timeout):
+                return await future
+        except TimeoutError:
+            if future.done() and not future.cancelled():
+                # Granted in the same tick the deadline fired
+                return future.result()
+            future.cancel()
+            self.stats[PRIORITY_NAMES[priority]]["rejected"] += 1
+            raise AdmissionRejected(self.name, priority, (time.monotonic() - started) * 1000)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(future.result(), throttled=False, record=False)
+            future.cancel()
+            raise
+
+    def release(self, slot: Slot, throttled: bool, record: bool = True):
+        self.in_flight[slot.priority] -= 1
+        if record:
+            latency = time.monotonic() - slot.started
+            if throttled:
+                self.stats[PRIORITY_NAMES[slot.priority]]["throttled"] += 1
+            if throttled or latency > self.target_latency:
+                if slot.started >= self._last_decrease:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = time.monotonic()
+                    self.decreases += 1
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def get_stats(self) -> dict:
+        queued = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                queued[PRIORITY_NAMES[priority]] += 1
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": {PRIORITY_NAMES[p]: n for p, n in self.in_flight.items()},
+            "queue_depth": queued,
+            "decreases": self.decreases,
+            "classes": self.stats,
+        }
+
+
+class AdmissionController:
+    """Shared admission control for upstream AI calls, one limiter per upstream"""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.queue_timeouts = {
+            INTERACTIVE: self.settings.admission_queue_timeout_interactive_ms / 1000,
+            BACKGROUND: self.settings.admission_queue_timeout_background_ms / 1000,
+        }
+        self._limiters: Dict[str, UpstreamLimiter] = {}
+
+    def limiter(self, upstream: str) -> UpstreamLimiter:
+        limiter = self._limiters.get(upstream)
+        if limiter is None:
+            limiter = UpstreamLimiter(
+                upstream,
+                initial_limit=self.settings.admission_initial_limit,
+                min_limit=self.settings.admission_min_limit,
+                max_limit=self.settings.admission_max_limit,
+                target_latency=self.settings.admission_target_latency_ms / 1000,
+                background_share=self.settings.admission_background_share,
+            )
+            self._limiters[upstream] = limiter
+        return limiter
+
+    @asynccontextmanager
+    async def admit(self, upstream: str, priority: int = INTERACTIVE, queue_timeout: Optional[float] = None):
+        """Hold an upstream slot for the duration of the block
+
+        Raises AdmissionRejected if no slot frees up within the queue deadline.
+        """
+        limiter = self.limiter(upstream)
+        timeout = self.queue_timeouts[priority] if queue_timeout is None else queue_timeout
+        slot = await limiter.acquire(priority, timeout)
+        throttled = False
+        record = True
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            # The caller gave up; the latency says nothing about the upstream
+            record = False
+            raise
+        except Exception as e:
+            throttled = is_throttled(e)
+            raise
+        finally:
+            limiter.release(slot, throttled, record)
+
+    def get_stats(self) -> dict:
+        return {name: limiter.get_stats() for name, limiter in self._limiters.items()}
+
+
+admission_controller = AdmissionController()
@@ -0,0 +1,445 @@
+import math
+import time
+from collections import Counter, OrderedDict, deque
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set
+from app.config import get_settings
+
+# Recent sessions listed per user
+MAX_SESSIONS_PER_USER = 100
+# Tools whose calls count as vision usage
+VISION_TOOLS = ("capture_photo",)
+# Minimum seconds between sweeps for idle active sessions
+IDLE_SWEEP_SECONDS = 60.0
+# ended_reason of sessions ended by the idle sweep
+IDLE_TIMEOUT_REASON = "idle-timeout"
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch)
+
+    Values land in logarithmic buckets of ratio gamma = (1 + a) / (1 - a), so
+    any reported quantile is within a relative error `a` of the true value.
+    Two sketches merge by adding bucket counts, which is what lets daily
+    rollups be combined into any date range without keeping raw samples.
+    """
+
+    __slots__ = ("alpha", "gamma_log", "buckets", "zeros", "count", "total", "max")
+
+    def __init__(self, alpha: float = 0.01):
+        self.alpha = alpha
+        self.gamma_log = math.log((1 + alpha) / (1 - alpha))
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        if value <= 0:
+            self.zeros += 1
+        else:
+            key = math.ceil(math.log(value) / self.gamma_log)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total += max(value, 0.0)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "QuantileSketch"):
+        if other.alpha != self.alpha:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def _estimate(self, key: int) -> float:
+        # Relative midpoint of bucket (gamma^(k-1), gamma^k], capped at the observed max
+        return min(2 * math.exp(key * self.gamma_log) / (1 + math.exp(self.gamma_log)), self.max)
+
+    def quantiles(self, qs: List[float]) -> List[Optional[float]]:
+        """Several quantiles in one pass over the buckets (qs ascending)"""
+        if not self.count:
+            return [None] * len(qs)
+        results: List[Optional[float]] = []
+        ranks = iter([q * (self.count - 1) for q in qs])
+        rank = next(ranks)
+        seen = self.zeros
+        while rank is not None and rank < seen:
+            results.append(0.0)
+            rank = next(ranks, None)
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            while rank is not None and rank < seen:
+                results.append(self._estimate(key))
+                rank = next(ranks, None)
+            if rank is None:
+                break
+        results.extend([self.max] * (len(qs) - len(results)))
+        return results
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        p50, p90, p95, p99 = self.quantiles([0.50, 0.90, 0.95, 0.99])
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2),
+            "p50": round(p50, 2),
+            "p90": round(p90, 2),
+            "p95": round(p95, 2),
+            "p99": round(p99, 2),
+            "max": round(self.max, 2),
+        }
+
+
+class Rollup:
+    """Counters and latency sketches for one session, user-day or day"""
+
+    __slots__ = (
+        "sessions", "duration_seconds", "messages", "tool_calls", "tool_outcomes",
+        "vision_captures", "vision_analyses", "turn_latency_ms", "tool_latency_ms",
+    )
+
+    def __init__(self, alpha: float = 0.01):
+        self.sessions = 0
+        self.duration_seconds = 0.0
+        self.messages: Counter = Counter()  # by role
+        self.tool_calls: Counter = Counter()  # by tool name
+        self.tool_outcomes: Counter = Counter()  # ok / timeout / error
+        self.vision_captures = 0
+        self.vision_analyses = 0
+        self.turn_latency_ms = QuantileSketch(alpha)
+        self.tool_latency_ms = QuantileSketch(alpha)
+
+    def merge(self, other: "Rollup"):
+        self.sessions += other.sessions
+        self.duration_seconds += other.duration_seconds
+        self.messages.update(other.messages)
+        self.tool_calls.update(other.tool_calls)
+        self.tool_outcomes.update(other.tool_outcomes)
+        self.vision_captures += other.vision_captures
+        self.vision_analyses += other.vision_analyses
+        self.turn_latency_ms.merge(other.turn_latency_ms)
+        self.tool_latency_ms.merge(other.tool_latency_ms)
+
+    def summary(self) -> dict:
+        return {
+            "sessions": self.sessions,
+            "duration_seconds": round(self.duration_seconds, 1),
+            "average_duration_seconds": (
+                round(self.duration_seconds / self.sessions, 1) if self.sessions else None
+            ),
+            "message_count": sum(self.messages.values()),
+            "messages_by_role": dict(self.messages),
+            "tool_calls": dict(self.tool_calls.most_common()),
+            "tool_outcomes": dict(self.tool_outcomes),
+            "vision": {"captures": self.vision_captures, "analyses": self.vision_analyses},
+            "turn_latency_ms": self.turn_latency_ms.summary(),
+            "tool_latency_ms": self.tool_latency_ms.summary(),
+        }
+
+
+class SessionState:
+    __slots__ = (
+        "session_id", "user_id", "started_at", "ended_at", "ended_reason", "rollup",
+        "awaiting_reply_since", "active", "last_event_at",
+    )
+
+    def __init__(self, session_id: str, alpha: float):
+        self.session_id = session_id
+        self.user_id: Optional[str] = None
+        self.started_at: Optional[float] = None  # epoch seconds
+        self.ended_at: Optional[float] = None
+        # Set by an "in-progress" status update, cleared when the session ends
+        self.active = False
+        self.last_event_at = time.time()
+        self.ended_reason: Optional[str] = None
+        self.rollup = Rollup(alpha)
+        # When the user stopped speaking and the assistant has not started yet
+        self.awaiting_reply_since: Optional[float] = None
+
+    def summary(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "started_at": _iso(self.started_at),
+            "ended_at": _iso(self.ended_at),
+            "ended_reason": self.ended_reason,
+            "active": self.active,
+            **self.rollup.summary(),
+        }
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts).isoformat() if ts is not None else None
+
+
+def _event_time(message: dict) -> float:
+    """Epoch seconds of a VAPI message (its own timestamp, so forwarded events keep their time)"""
+    ts = message.get("timestamp")
+    if isinstance(ts, (int, float)):
+        return ts / 1000
+    return time.time()
+
+
+class SessionAnalytics:
+    """Streaming per-session, per-user and global rollups built from app events
+
+    Every observation is applied once, as it arrives, to its session, to the
+    user's rollup for that day and to the global rollup for that day;
+    queries only read and merge these pre-aggregated rollups. Handlers
+    subscribe without local_only, so in multi-worker mode each worker builds
+    the same state from the forwarded events. State is in memory: finished
+    sessions beyond analytics_max_sessions and days beyond
+    analytics_retention_days are dropped (their counts stay in the daily
+    rollups until those expire).
+
+    A session is active from its "in-progress" status update until it ends.
+    Sessions whose end was never reported (a lost webhook, a worker that
+    missed the event) are ended as idle-timeout, at their last event, once
+    nothing has arrived for analytics_session_idle_seconds.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.alpha = self.settings.analytics_sketch_accuracy
+        self.sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self.user_days: Dict[str, Dict[date, Rollup]] = {}
+        self.days: Dict[date, Rollup] = {}
+        self.active: Set[str] = set()
+        self._user_sessions: Dict[str, deque] = {}  # {user_id: recent session ids}
+        self._last_sweep = 0.0
+
+    # Rollup targets
+    def _session(self, session_id: Optional[str], user_id: Optional[str] = None) -> Optional[SessionState]:
+        if not session_id:
+            return None
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = SessionState(session_id, self.alpha)
+            self._evict()
+        session.last_event_at = max(session.last_event_at, time.time())
+        if user_id and not session.user_id:
+            session.user_id = user_id
+            recent = self._user_sessions.get(user_id)
+            if recent is None:
+                recent = self._user_sessions[user_id] = deque(maxlen=MAX_SESSIONS_PER_USER)
+            recent.append(session_id)
+        return session
+
+    def _evict(self):
+        excess = len(self.sessions) - self.settings.analytics_max_sessions
+        if excess <= 0:
+            return
+        # Oldest finished sessions first; active ones only if nothing else is left
+        finished = []
+        for sid in self.sessions:
+            if sid not in self.active:
+                finished.append(sid)
+                if len(finished) == excess:
+                    break
+        for sid in finished:
+            del self.sessions[sid]
+        while len(self.sessions) > self.settings.analytics_max_sessions:
+            sid, _ = self.sessions.popitem(last=False)
+            self.active.discard(sid)
+
+    def _expire_idle(self, now: float):
+        """End active sessions that have had no events for analytics_session_idle_seconds"""
+        self._last_sweep = now
+        cutoff = now - self.settings.analytics_session_idle_seconds
+        for sid in [sid for sid in self.active if self.sessions[sid].last_event_at < cutoff]:
+            session = self.sessions[sid]
+            self._end(session, session.last_event_at, IDLE_TIMEOUT_REASON)
+
+    def _day(self, rollups: Dict[date, Rollup], ts: float) -> Rollup:
+        day = date.fromtimestamp(ts)
+        rollup = rollups.get(day)
+        if rollup is None:
+            rollup = rollups[day] = Rollup(self.alpha)
+            cutoff = day - timedelta(days=self.settings.analytics_retention_days)
+            for old in [d for d in rollups if d <= cutoff]:
+                del rollups[old]
+        return rollup
+
+    def _targets(self, session: Optional[SessionState], user_id: Optional[str], ts: float) -> List[Rollup]:
+        targets = [self._day(self.days, ts)]
+        user_id = user_id or (session.user_id if session else None)
+        if user_id:
+            targets.append(self._day(self.user_days.setdefault(user_id, {}), ts))
+        if session is not None:
+            targets.append(session.rollup)
+        return targets
+
+    # Event handling
+    def on_event(self, event: dict):
+        """Wildcard event bus subscriber"""
+        handler = self._handlers.get(event.get("type"))
+        if handler is not None:
+            handler(self, event)
+        now = time.time()
+        if now - self._last_sweep >= IDLE_SWEEP_SECONDS:
+            self._expire_idle(now)
+
+    def _on_status_update(self, event: dict):
+        message = event.get("message") or {}
+        session = self._session((message.get("call") or {}).get("id"), event.get("user_id"))
+        if session is None:
+            return
+        ts = _event_time(message)
+        if message.get("status") == "in-progress":
+            if session.started_at is None:
+                session.started_at = ts
+            if session.ended_at is None and not session.active:
+                session.active = True
+                self.active.add(session.session_id)
+        elif message.get("status") == "ended":
+            self._end(session, ts, message.get("endedReason"))
+
+    def _on_end_of_call_report(self, event: dict):
+        message = event.get("message") or {}
+        session = self._session((message.get("call") or {}).get("id"), event.get("user_id"))
+        if session is None:
+            return
+        ts = _event_time(message)
+        duration = message.get("durationSeconds")
+        if duration is None and message.get("startedAt") and message.get("endedAt"):
+            try:
+                started = datetime.fromisoformat(message["startedAt"].replace("Z", "+00:00"))
+                ended = datetime.fromisoformat(message["endedAt"].replace("Z", "+00:00"))
+                duration = (ended - started).total_seconds()
+            except ValueError:
+                duration = None
+        if duration is not None and session.started_at is None:
+            session.started_at = ts - duration
+        self._end(session, ts, message.get("endedReason"))
+
+    def _end(self, session: SessionState, ts: float, reason: Optional[str]):
+        if session.ended_at is not None:
+            if reason and not session.ended_reason:
+                session.ended_reason = reason
+            return
+        session.ended_at = ts
+        session.ended_reason = reason
+        session.active = False
+        self.active.discard(session.session_id)
+        session.awaiting_reply_since = None
+        duration = ts - session.started_at if session.started_at is not None else 0.0
+        for rollup in self._targets(session, None, ts):
+            rollup.sessions += 1
+            rollup.duration_seconds += max(duration, 0.0)
+
+    def _on_speech_update(self, event: dict):
+        message = event.get("message") or {}
+        session = self._session((message.get("call") or {}).get("id"), event.get("user_id"))
+        if session is None:
+            return
+        ts = _event_time(message)
+        if session.started_at is None:
+            session.started_at = ts
+        role, status = message.get("role"), message.get("status")
+        if role == "user" and status == "stopped":
+            session.awaiting_reply_since = ts
+        elif role == "user" and status == "started":
+            session.awaiting_reply_since = None
+        elif role == "assistant" and status == "started" and session.awaiting_reply_since is not None:
+            latency_ms = (ts - session.awaiting_reply_since) * 1000
+            session.awaiting_reply_since = None
+            for rollup in self._targets(session, None, ts):
+                rollup.turn_latency_ms.add(latency_ms)
+
+    def _on_tool_call(self, event: dict):
+        session = self._session(event.get("call_id"), event.get("user_id"))
+        name = event.get("name") or "unknown"
+        for rollup in self._targets(session, event.get("user_id"), time.time()):
+            rollup.tool_calls[name] += 1
+            rollup.tool_outcomes[event.get("outcome") or "ok"] += 1
+            rollup.tool_latency_ms.add(event.get("duration_ms") or 0.0)
+            if name in VISION_TOOLS:
+                rollup.vision_analyses += 1
+
+    def _on_conversation_logged(self, event: dict):
+        log = event.get("log") or {}
+        session_id = (log.get("metadata") or {}).get("call_id") or log.get("session_id")
+        session = self._session(session_id, event.get("user_id"))
+        for rollup in self._targets(session, event.get("user_id"), time.time()):
+            rollup.messages[log.get("role") or "user"] += 1
+
+    def _on_vision_captured(self, event: dict):
+        session = self._session(event.get("session_id"), event.get("user_id"))
+        for rollup in self._targets(session, event.get("user_id"), time.time()):
+            rollup.vision_captures += 1
+
+    def _on_vision_analyzed(self, event: dict):
+        session = self._session(event.get("session_id"), event.get("user_id"))
+        for rollup in self._targets(session, event.get("user_id"), time.time()):
+            rollup.vision_analyses += 1
+
+    _handlers = {
+        "vapi.status-update": _on_status_update,
+        "vapi.end-of-call-report": _on_end_of_call_report,
+        "vapi.speech-update": _on_speech_update,
+        "vapi.tool_call": _on_tool_call,
+        "conversation.logged": _on_conversation_logged,
+        "vision.captured": _on_vision_captured,
+        "vision.analyzed": _on_vision_analyzed,
+    }
+
+    # Queries (pre-aggregated state only)
+    def _merged(self, rollups: Dict[date, Rollup], days: int) -> Rollup:
+        cutoff = date.today() - timedelta(days=days - 1)
+        merged = Rollup(self.alpha)
+        for day, rollup in rollups.items():
+            if day >= cutoff:
+                merged.merge(rollup)
+        return merged
+
+    def overview(self, days: int = 1) -> dict:
+        self._expire_idle(time.time())
+        return {
+            "days": days,
+            "active_sessions": len(self.active),
+            "users": len(self.user_days),
+            **self._merged(self.days, days).summary(),
+        }
+
+    def user_summary(self, user_id: str, days: int = 7) -> dict:
+        return {
+            "user_id": user_id,
+            "days": days,
+            **self._merged(self.user_days.get(user_id, {}), days).summary(),
+        }
+
+    def daily(self, user_id: Optional[str] = None, days: int = 7) -> List[dict]:
+        rollups = self.user_days.get(user_id, {}) if user_id else self.days
+        cutoff = date.today() - timedelta(days=days - 1)
+        return [
+            {"date": day.isoformat(), **rollups[day].summary()}
+            for day in sorted(rollups, reverse=True)
+            if day >= cutoff
+        ]
+
+    def session_summary(self, session_id: str) -> Optional[dict]:
+        session = self.sessions.get(session_id)
+        return session.summary() if session else None
+
+    def user_sessions(self, user_id: str, limit: int = 20) -> List[dict]:
+        # Evicted sessions may still be listed; skip them
+        recent = reversed(self._user_sessions.get(user_id, ()))
+        return [self.sessions[sid].summary() for sid in recent if sid in self.sessions][:limit]
+
+    def clear(self):
+        self.sessions.clear()
+        self.user_days.clear()
+        self.days.clear()
+        self.active.clear()
+        self._user_sessions.clear()
+
+
+session_analytics = SessionAnalytics()
@@ -0,0 +1,77 @@
+import asyncio
+import inspect
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+
+class EventBus:
+    """In-process publish/subscribe for app events (tool calls, transcripts, writes)
+
+    Handlers run in publish order; coroutine handlers are scheduled as tasks so
+    a publisher on the request path never waits on subscribers. With a
+    forwarder set (multi-worker mode), published events are also sent to the
+    other workers, whose buses hand them to their local subscribers.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[dict], Any]]] = defaultdict(list)
+        self._local_only: set = set()
+        self._tasks: set = set()
+        self._forward: Optional[Callable[[str, dict], None]] = None
+
+    def set_forwarder(self, forward: Optional[Callable[[str, dict], None]]):
+        self._forward = forward
+
+    def subscribe(self, event_type: str, handler: Callable[[dict], Any], local_only: bool = False):
+        """Subscribe to an event type ('*' receives every event)
+
+        `local_only` handlers only see events published by this worker; use it
+        for side effects that must happen once per event, not once per worker.
+        Subscribing a handler that is already subscribed is a no-op, so an app
+        lifespan that runs more than once does not deliver events twice.
+        """
+        if handler not in self._handlers[event_type]:
+            self._handlers[event_type].append(handler)
+        if local_only:
+            self._local_only.add(handler)
+
+    def unsubscribe(self, event_type: str, handler: Callable[[dict], Any]):
+        if handler in self._handlers.get(event_type, []):
+            self._handlers[event_type].remove(handler)
+        self._local_only.discard(handler)
+
+    def publish(self, event_type: str, payload: dict):
+        """Deliver an event to its subscribers (in every worker)"""
+        if self._forward is not None:
+            try:
+                self._forward(event_type, payload)
+            except Exception as e:
+                print(f"Event forward error ({event_type}): {e}")
+        self.deliver(event_type, payload)
+
+    def deliver(self, event_type: str, payload: dict, remote: bool = False):
+        """Deliver an event to this worker's subscribers only"""
+        handlers = self._handlers.get(event_type, []) + self._handlers.get("*", [])
+        if remote:
+            handlers = [h for h in handlers if h not in self._local_only]
+        if not handlers:
+            return
+
+        event = {"type": event_type, **payload}
+        for handler in handlers:
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+            except Exception as e:
+                print(f"Event handler error ({event_type}): {e}")
+
+    async def drain(self):
+        """Wait for in-flight async handlers (used at shutdown)"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+event_bus = EventBus()
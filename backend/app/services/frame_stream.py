@@ -0,0 +1,239 @@
+import asyncio
+import base64
+import io
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from app.config import get_settings
+from app.services.event_bus import event_bus
+from app.services.vision_service import VisionService, vision_service
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Luminance thumbnail compared between frames (width, height); each cell
+# averages ~40x40 pixels of a VGA frame, which absorbs sensor noise and a
+# few pixels of head jitter
+THUMBNAIL_SIZE = (16, 12)
+# Luminance standard deviation floor used when standardizing thumbnails
+MIN_CONTRAST = 0.02
+
+STREAM_PROMPT = (
+    "以下はウェアラブルカメラの映像から、場面が変わったときに切り出したフレームです（古い順）。"
+    "今見えている状況と、直前からの変化を音声で読み上げる想定で簡潔に説明してください。"
+)
+
+
+class FrameDecodeError(Exception):
+    """A frame could not be decoded as an image (maps to a 400 response)"""
+
+
+def luminance_thumbnail(image_bytes: bytes, size: Tuple[int, int] = THUMBNAIL_SIZE) -> "np.ndarray":
+    """Tiny float32 grayscale image in [0, 1] for change detection
+
+    JPEG draft mode decodes straight to grayscale at 1/2 to 1/8 scale from
+    the DCT coefficients, so the full-resolution frame is never built.
+    """
+    import numpy as np
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            image.draft("L", (size[0] * 2, size[1] * 2))
+            thumbnail = image.convert("L").resize(size, Image.BOX)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise FrameDecodeError(f"Invalid image frame: {e}") from e
+    return np.asarray(thumbnail, dtype=np.float32) / 255.0
+
+
+def standardize(thumbnail: "np.ndarray") -> "np.ndarray":
+    """Zero mean, unit contrast, so auto-exposure and lighting shifts cancel out
+
+    Nearly uniform frames (covered lens, darkness) keep a floor on the
+    divisor instead of blowing sensor noise up to full contrast.
+    """
+    return (thumbnail - thumbnail.mean()) / max(float(thumbnail.std()), MIN_CONTRAST)
+
+
+def change_score(reference: "np.ndarray", frame: "np.ndarray", pixel_threshold: float) -> float:
+    """Fraction of pixels that differ by more than pixel_threshold between standardized thumbnails"""
+    import numpy as np
+
+    return float(np.count_nonzero(np.abs(frame - reference) > pixel_threshold)) / frame.size
+
+
+class FrameStream:
+    """Change-detection and batching state for one camera stream"""
+
+    def __init__(self, session_id: str, user_id: Optional[str]):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.reference: Optional["np.ndarray"] = None  # standardized thumbnail of the last selected frame
+        self.pending: List[str] = []  # selected frames (base64) waiting for the next vision request
+        self.latest_image: Optional[str] = None
+        self.frames = 0
+        self.selected_frames = 0
+        self.analyses = 0
+        self.frames_analyzed = 0
+        self.tokens_used = 0
+        self.errors = 0
+        self.description: Optional[str] = None
+        self.analyzed_at: Optional[datetime] = None
+        self.last_frame = time.monotonic()
+        self.last_request = 0.0  # monotonic start of the last vision request
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def analyzing(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "user_id": self.user_id,
+            "frames": self.frames,
+            "selected_frames": self.selected_frames,
+            "pending_frames": len(self.pending),
+            "analyzing": self.analyzing,
+            "analyses": self.analyses,
+            "frames_analyzed": self.frames_analyzed,
+            "tokens_used": self.tokens_used,
+            "errors": self.errors,
+            "description": self.description,
+            "analyzed_at": self.analyzed_at,
+        }
+
+
+class FrameStreamService:
+    """Continuous camera mode: change-gated frame selection, batched vision calls
+
+    Clients post JPEG frames at a low, fixed rate. Each frame is reduced to
+    a small luminance thumbnail and compared with the last *selected* frame;
+    only frames where enough of the scene changed are kept. Kept frames are
+    sent together as one multi-image request, at most one request per
+    vision_stream_min_interval_seconds per stream, so vision spend follows
+    scene changes rather than frame rate: a static scene costs one small
+    decode per frame and no upstream calls.
+
+    Streams are per worker; a deployment with several workers needs sticky
+    routing by session for the frames of one stream.
+    """
+
+    def __init__(self, vision: Optional[VisionService] = None):
+        self.settings = get_settings()
+        self.vision = vision or vision_service
+        self._streams: "OrderedDict[str, FrameStream]" = OrderedDict()
+        self.stats = {"frames": 0, "selected_frames": 0, "analyses": 0, "frames_analyzed": 0, "detect_ms": 0.0}
+
+    def get(self, session_id: str) -> Optional[FrameStream]:
+        return self._streams.get(session_id)
+
+    def _stream(self, session_id: str, user_id: Optional[str]) -> FrameStream:
+        stream = self._streams.get(session_id)
+        if stream is None:
+            self._expire()
+            stream = self._streams[session_id] = FrameStream(session_id, user_id)
+        else:
+            self._streams.move_to_end(session_id)
+            stream.user_id = stream.user_id or user_id
+        return stream
+
+    def _expire(self):
+        """Drop idle streams, then the least recently fed ones past the cap"""
+        cutoff = time.monotonic() - self.settings.vision_stream_idle_seconds
+        for session_id, stream in list(self._streams.items()):
+            if stream.last_frame < cutoff:
+                self.stop(session_id)
+        while len(self._streams) >= self.settings.vision_stream_max_streams:
+            self.stop(next(iter(self._streams)))
+
+    def add_frame(self, session_id: str, image_bytes: bytes, user_id: Optional[str] = None) -> Tuple[FrameStream, float, bool]:
+        """Score a frame against the stream's reference; returns (stream, change score, selected)
+
+        Selected frames are queued for the stream's next vision request.
+        """
+        started = time.perf_counter()
+        thumbnail = standardize(luminance_thumbnail(image_bytes))
+        stream = self._stream(session_id, user_id)
+        stream.frames += 1
+        stream.last_frame = time.monotonic()
+        if stream.reference is None or stream.reference.shape != thumbnail.shape:
+            score = 1.0
+        else:
+            score = change_score(stream.reference, thumbnail, self.settings.vision_stream_pixel_threshold)
+        selected = score >= self.settings.vision_stream_change_threshold
+
+        self.stats["frames"] += 1
+        if selected:
+            stream.reference = thumbnail
+            stream.selected_frames += 1
+            stream.latest_image = base64.b64encode(image_bytes).decode("ascii")
+            stream.pending.append(stream.latest_image)
+            # Frames selected while a request is in flight: keep the newest
+            del stream.pending[: -self.settings.vision_stream_max_frames]
+            self.stats["selected_frames"] += 1
+            if not stream.analyzing:
+                stream.task = asyncio.create_task(self._analyze_pending(stream))
+        self.stats["detect_ms"] += (time.perf_counter() - started) * 1000
+        return stream, score, selected
+
+    async def _analyze_pending(self, stream: FrameStream):
+        """Send queued frames as multi-image requests until the queue is empty"""
+        while stream.pending:
+            wait = stream.last_request + self.settings.vision_stream_min_interval_seconds - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            frames, stream.pending = stream.pending, []
+            stream.last_request = time.monotonic()
+            prompt = STREAM_PROMPT
+            if stream.description:
+                prompt = f"直前の状況: {stream.description}\n\n{prompt}"
+            try:
+                result = await self.vision.analyze_images(
+                    frames, prompt, max_tokens=200, detail=self.settings.vision_stream_detail
+                )
+            except Exception:
+                stream.errors += 1
+                continue
+
+            stream.analyses += 1
+            stream.frames_analyzed += len(frames)
+            stream.tokens_used += result["tokens_used"] or 0
+            stream.description = result["description"]
+            stream.analyzed_at = datetime.now()
+            self.stats["analyses"] += 1
+            self.stats["frames_analyzed"] += len(frames)
+            event_bus.publish(
+                "vision.analyzed",
+                {"session_id": stream.session_id, "user_id": stream.user_id, "frames": len(frames)},
+            )
+
+    def stop(self, session_id: str) -> Optional[FrameStream]:
+        """Stop a stream; frames not yet analyzed are discarded"""
+        stream = self._streams.pop(session_id, None)
+        if stream is not None and stream.task is not None:
+            stream.task.cancel()
+        return stream
+
+    async def close(self):
+        """Cancel in-flight stream requests (worker shutdown)"""
+        tasks = [s.task for s in self._streams.values() if s.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._streams.clear()
+
+    def get_stats(self) -> dict:
+        frames = self.stats["frames"]
+        return {
+            "streams": len(self._streams),
+            "analyzing": sum(1 for s in self._streams.values() if s.analyzing),
+            **self.stats,
+            "detect_ms": round(self.stats["detect_ms"], 1),
+            "selected_ratio": round(self.stats["selected_frames"] / frames, 4) if frames else 0.0,
+            "frames_per_analysis": round(frames / self.stats["analyses"], 1) if self.stats["analyses"] else None,
+        }
+
+
+frame_stream_service = FrameStreamService()
@@ -0,0 +1,311 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Optional
+from app.config import get_settings
+from app.services.event_bus import event_bus
+from app.services.shared_state import shared_state
+
+if TYPE_CHECKING:
+    from cryptography.fernet import MultiFernet
+    from google.oauth2.credentials import Credentials
+
+# Shared account, used for users without their own only when
+# google_default_account_fallback is enabled (single-user setup)
+DEFAULT_ACCOUNT = "default"
+# Minimum wait before retrying a failed background refresh of an account
+REFRESH_RETRY_SECONDS = 30.0
+
+
+def seconds_left(credentials: "Credentials") -> Optional[float]:
+    """Seconds until the access token expires (None: no known expiry)"""
+    if credentials.expiry is None:
+        return None
+    # google-auth keeps expiry as a naive UTC datetime
+    return (credentials.expiry - datetime.utcnow()).total_seconds()
+
+
+class GoogleCredentialStore:
+    """Per-account Google OAuth credentials, refreshed ahead of expiry
+
+    Integration calls take credentials from memory. A token close to expiry
+    (google_token_refresh_margin_seconds) is still returned as-is while a
+    refresh runs in the background, and a periodic refresher renews tokens of
+    recently used accounts before they get that close, so a call during a
+    conversation only waits when its token has already expired (e.g. the
+    first call after a long idle period). Concurrent refreshes of one account
+    share a single token request. A refresh token the token endpoint rejects
+    for good (revoked, expired) unlinks the account on every worker; other
+    failures are retried in the background no more than every
+    REFRESH_RETRY_SECONDS.
+
+    Credentials are persisted encrypted (Fernet, GOOGLE_CREDENTIALS_KEY; a
+    comma-separated list rotates keys, the first one encrypts) in shared
+    state when enabled, otherwise in google_credentials_dir. Without a key
+    they are kept in memory only. Every worker refreshes independently; a
+    refresh is published so the others adopt the new token instead of
+    requesting their own.
+    """
+
+    NAMESPACE = "google_credentials"
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._credentials: Dict[str, "Credentials"] = {}
+        self._last_used: Dict[str, float] = {}  # {account_id: monotonic time}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._failed_at: Dict[str, float] = {}  # {account_id: monotonic time of the last failed refresh}
+        self._fernet: Optional["MultiFernet"] = None
+        self._task: Optional[asyncio.Task] = None
+        self._writes: set = set()
+        self.stats = {"loads": 0, "refreshes": 0, "background_refreshes": 0, "blocked_calls": 0, "refresh_errors": 0, "unlinked": 0, "adopted": 0}
+
+    @property
+    def persistent(self) -> bool:
+        return bool(self.settings.google_credentials_key)
+
+    # Background refresher
+    def start(self):
+        if self.settings.google_token_refresh_interval_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        tasks = [*self._refreshing.values(), *self._writes]
+        for task in self._refreshing.values():
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.settings.google_token_refresh_interval_seconds)
+            idle_cutoff = time.monotonic() - self.settings.google_credentials_idle_seconds
+            for account_id, credentials in list(self._credentials.items()):
+                left = seconds_left(credentials)
+                if left is None or left > self.settings.google_token_refresh_margin_seconds:
+                    continue
+                # Idle accounts refresh on their next use instead
+                if self._last_used.get(account_id, 0.0) < idle_cutoff or self._backing_off(account_id):
+                    continue
+                try:
+                    await self.refresh(account_id)
+                    self.stats["background_refreshes"] += 1
+                except Exception as e:
+                    print(f"Google token refresh error ({account_id}): {e}")
+
+    # Access
+    async def get(self, account_id: str) -> Optional["Credentials"]:
+        """Credentials ready for an API call, or None if the account is not linked"""
+        credentials = self._credentials.get(account_id)
+        if credentials is None:
+            credentials = await self._load(account_id)
+            if credentials is None:
+                return None
+        self._last_used[account_id] = time.monotonic()
+
+        # `valid` is False within google-auth's own refresh threshold, where
+        # the API client would otherwise refresh inline on its worker thread
+        if not credentials.valid:
+            self.stats["blocked_calls"] += 1
+            return await self.refresh(account_id)
+        left = seconds_left(credentials)
+        if left is not None and left < self.settings.google_token_refresh_margin_seconds:
+            self._refresh_in_background(account_id)
+        return credentials
+
+    def put(self, account_id: str, credentials: "Credentials"):
+        """Link credentials (e.g. after the OAuth code exchange) and persist them"""
+        self._credentials[account_id] = credentials
+        self._last_used[account_id] = time.monotonic()
+        self._persist(account_id, credentials)
+
+    async def delete(self, account_id: str):
+        """Unlink an account on every worker"""
+        self._credentials.pop(account_id, None)
+        self._last_used.pop(account_id, None)
+        self._failed_at.pop(account_id, None)
+        if shared_state.enabled:
+            await shared_state.delete(self.NAMESPACE, account_id)
+        else:
+            path = self._path(account_id)
+            if os.path.exists(path):
+                os.remove(path)
+        event_bus.publish("google.credentials.updated", {"account_id": account_id})
+
+    # Refresh
+    async def refresh(self, account_id: str) -> "Credentials":
+        """Renew an account's access token; concurrent callers share one request"""
+        task = self._refreshing.get(account_id)
+        if task is None:
+            task = self._refreshing[account_id] = asyncio.create_task(self._refresh(account_id))
+            task.add_done_callback(lambda _: self._refreshing.pop(account_id, None))
+        return await asyncio.shield(task)
+
+    def _backing_off(self, account_id: str) -> bool:
+        """True while an account's last refresh failure is recent"""
+        failed_at = self._failed_at.get(account_id)
+        return failed_at is not None and time.monotonic() - failed_at < REFRESH_RETRY_SECONDS
+
+    def _refresh_in_background(self, account_id: str):
+        if self._backing_off(account_id):
+            return
+        if account_id not in self._refreshing:
+            task = self._refreshing[account_id] = asyncio.create_task(self._refresh(account_id))
+            task.add_done_callback(self._background_done(account_id))
+
+    def _background_done(self, account_id: str):
+        def done(task: asyncio.Task):
+            self._refreshing.pop(account_id, None)
+            if not task.cancelled() and task.exception() is not None:
+                print(f"Google token refresh error ({account_id}): {task.exception()}")
+
+        return done
+
+    async def _refresh(self, account_id: str) -> "Credentials":
+        from google.auth.exceptions import RefreshError
+        from google.auth.transport.requests import Request
+
+        credentials = self._credentials.get(account_id)
+        if credentials is None:
+            raise ValueError("Not authenticated with Google")
+
+        # Another worker may have refreshed it already
+        stored = await self._read(account_id)
+        if stored is not None and self._is_newer(stored, credentials):
+            self._credentials[account_id] = stored
+            self.stats["adopted"] += 1
+            left = seconds_left(stored)
+            if stored.valid and (left is None or left > self.settings.google_token_refresh_margin_seconds):
+                return stored
+            credentials = stored
+
+        try:
+            await asyncio.to_thread(credentials.refresh, Request())
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            if isinstance(e, RefreshError) and not e.retryable:
+                # Revoked or expired refresh token: the user has to link the account again
+                self.stats["unlinked"] += 1
+                await self.delete(account_id)
+                raise ValueError(f"Google authorization is no longer valid: {e}") from e
+            self._failed_at[account_id] = time.monotonic()
+            raise
+        self._failed_at.pop(account_id, None)
+        self.stats["refreshes"] += 1
+        await self._save(account_id, credentials)
+        return credentials
+
+    @staticmethod
+    def _is_newer(candidate: "Credentials", current: "Credentials") -> bool:
+        if candidate.token == current.token:
+            return False
+        return current.expiry is None or (candidate.expiry is not None and candidate.expiry > current.expiry)
+
+    async def on_credentials_updated(self, event: dict):
+        """Adopt tokens refreshed or unlinked by other workers"""
+        account_id = event["account_id"]
+        current = self._credentials.get(account_id)
+        if current is None:
+            return
+        stored = await self._read(account_id)
+        if stored is None:
+            if self.persistent:
+                self._credentials.pop(account_id, None)
+        elif self._is_newer(stored, current):
+            self._credentials[account_id] = stored
+            self.stats["adopted"] += 1
+
+    # Encrypted persistence
+    def _cipher(self) -> "MultiFernet":
+        if self._fernet is None:
+            from cryptography.fernet import Fernet, MultiFernet
+
+            keys = [k.strip() for k in self.settings.google_credentials_key.split(",") if k.strip()]
+            self._fernet = MultiFernet([Fernet(k) for k in keys])
+        return self._fernet
+
+    def _path(self, account_id: str) -> str:
+        name = hashlib.sha256(account_id.encode()).hexdigest()
+        return os.path.join(self.settings.google_credentials_dir, f"{name}.token")
+
+    async def _load(self, account_id: str) -> Optional["Credentials"]:
+        credentials = await self._read(account_id)
+        if credentials is None:
+            return None
+        self.stats["loads"] += 1
+        # A concurrent load or put may have won
+        return self._credentials.setdefault(account_id, credentials)
+
+    async def _read(self, account_id: str) -> Optional["Credentials"]:
+        if not self.persistent:
+            return None
+        if shared_state.enabled:
+            data = await shared_state.get(self.NAMESPACE, account_id)
+        else:
+            data = await asyncio.to_thread(self._read_file, self._path(account_id))
+        if data is None:
+            return None
+
+        from cryptography.fernet import InvalidToken
+        from google.oauth2.credentials import Credentials
+
+        try:
+            info = json.loads(self._cipher().decrypt(data))
+        except InvalidToken:
+            print(f"Stored Google credentials for {account_id} cannot be decrypted with the configured key")
+            return None
+        return Credentials.from_authorized_user_info(info)
+
+    @staticmethod
+    def _read_file(path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _persist(self, account_id: str, credentials: "Credentials"):
+        task = asyncio.create_task(self._save(account_id, credentials))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _save(self, account_id: str, credentials: "Credentials"):
+        """Write the encrypted credentials, then tell other workers to pick them up"""
+        if self.persistent:
+            await self._write(account_id, self._cipher().encrypt(credentials.to_json().encode()))
+        event_bus.publish("google.credentials.updated", {"account_id": account_id})
+
+    async def _write(self, account_id: str, data: bytes):
+        if shared_state.enabled:
+            await shared_state.set(self.NAMESPACE, account_id, data)
+        else:
+            await asyncio.to_thread(self._write_file, self._path(account_id), data)
+
+    @staticmethod
+    def _write_file(path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_stats(self) -> dict:
+        lefts = [seconds_left(c) for c in self._credentials.values()]
+        lefts = [left for left in lefts if left is not None]
+        return {
+            "accounts": len(self._credentials),
+            "refreshing": len(self._refreshing),
+            "persistent": self.persistent,
+            "min_seconds_left": round(min(lefts), 1) if lefts else None,
+            **self.stats,
+        }
+
+
+google_credential_store = GoogleCredentialStore()
@@ -1,9 +1,31 @@
-from typing import Optional, List, Dict, Any
+import asyncio
+import hashlib
+import hmac
+import time
+from typing import TYPE_CHECKING, Optional, List, Dict, Any
 from datetime import datetime
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 from app.config import get_settings
+from app.services.google_credentials import DEFAULT_ACCOUNT, GoogleCredentialStore, google_credential_store
+
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+
+# How long an authorization URL's `state` is accepted by the callback
+OAUTH_STATE_TTL_SECONDS = 600
+
+# The Google SDKs take ~0.3s to import; they are loaded on first use or by
+# the startup warm-up (app.services.warmup), never at module import.
+
+
+def _build(service_name: str, version: str, credentials: "Credentials"):
+    from googleapiclient.discovery import build
+
+    return build(service_name, version, credentials=credentials)
+
+
+async def _execute(request) -> Any:
+    """Run a blocking googleapiclient request off the event loop"""
+    return await asyncio.to_thread(request.execute)
 
 
 class GoogleService:
@@ -15,13 +37,31 @@ class GoogleService:
         "https://www.googleapis.com/auth/drive.file",
     ]
 
-    def __init__(self):
+    def __init__(self, credential_store: Optional[GoogleCredentialStore] = None):
         self.settings = get_settings()
-        self._credentials: Optional[Credentials] = None
+        self.credential_store = credential_store or google_credential_store
+
+    async def _credentials(self, account_id: str) -> "Credentials":
+        credentials = await self.credential_store.get(account_id)
+        if credentials is None:
+            raise ValueError("Not authenticated with Google")
+        return credentials
+
+    async def resolve_account(self, user_id: Optional[str]) -> Optional[str]:
+        """The user's own linked account; None if they have not linked one
 
-    def get_auth_url(self, redirect_uri: str) -> str:
-        """Get OAuth authorization URL"""
-        flow = Flow.from_client_config(
+        With google_default_account_fallback the shared default account is
+        used instead (single-user setups only: every caller then reads and
+        writes that account's calendar and documents).
+        """
+        if user_id and await self.credential_store.get(user_id) is not None:
+            return user_id
+        return DEFAULT_ACCOUNT if self.settings.google_default_account_fallback else None
+
+    def _flow(self, redirect_uri: str, state: Optional[str] = None):
+        from google_auth_oauthlib.flow import Flow
+
+        return Flow.from_client_config(
             {
                 "web": {
                     "client_id": self.settings.google_client_id,
@@ -32,31 +72,45 @@ class GoogleService:
             },
             scopes=self.SCOPES,
             redirect_uri=redirect_uri,
+            state=state,
         )
-        auth_url, _ = flow.authorization_url(prompt="consent")
-        return auth_url
 
-    def exchange_code(self, code: str, redirect_uri: str) -> Credentials:
-        """Exchange authorization code for credentials"""
-        flow = Flow.from_client_config(
-            {
-                "web": {
-                    "client_id": self.settings.google_client_id,
-                    "client_secret": self.settings.google_client_secret,
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                }
-            },
-            scopes=self.SCOPES,
-            redirect_uri=redirect_uri,
+    def get_auth_url(self, redirect_uri: str, state: Optional[str] = None) -> str:
+        """Get OAuth authorization URL (offline access, so tokens can be refreshed)"""
+        auth_url, _ = self._flow(redirect_uri, state).authorization_url(
+            access_type="offline", prompt="consent"
         )
-        flow.fetch_token(code=code)
-        self._credentials = flow.credentials
-        return self._credentials
+        return auth_url
 
-    def set_credentials(self, credentials: Credentials):
+    async def exchange_code(self, code: str, redirect_uri: str, account_id: str = DEFAULT_ACCOUNT) -> "Credentials":
+        """Exchange authorization code for credentials and link them to the account"""
+        flow = self._flow(redirect_uri)
+        await asyncio.to_thread(flow.fetch_token, code=code)
+        self.credential_store.put(account_id, flow.credentials)
+        return flow.credentials
+
+    def oauth_state(self, user_id: str) -> str:
+        """OAuth `state` naming the user to link, signed with the client secret"""
+        payload = f"{user_id}.{int(time.time())}"
+        return f"{payload}.{self._sign(payload)}"
+
+    def user_from_state(self, state: str) -> Optional[str]:
+        """The user an `oauth_state` was issued for; None if forged or expired"""
+        payload, _, signature = state.rpartition(".")
+        user_id, _, issued = payload.partition(".")
+        if not user_id or not issued.isdigit() or not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        if time.time() - int(issued) > OAUTH_STATE_TTL_SECONDS:
+            return None
+        return user_id
+
+    def _sign(self, payload: str) -> str:
+        key = self.settings.google_client_secret.encode()
+        return hmac.new(key, payload.encode(), hashlib.sha256).hexdigest()
+
+    def set_credentials(self, credentials: "Credentials", account_id: str = DEFAULT_ACCOUNT):
         """Set credentials directly"""
-        self._credentials = credentials
+        self.credential_store.put(account_id, credentials)
 
     # Calendar methods
     async def get_calendar_events(
@@ -64,16 +118,14 @@ class GoogleService:
         time_min: Optional[datetime] = None,
         time_max: Optional[datetime] = None,
         max_results: int = 10,
+        account_id: str = DEFAULT_ACCOUNT,
     ) -> List[Dict[str, Any]]:
         """Get calendar events"""
-        if not self._credentials:
-            raise ValueError("Not authenticated with Google")
-
-        service = build("calendar", "v3", credentials=self._credentials)
+        credentials = await self._credentials(account_id)
+        service = _build("calendar", "v3", credentials)
 
-        events_result = (
-            service.events()
-            .list(
+        events_result = await _execute(
+            service.events().list(
                 calendarId="primary",
                 timeMin=time_min.isoformat() + "Z" if time_min else None,
                 timeMax=time_max.isoformat() + "Z" if time_max else None,
@@ -81,7 +133,6 @@ class GoogleService:
                 singleEvents=True,
                 orderBy="startTime",
             )
-            .execute()
         )
 
         return events_result.get("items", [])
@@ -93,12 +144,11 @@ class GoogleService:
         end_time: datetime,
         description: Optional[str] = None,
         location: Optional[str] = None,
+        account_id: str = DEFAULT_ACCOUNT,
     ) -> Dict[str, Any]:
         """Create a calendar event"""
-        if not self._credentials:
-            raise ValueError("Not authenticated with Google")
-
-        service = build("calendar", "v3", credentials=self._credentials)
+        credentials = await self._credentials(account_id)
+        service = _build("calendar", "v3", credentials)
 
         event = {
             "summary": summary,
@@ -111,16 +161,14 @@ class GoogleService:
         if location:
             event["location"] = location
 
-        result = service.events().insert(calendarId="primary", body=event).execute()
+        result = await _execute(service.events().insert(calendarId="primary", body=event))
         return result
 
-    async def delete_calendar_event(self, event_id: str) -> bool:
+    async def delete_calendar_event(self, event_id: str, account_id: str = DEFAULT_ACCOUNT) -> bool:
         """Delete a calendar event"""
-        if not self._credentials:
-            raise ValueError("Not authenticated with Google")
-
-        service = build("calendar", "v3", credentials=self._credentials)
-        service.events().delete(calendarId="primary", eventId=event_id).execute()
+        credentials = await self._credentials(account_id)
+        service = _build("calendar", "v3", credentials)
+        await _execute(service.events().delete(calendarId="primary", eventId=event_id))
         return True
 
     # Docs methods
@@ -128,14 +176,13 @@ class GoogleService:
         self,
         title: str,
         content: Optional[str] = None,
+        account_id: str = DEFAULT_ACCOUNT,
     ) -> Dict[str, Any]:
         """Create a Google Doc"""
-        if not self._credentials:
-            raise ValueError("Not authenticated with Google")
-
-        docs_service = build("docs", "v1", credentials=self._credentials)
+        credentials = await self._credentials(account_id)
+        docs_service = _build("docs", "v1", credentials)
 
-        document = docs_service.documents().create(body={"title": title}).execute()
+        document = await _execute(docs_service.documents().create(body={"title": title}))
         doc_id = document.get("documentId")
 
         if content:
@@ -147,9 +194,11 @@ class GoogleService:
                     }
                 }
             ]
-            docs_service.documents().batchUpdate(
-                documentId=doc_id, body={"requests": requests}
-            ).execute()
+            await _execute(
+                docs_service.documents().batchUpdate(
+                    documentId=doc_id, body={"requests": requests}
+                )
+            )
 
         return {
             "id": doc_id,
@@ -157,13 +206,11 @@ class GoogleService:
             "url": f"https://docs.google.com/document/d/{doc_id}/edit",
         }
 
-    async def get_document(self, doc_id: str) -> Dict[str, Any]:
+    async def get_document(self, doc_id: str, account_id: str = DEFAULT_ACCOUNT) -> Dict[str, Any]:
         """Get a Google Doc"""
-        if not self._credentials:
-            raise ValueError("Not authenticated with Google")
-
-        docs_service = build("docs", "v1", credentials=self._credentials)
-        document = docs_service.documents().get(documentId=doc_id).execute()
+        credentials = await self._credentials(account_id)
+        docs_service = _build("docs", "v1", credentials)
+        document = await _execute(docs_service.documents().get(documentId=doc_id))
 
         # Extract text content
         content = ""
@@ -180,15 +227,13 @@ class GoogleService:
             "url": f"https://docs.google.com/document/d/{doc_id}/edit",
         }
 
-    async def update_document(self, doc_id: str, content: str) -> bool:
+    async def update_document(self, doc_id: str, content: str, account_id: str = DEFAULT_ACCOUNT) -> bool:
         """Update a Google Doc (append content)"""
-        if not self._credentials:
-            raise ValueError("Not authenticated with Google")
-
-        docs_service = build("docs", "v1", credentials=self._credentials)
+        credentials = await self._credentials(account_id)
+        docs_service = _build("docs", "v1", credentials)
 
         # Get current document length
-        document = docs_service.documents().get(documentId=doc_id).execute()
+        document = await _execute(docs_service.documents().get(documentId=doc_id))
         end_index = document.get("body", {}).get("content", [{}])[-1].get("endIndex", 1)
 
         requests = [
@@ -200,9 +245,11 @@ class GoogleService:
             }
         ]
 
-        docs_service.documents().batchUpdate(
-            documentId=doc_id, body={"requests": requests}
-        ).execute()
+        await _execute(
+            docs_service.documents().batchUpdate(
+                documentId=doc_id, body={"requests": requests}
+            )
+        )
 
         return True
 
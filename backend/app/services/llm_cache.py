@@ -0,0 +1,285 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.services.admission import FEATURE_PRIORITIES, BACKGROUND, admission_controller
+
+OUTCOMES = ("miss", "hit", "hit_persistent", "coalesced")
+
+logger = logging.getLogger(__name__)
+
+
+def _usage_dict(usage) -> Dict[str, int]:
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    return {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": usage.total_tokens or 0,
+    }
+
+
+class PersistentCacheStore:
+    """SQLite-backed cache shared across restarts and workers on one host
+
+    Reads go straight to SQLite (memory-mapped, WAL); writes are buffered and
+    flushed in batches so a cache miss never waits on an fsync. The buffer
+    belongs to the event loop: `put` and `take_pending` run there, and only
+    the batch taken is handed to `write` on a worker thread.
+    """
+
+    def __init__(self, path: str, mmap_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, str, float]] = []
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_bytes)}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict, expires_at: float):
+        self._pending.append((key, json.dumps(value, ensure_ascii=False), expires_at))
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def take_pending(self) -> List[Tuple[str, str, float]]:
+        """Detach the buffered entries (call on the thread that `put`s)"""
+        batch, self._pending = self._pending, []
+        return batch
+
+    def flush(self) -> int:
+        """Write buffered entries from the thread that `put`s them"""
+        return self.write(self.take_pending())
+
+    def write(self, batch: List[Tuple[str, str, float]]) -> int:
+        """Write entries in one transaction and drop expired rows"""
+        if not batch:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)", batch
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            self._conn.execute("COMMIT")
+        return len(batch)
+
+    def close(self, batch: List[Tuple[str, str, float]] = ()):
+        """Write a final batch and close (waits for a write already running)"""
+        self.write(list(batch))
+        with self._lock:
+            self._conn.close()
+
+
+class _Flight:
+    """One upstream call shared by every concurrent identical request"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class LLMCallLayer:
+    """Exact-match cache with single-flight deduplication for LLM calls
+
+    Requests are keyed by feature, model and a hash of the full request
+    (prompt, images, parameters). Identical concurrent requests share one
+    upstream call; completed results are cached for the feature's TTL.
+
+    The shared call runs as its own task, so a caller that is cancelled
+    (e.g. a client disconnect) does not cancel it for the others; it is
+    only cancelled once every caller waiting on it has gone.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.ttls = {
+            "vision": self.settings.llm_cache_ttl_vision,
+            "memory_extraction": self.settings.llm_cache_ttl_memory_extraction,
+        }
+        self.max_entries = self.settings.llm_cache_max_entries
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[str, _Flight] = {}
+        self._store: Optional[PersistentCacheStore] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # {feature: {outcome: {"calls": n, "total_tokens": n, ...}}}
+        self.stats: Dict[str, Dict[str, Dict[str, int]]] = defaultdict(
+            lambda: {o: defaultdict(int) for o in OUTCOMES}
+        )
+
+    @staticmethod
+    def make_key(feature: str, request: dict) -> str:
+        canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        return f"{feature}:{request.get('model')}:{digest}"
+
+    def start(self):
+        """Open the persistent store and start the write-behind flusher"""
+        if self.settings.llm_cache_path and self._store is None:
+            self._store = PersistentCacheStore(self.settings.llm_cache_path)
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Flush pending writes and close the persistent store"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._flush_task
+            self._flush_task = None
+        if self._store is not None:
+            # New results are no longer buffered; the store's lock makes the
+            # close wait for a write a cancelled flush left running
+            store, self._store = self._store, None
+            await asyncio.to_thread(store.close, store.take_pending())
+
+    async def flush(self) -> int:
+        if self._store is None:
+            return 0
+        return await asyncio.to_thread(self._store.write, self._store.take_pending())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.settings.llm_cache_flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("LLM cache flush failed")
+
+    def _record(self, feature: str, outcome: str, usage: Dict[str, int]):
+        bucket = self.stats[feature][outcome]
+        bucket["calls"] += 1
+        for key, value in usage.items():
+            bucket[key] += value
+
+    def _get_local(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put_local(self, key: str, value: dict, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def chat_completion(self, feature: str, client, **request) -> dict:
+        """Cached `client.chat.completions.create(**request)`
+
+        Returns {"content": str, "usage": {...}}; usage is the token cost of
+        the original upstream call, also on cache hits.
+        """
+        key = self.make_key(feature, request)
+        ttl = self.ttls.get(feature, 0)
+
+        if ttl > 0:
+            cached = self._get_local(key)
+            if cached is not None:
+                self._record(feature, "hit", cached["usage"])
+                return cached
+
+        flight = self._inflight.get(key)
+        coalesced = flight is not None
+        if flight is None:
+            flight = self._inflight[key] = _Flight(
+                asyncio.create_task(self._fetch(feature, key, ttl, client, request))
+            )
+            flight.task.add_done_callback(self._flight_done(key, flight))
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Every caller was cancelled; new callers start a fresh call
+                flight.task.cancel()
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+        if coalesced:
+            self._record(feature, "coalesced", result["usage"])
+        return result
+
+    def _flight_done(self, key: str, flight: _Flight):
+        def done(task: asyncio.Task):
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+            # Mark retrieved so an error with no waiters left is not logged
+            if not task.cancelled():
+                task.exception()
+
+        return done
+
+    async def _fetch(self, feature: str, key: str, ttl: float, client, request: dict) -> dict:
+        result = None
+        if ttl > 0 and self._store is not None:
+            result = await asyncio.to_thread(self._store.get, key)
+            if result is not None:
+                self._record(feature, "hit_persistent", result["usage"])
+
+        if result is None:
+            async with admission_controller.admit(
+                "openai", FEATURE_PRIORITIES.get(feature, BACKGROUND)
+            ):
+                response = await client.chat.completions.create(**request)
+            result = {
+                "content": response.choices[0].message.content,
+                "usage": _usage_dict(response.usage),
+            }
+            self._record(feature, "miss", result["usage"])
+            if ttl > 0 and self._store is not None:
+                self._store.put(key, result, time.time() + ttl)
+
+        if ttl > 0:
+            self._put_local(key, result, time.time() + ttl)
+        return result
+
+    def get_stats(self) -> dict:
+        features = {}
+        for feature, outcomes in self.stats.items():
+            served = sum(o["calls"] for o in outcomes.values())
+            saved = sum(outcomes[o]["total_tokens"] for o in OUTCOMES if o != "miss")
+            features[feature] = {
+                "outcomes": {o: dict(v) for o, v in outcomes.items()},
+                "hit_ratio": round(1 - outcomes["miss"]["calls"] / served, 3) if served else 0.0,
+                "tokens_saved": saved,
+            }
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "persistent": self._store is not None,
+            "pending_writes": self._store.pending if self._store else 0,
+            "features": features,
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+
+llm_cache = LLMCallLayer()
@@ -0,0 +1,267 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+from app.config import get_settings
+from app.responses import dumps_bytes, loads_bytes
+from app.services.memory_service import memory_service
+from app.services.shared_state import shared_state
+
+if TYPE_CHECKING:
+    import numpy as np
+
+EMBEDDING_BATCH_SIZE = 256
+
+
+def duplicate_pairs(
+    vectors: "np.ndarray",
+    new_start: int,
+    threshold: float,
+    block_rows: int = 512,
+) -> List[Tuple[int, int, float]]:
+    """(i, j, similarity) for rows i >= new_start, j < i with cosine >= threshold
+
+    `vectors` are unit rows, already-compacted ones first. Rows before
+    `new_start` were compared with each other on an earlier run, so only the
+    lower triangle of the new rows is computed, tile by tile, which keeps
+    memory at block_rows² floats however many memories a user has.
+    """
+    import numpy as np
+
+    pairs = []
+    n = len(vectors)
+    for row_start in range(new_start, n, block_rows):
+        row_stop = min(row_start + block_rows, n)
+        rows = vectors[row_start:row_stop]
+        for col_start in range(0, row_stop, block_rows):
+            col_stop = min(col_start + block_rows, row_stop)
+            sims = rows @ vectors[col_start:col_stop].T
+            # Keep j < i only: column col_start + c against row row_start + r
+            hits = np.tril(sims >= threshold, k=row_start - col_start - 1)
+            for r, c in zip(*np.nonzero(hits)):
+                pairs.append((row_start + int(r), col_start + int(c), float(sims[r, c])))
+    return pairs
+
+
+def cluster(n: int, pairs: Sequence[Tuple[int, int, float]]) -> List[List[int]]:
+    """Connected components (size > 1) of the similarity graph"""
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, _ in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    groups: Dict[int, List[int]] = {}
+    for i in {i for pair in pairs for i in pair[:2]}:
+        groups.setdefault(find(i), []).append(i)
+    return [sorted(g) for g in groups.values() if len(g) > 1]
+
+
+def _normalized(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+class MemoryCompactor:
+    """Removes near-duplicate memories by embedding similarity
+
+    Memories are blocked by category (duplicates never cross categories) and
+    each block is compared with a tiled NumPy matrix product. Runs are
+    incremental: only memories added since the user's previous run are
+    compared, against everything already kept. Each similarity cluster keeps
+    its most detailed memory (longest content, then oldest) and drops the
+    others; nothing is merged into the survivor. Every removal is written to
+    an audit trail with the removed content and whether it was a duplicate
+    (same text, or similarity >= the exact threshold) or a paraphrase.
+
+    Embeddings and the per-user "already compacted" sets are per worker; a
+    worker without them redoes a full pass, which gives the same result.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.threshold = self.settings.memory_compaction_threshold
+        self.exact_threshold = self.settings.memory_compaction_exact_threshold
+        self.block_rows = self.settings.memory_compaction_block_rows
+        self.audit: deque = deque(maxlen=self.settings.memory_compaction_audit_size)
+        self.stats = {"runs": 0, "compared": 0, "dropped": 0, "paraphrases": 0, "embedded": 0, "last_run_ms": 0.0}
+
+        self._embeddings: Dict[str, "np.ndarray"] = {}  # {memory_id: unit vector}
+        self._compacted: Dict[str, Set[str]] = {}  # {user_id: memory ids already compared}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._dirty: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    # Background job
+    def start(self, runner: Callable[[UUID], Awaitable[Any]]):
+        """Compact users with new memories every memory_compaction_interval_seconds"""
+        if self.settings.memory_compaction_interval_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop(runner))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self, runner: Callable[[UUID], Awaitable[Any]]):
+        while True:
+            await asyncio.sleep(self.settings.memory_compaction_interval_seconds)
+            users, self._dirty = self._dirty, set()
+            for key in users:
+                try:
+                    await runner(UUID(key))
+                except Exception as e:
+                    print(f"Memory compaction error ({key}): {e}")
+
+    def on_memory_created(self, event: dict):
+        self._dirty.add(event["user_id"])
+
+    def on_memory_deleted(self, event: dict):
+        self._embeddings.pop(event["memory_id"], None)
+
+    # Compaction
+    async def _embed(self, memories: Sequence[Any]):
+        import numpy as np
+
+        missing = [m for m in memories if str(m.id) not in self._embeddings]
+        for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+            batch = missing[start:start + EMBEDDING_BATCH_SIZE]
+            embeddings = await memory_service.create_embeddings([m.content for m in batch])
+            if len(embeddings) != len(batch):
+                continue
+            for m, embedding in zip(batch, embeddings):
+                vector = np.asarray(embedding, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                if norm > 0:
+                    self._embeddings[str(m.id)] = vector / norm
+            self.stats["embedded"] += len(batch)
+
+    def _plan_block(self, kept: List[Any], new: List[Any], vectors: List["np.ndarray"]) -> Tuple[int, List[dict]]:
+        """Removals for one category block; runs in a worker thread"""
+        import numpy as np
+
+        members = kept + new
+        matrix = np.stack(vectors)
+        pairs = duplicate_pairs(matrix, len(kept), self.threshold, self.block_rows)
+        compared = len(new) * len(kept) + len(new) * (len(new) - 1) // 2
+
+        removals = []
+        for group in cluster(len(members), pairs):
+            survivor = min(group, key=lambda i: (-len(_normalized(members[i].content)), members[i].created_at))
+            for i in group:
+                if i == survivor:
+                    continue
+                similarity = float(matrix[i] @ matrix[survivor])
+                # Single-linkage chains can pull in members unlike the survivor; keep those
+                if similarity < self.threshold:
+                    continue
+                same_text = _normalized(members[i].content) == _normalized(members[survivor].content)
+                removals.append({
+                    "memory_id": str(members[i].id),
+                    "action": "drop",
+                    "match": "duplicate" if same_text or similarity >= self.exact_threshold else "paraphrase",
+                    "similarity": round(similarity, 4),
+                    "category": str(getattr(members[i].category, "value", members[i].category)),
+                    "content": members[i].content,
+                    "survivor_id": str(members[survivor].id),
+                    "survivor_content": members[survivor].content,
+                })
+        return compared, removals
+
+    async def compact(
+        self,
+        user_id: UUID,
+        memories: Sequence[Any],
+        remove: Callable[[UUID, UUID], Awaitable[bool]],
+        dry_run: bool = False,
+    ) -> dict:
+        """Compact one user's memories; `remove(user_id, memory_id)` deletes one
+
+        `memories` need id, content, category and created_at. With `dry_run`
+        the planned removals are returned but nothing is deleted or recorded.
+        """
+        key = str(user_id)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            started = time.perf_counter()
+            compacted = self._compacted.get(key, set())
+            if all(str(m.id) in compacted for m in memories):
+                return {"user_id": key, "new": 0, "compared": 0, "removed": [], "dry_run": dry_run}
+
+            await self._embed(memories)
+            blocks: Dict[str, Tuple[list, list]] = {}
+            for m in memories:
+                if str(m.id) in self._embeddings:
+                    kept, new = blocks.setdefault(str(m.category), ([], []))
+                    (kept if str(m.id) in compacted else new).append(m)
+
+            compared, removals = 0, []
+            for kept, new in blocks.values():
+                if not new:
+                    continue
+                vectors = [self._embeddings[str(m.id)] for m in kept + new]
+                block_compared, block_removals = await asyncio.to_thread(self._plan_block, kept, new, vectors)
+                compared += block_compared
+                removals.extend(block_removals)
+
+            removed = []
+            if not dry_run:
+                run_at = datetime.now().isoformat()
+                for removal in removals:
+                    if await remove(user_id, UUID(removal["memory_id"])):
+                        removed.append(removal)
+                        self.stats["dropped"] += 1
+                        if removal["match"] == "paraphrase":
+                            self.stats["paraphrases"] += 1
+                        await self._record({"user_id": key, "run_at": run_at, **removal})
+                removed_ids = {r["memory_id"] for r in removed}
+                self._compacted[key] = {
+                    m_id for kept, new in blocks.values() for m_id in (str(m.id) for m in kept + new)
+                } - removed_ids
+                self.stats["runs"] += 1
+                self.stats["compared"] += compared
+
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.stats["last_run_ms"] = elapsed_ms
+            return {
+                "user_id": key,
+                "new": sum(len(new) for _, new in blocks.values()),
+                "compared": compared,
+                "removed": removals if dry_run else removed,
+                "dry_run": dry_run,
+                "elapsed_ms": elapsed_ms,
+            }
+
+    # Audit trail
+    async def _record(self, record: dict):
+        self.audit.append(record)
+        if shared_state.enabled:
+            await shared_state.list_append("memory_compaction", record["user_id"], dumps_bytes(record))
+
+    async def get_audit(self, user_id: UUID, limit: int = 50) -> List[dict]:
+        """A user's compaction removals, newest first"""
+        if shared_state.enabled:
+            _, items = await shared_state.list_items("memory_compaction", str(user_id))
+            records = [loads_bytes(item) for item in items]
+        else:
+            records = [r for r in self.audit if r["user_id"] == str(user_id)]
+        return records[::-1][:limit]
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "pending_users": len(self._dirty),
+            "cached_embeddings": len(self._embeddings),
+            "audit_records": len(self.audit),
+        }
+
+
+memory_compactor = MemoryCompactor()
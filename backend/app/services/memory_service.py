@@ -1,27 +1,52 @@
-from typing import List, Optional
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING, List, Optional
 from app.config import get_settings
+from app.services.admission import FEATURE_PRIORITIES, admission_controller
+from app.services.llm_cache import llm_cache
+from app.services.upstream_clients import UpstreamClients, upstream_clients
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 
 class MemoryService:
     """Service for managing long-term memory with vector embeddings"""
 
-    def __init__(self):
+    def __init__(self, clients: Optional[UpstreamClients] = None):
         self.settings = get_settings()
-        self.client = AsyncOpenAI(api_key=self.settings.openai_api_key)
+        self.clients = clients or upstream_clients
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        return self.clients.openai
 
     async def create_embedding(self, text: str) -> List[float]:
         """Create an embedding vector for text using OpenAI"""
         try:
-            response = await self.client.embeddings.create(
-                model="text-embedding-3-small",
-                input=text,
-            )
+            async with admission_controller.admit("openai", FEATURE_PRIORITIES["embedding"]):
+                response = await self.client.embeddings.create(
+                    model="text-embedding-3-small",
+                    input=text,
+                )
             return response.data[0].embedding
         except Exception as e:
             print(f"Embedding creation error: {e}")
             return []
 
+    async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts in one request (same order; [] on failure)"""
+        if not texts:
+            return []
+        try:
+            async with admission_controller.admit("openai", FEATURE_PRIORITIES["embedding"]):
+                response = await self.client.embeddings.create(
+                    model="text-embedding-3-small",
+                    input=texts,
+                )
+            return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+        except Exception as e:
+            print(f"Embedding creation error: {e}")
+            return []
+
     async def extract_memory_from_conversation(
         self,
         conversation: str,
@@ -51,7 +76,9 @@ JSON形式で出力してください:
 """
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await llm_cache.chat_completion(
+                "memory_extraction",
+                self.client,
                 model="gpt-4o",
                 messages=[{"role": "user", "content": prompt}],
                 response_format={"type": "json_object"},
@@ -59,7 +86,7 @@ JSON形式で出力してください:
 
             import json
 
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(response["content"])
             return result.get("memories", result) if isinstance(result, dict) else result
 
         except Exception as e:
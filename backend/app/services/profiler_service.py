@@ -0,0 +1,262 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from itertools import count
+from typing import Optional, List, Dict, Any, Tuple
+from app.config import get_settings
+
+# Trim these prefixes from frame filenames so collapsed stacks stay readable
+_PATH_PREFIXES = sorted(
+    {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))}
+    | {p for p in sys.path if p and os.path.isdir(p)},
+    key=len,
+    reverse=True,
+)
+
+# Bound per-request sample storage so one stuck request cannot grow without limit
+MAX_STACKS_PER_REQUEST = 200
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):].lstrip(os.sep)
+    return filename
+
+
+def frame_chain(frame) -> List[Tuple[Any, int]]:
+    """(code, line) pairs of a frame chain, root first; cheap enough to take under a lock"""
+    chain = []
+    while frame is not None:
+        chain.append((frame.f_code, frame.f_lineno))
+        frame = frame.f_back
+    chain.reverse()
+    return chain
+
+
+def format_chain(chain: List[Tuple[Any, int]]) -> str:
+    """Render a frame chain as a flamegraph 'collapsed' stack (root first)"""
+    return ";".join(
+        f"{getattr(code, 'co_qualname', code.co_name)} ({_short_path(code.co_filename)}:{line})"
+        for code, line in chain
+    )
+
+
+def collapse_stack(frame) -> str:
+    """Render a frame chain as a flamegraph 'collapsed' stack (root first)"""
+    return format_chain(frame_chain(frame))
+
+
+def format_collapsed(samples: Counter) -> str:
+    """Format stack counts as 'frame;frame;frame count' lines for flamegraph.pl / speedscope"""
+    return "\n".join(f"{stack} {n}" for stack, n in samples.most_common()) + "\n"
+
+
+def _is_idle_stack(stack: str) -> bool:
+    # The asyncio loop parks in selectors.*Selector.select() while it waits for I/O
+    return "selectors.py:" in stack.rsplit(";", 1)[-1]
+
+
+class SamplingProfiler:
+    """Time-boxed sampling profiler for the live process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def profile(
+        self,
+        seconds: float,
+        interval: float,
+        thread_id: Optional[int] = None,
+    ) -> Counter:
+        """Sample stacks for `seconds` (blocking; run it off the event loop)
+
+        Samples every thread except the sampler itself unless `thread_id` is given.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+
+        try:
+            own_id = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            samples: Counter = Counter()
+            deadline = time.perf_counter() + seconds
+
+            while time.perf_counter() < deadline:
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_id or (thread_id is not None and ident != thread_id):
+                        continue
+                    thread_name = names.get(ident) or f"thread-{ident}"
+                    samples[f"{thread_name};{collapse_stack(frame)}"] += 1
+                time.sleep(interval)
+
+            return samples
+        finally:
+            self._lock.release()
+
+
+class _InFlightRequest:
+    __slots__ = ("method", "path", "query", "started", "response_started", "status", "samples")
+
+    def __init__(self, method: str, path: str, query: str):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.started = time.perf_counter()
+        self.response_started: Optional[float] = None
+        self.status: Optional[int] = None
+        self.samples: Optional[Counter] = None
+
+
+class SlowRequestRecorder:
+    """Keeps stack samples and timings for requests slower than a threshold
+
+    A single sampler thread sleeps until the oldest in-flight request crosses
+    the threshold, then samples the event loop thread until it completes, so
+    fast traffic only pays for a dict insert/remove.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.threshold = self.settings.slow_request_threshold_ms / 1000
+        self.interval = self.settings.profiler_sample_interval_ms / 1000
+        self.records: deque = deque(maxlen=self.settings.slow_request_buffer_size)
+
+        self._cond = threading.Condition()
+        self._in_flight: Dict[int, _InFlightRequest] = {}
+        self._ids = count()
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def start(self):
+        """Start the sampler thread (called from the app lifespan)"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stopping = False
+        self._loop_thread_id = threading.get_ident()
+        self._thread = threading.Thread(
+            target=self._run, name="slow-request-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop the sampler thread"""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout=1)
+        self._thread = None
+
+    def begin(self, method: str, path: str, query: str = "") -> int:
+        """Register an in-flight request and return its token"""
+        token = next(self._ids)
+        entry = _InFlightRequest(method, path, query)
+        with self._cond:
+            self._in_flight[token] = entry
+            if len(self._in_flight) == 1:
+                self._cond.notify()
+        return token
+
+    def response_started(self, token: int, status: int):
+        entry = self._in_flight.get(token)
+        if entry is not None:
+            entry.status = status
+            entry.response_started = time.perf_counter()
+
+    def end(self, token: int):
+        """Finish a request and keep it if it crossed the threshold"""
+        with self._cond:
+            entry = self._in_flight.pop(token, None)
+        if entry is None:
+            return
+
+        finished = time.perf_counter()
+        total = finished - entry.started
+        if total < self.threshold:
+            return
+
+        samples = entry.samples or Counter()
+        sampled = sum(samples.values())
+        idle = sum(n for stack, n in samples.items() if _is_idle_stack(stack))
+        response_started = entry.response_started or finished
+
+        self.records.append(
+            {
+                "method": entry.method,
+                "path": entry.path,
+                "query": entry.query,
+                "status": entry.status,
+                "recorded_at": datetime.now().isoformat(),
+                "timings_ms": {
+                    "total": round(total * 1000, 2),
+                    "until_response_start": round((response_started - entry.started) * 1000, 2),
+                    "response_body": round((finished - response_started) * 1000, 2),
+                },
+                "samples": sampled,
+                # Share of samples where the loop was parked in select(): high means
+                # the request was awaiting I/O, low means the loop itself was busy
+                "loop_idle_ratio": round(idle / sampled, 3) if sampled else None,
+                "stacks": format_collapsed(samples) if samples else "",
+            }
+        )
+
+    def get_records(self) -> List[Dict[str, Any]]:
+        return list(reversed(self.records))
+
+    def clear(self):
+        self.records.clear()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                if not self._in_flight:
+                    self._cond.wait()
+                    continue
+
+                now = time.perf_counter()
+                oldest = min(e.started for e in self._in_flight.values())
+                remaining = oldest + self.threshold - now
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+
+                # Only the raw frame chain is taken under the lock; request
+                # begin/end never waits on string formatting
+                frame = sys._current_frames().get(self._loop_thread_id)
+                chain = frame_chain(frame) if frame is not None else None
+                del frame
+
+            if chain is not None:
+                stack = format_chain(chain)
+                with self._cond:
+                    for entry in self._in_flight.values():
+                        if now - entry.started < self.threshold:
+                            continue
+                        if entry.samples is None:
+                            entry.samples = Counter()
+                        if stack in entry.samples or len(entry.samples) < MAX_STACKS_PER_REQUEST:
+                            entry.samples[stack] += 1
+
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(self.interval)
+
+
+sampling_profiler = SamplingProfiler()
+slow_request_recorder = SlowRequestRecorder()
@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional
+from uuid import UUID, uuid4
+from app.config import get_settings
+
+# Extensions for recorder formats the mimetypes table lacks or names oddly
+AUDIO_EXTENSIONS = {
+    "audio/webm": ".webm",
+    "audio/ogg": ".ogg",
+    "audio/wav": ".wav",
+    "audio/mp4": ".m4a",
+}
+# Received body buffers are coalesced up to this size per disk write
+WRITE_BUFFER_BYTES = 256 * 1024
+
+
+def file_extension(content_type: str) -> str:
+    """Download file extension for a recording's content type (".bin" if unknown)"""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return AUDIO_EXTENSIONS.get(media_type) or mimetypes.guess_extension(media_type) or ".bin"
+
+
+class RecordingError(Exception):
+    """Invalid recording operation (maps to a 4xx response)"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class RecordingSession:
+    """Upload state for one recording
+
+    `size` only advances once a chunk is fully written, so a connection that
+    drops mid-chunk leaves the session at the last complete chunk and the
+    client resumes from `next_index` / `size`.
+    """
+
+    def __init__(self, recording_id: str, user_id: str, content_type: str, path: str):
+        self.id = recording_id
+        self.user_id = user_id
+        self.content_type = content_type
+        self.path = path
+        self.size = 0
+        self.next_index = 0
+        self.completed = False
+        self.sha256: Optional[str] = None
+        self.created_at = datetime.now()
+        self.uploading = False
+        self._hash = hashlib.sha256()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "content_type": self.content_type,
+            "size": self.size,
+            "next_index": self.next_index,
+            "completed": self.completed,
+            "sha256": self.sha256,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    @property
+    def filename(self) -> str:
+        return f"recording-{self.id}{file_extension(self.content_type)}"
+
+
+class RecordingService:
+    """Streaming, resumable storage for chunked audio recordings
+
+    All file system calls run on worker threads so a slow disk never stalls
+    the event loop.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.storage_dir = self.settings.recording_storage_dir
+        self._sessions: Dict[str, RecordingSession] = {}
+
+    def _paths(self, recording_id: str):
+        base = os.path.join(self.storage_dir, recording_id)
+        return base + ".data", base + ".json"
+
+    async def _save_metadata(self, session: RecordingSession):
+        _, meta_path = self._paths(session.id)
+        await asyncio.to_thread(self._write_metadata, meta_path, session.to_dict())
+
+    @staticmethod
+    def _write_metadata(meta_path: str, meta: dict):
+        # Unique per write: two saves of one recording may overlap on the pool
+        tmp_path = f"{meta_path}.{uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    @staticmethod
+    def _read_metadata(meta_path: str) -> Optional[dict]:
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    async def _load(self, recording_id: str) -> RecordingSession:
+        """Get a session, restoring it from disk after a worker restart"""
+        session = self._sessions.get(recording_id)
+        if session is not None:
+            return session
+
+        if not recording_id.isalnum():
+            raise RecordingError("Recording not found", status_code=404)
+        data_path, meta_path = self._paths(recording_id)
+        meta = await asyncio.to_thread(self._read_metadata, meta_path)
+        if meta is None:
+            raise RecordingError("Recording not found", status_code=404)
+
+        session = RecordingSession(recording_id, meta["user_id"], meta["content_type"], data_path)
+        session.size = meta["size"]
+        session.next_index = meta["next_index"]
+        session.completed = meta["completed"]
+        session.sha256 = meta["sha256"]
+        session.created_at = datetime.fromisoformat(meta["created_at"])
+        # hashlib state cannot be persisted; rebuild it from the committed bytes
+        await asyncio.to_thread(self._rehash, session)
+        # A concurrent request may have restored it while this one was hashing
+        return self._sessions.setdefault(recording_id, session)
+
+    @staticmethod
+    def _rehash(session: RecordingSession):
+        with open(session.path, "rb") as f:
+            remaining = session.size
+            while remaining:
+                block = f.read(min(1 << 20, remaining))
+                if not block:
+                    break
+                session._hash.update(block)
+                remaining -= len(block)
+
+    async def get(self, user_id: UUID, recording_id: str) -> RecordingSession:
+        session = await self._load(recording_id)
+        if session.user_id != str(user_id):
+            raise RecordingError("Recording not found", status_code=404)
+        return session
+
+    async def create(self, user_id: UUID, content_type: str = "audio/webm") -> RecordingSession:
+        recording_id = uuid4().hex
+        data_path, _ = self._paths(recording_id)
+        await asyncio.to_thread(self._create_data_file, data_path)
+
+        session = RecordingSession(recording_id, str(user_id), content_type, data_path)
+        self._sessions[recording_id] = session
+        await self._save_metadata(session)
+        return session
+
+    @staticmethod
+    def _create_data_file(data_path: str):
+        os.makedirs(os.path.dirname(data_path) or ".", exist_ok=True)
+        open(data_path, "wb").close()
+
+    async def append_chunk(
+        self,
+        user_id: UUID,
+        recording_id: str,
+        index: int,
+        offset: int,
+        body: AsyncIterator[bytes],
+    ) -> RecordingSession:
+        """Write chunk `index` at byte `offset`, streaming the body straight to disk"""
+        session = await self.get(user_id, recording_id)
+        if session.completed:
+            raise RecordingError("Recording is already completed", status_code=409)
+
+        if index < session.next_index:
+            # Retransmission of a chunk we already committed (lost response)
+            async for _ in body:
+                pass
+            return session
+        if index != session.next_index or offset != session.size:
+            raise RecordingError(
+                f"Expected chunk {session.next_index} at offset {session.size}",
+                status_code=409,
+            )
+
+        if session.uploading:
+            raise RecordingError("Another chunk upload is in progress", status_code=409)
+
+        max_chunk = self.settings.recording_max_chunk_bytes
+        max_total = self.settings.recording_max_bytes
+        written = 0
+        chunk_hash = session._hash.copy()
+
+        session.uploading = True
+        fd = None
+        try:
+            fd = await asyncio.to_thread(os.open, session.path, os.O_WRONLY)
+            # Disk writes and hashing run on a worker thread, a bounded
+            # buffer at a time: nothing is accumulated in memory regardless
+            # of recording length, and the event loop keeps serving other
+            # requests while a large chunk lands
+            buffer = bytearray()
+            async for piece in body:
+                if not piece:
+                    continue
+                written += len(piece)
+                if written > max_chunk or session.size + written > max_total:
+                    raise RecordingError("Chunk too large", status_code=413)
+                buffer += piece
+                if len(buffer) >= WRITE_BUFFER_BYTES:
+                    await self._flush(fd, buffer, session.size + written - len(buffer), chunk_hash)
+            if buffer:
+                await self._flush(fd, buffer, session.size + written - len(buffer), chunk_hash)
+        finally:
+            if fd is not None:
+                await asyncio.to_thread(os.close, fd)
+            session.uploading = False
+
+        session._hash = chunk_hash
+        session.size += written
+        session.next_index += 1
+        await self._save_metadata(session)
+        return session
+
+    async def _flush(self, fd: int, buffer: bytearray, position: int, chunk_hash):
+        await asyncio.to_thread(self._write_at, fd, bytes(buffer), position, chunk_hash)
+        buffer.clear()
+
+    @staticmethod
+    def _write_at(fd: int, data: bytes, position: int, chunk_hash):
+        view = memoryview(data)
+        while view:
+            n = os.pwrite(fd, view, position)
+            view = view[n:]
+            position += n
+        chunk_hash.update(data)
+
+    async def complete(self, user_id: UUID, recording_id: str, sha256: str) -> RecordingSession:
+        """Finalize a recording after verifying the client's checksum"""
+        session = await self.get(user_id, recording_id)
+        if session.completed:
+            return session
+
+        digest = session._hash.hexdigest()
+        if digest != sha256.lower():
+            raise RecordingError(
+                f"Checksum mismatch: received {session.size} bytes with sha256 {digest}",
+                status_code=409,
+            )
+
+        # Drop any tail left behind by an interrupted chunk, then persist
+        await asyncio.to_thread(self._truncate_and_sync, session.path, session.size)
+
+        session.completed = True
+        session.sha256 = digest
+        await self._save_metadata(session)
+        return session
+
+    @staticmethod
+    def _truncate_and_sync(path: str, size: int):
+        with open(path, "r+b") as f:
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def delete(self, user_id: UUID, recording_id: str):
+        session = await self.get(user_id, recording_id)
+        await asyncio.to_thread(self._remove_files, self._paths(session.id))
+        self._sessions.pop(session.id, None)
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+recording_service = RecordingService()
@@ -0,0 +1,169 @@
+import asyncio
+import os
+import uuid
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+from app.config import get_settings
+from app.responses import dumps_bytes, loads_bytes
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+
+class SharedState:
+    """State shared by every worker process, backed by Redis
+
+    Disabled (the default) when REDIS_URL is empty: routers then keep using
+    their module-level dicts, which is correct for a single worker. When
+    enabled, routers keep those dicts as a per-worker replica and use the
+    version counters here to notice writes made by other workers.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.enabled = bool(self.settings.redis_url)
+        self.prefix = self.settings.redis_key_prefix
+        # Identifies this worker's own events on the shared channel
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._redis: Optional["Redis"] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    @property
+    def redis(self) -> "Redis":
+        if self._redis is None:
+            raise RuntimeError("Shared state is not started")
+        return self._redis
+
+    @property
+    def connected(self) -> bool:
+        return not self.enabled or self._redis is not None
+
+    async def start(self):
+        if not self.enabled or self._redis is not None:
+            return
+        from redis.asyncio import Redis
+
+        self._redis = Redis.from_url(self.settings.redis_url)
+        await self._redis.ping()
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    # Documents
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return await self.redis.get(self._key(namespace, key))
+
+    async def set(self, namespace: str, key: str, value: bytes) -> int:
+        """Store a document and return its new version"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(namespace, key), value)
+            pipe.incr(self._key(f"{namespace}:version", key))
+            _, version = await pipe.execute()
+        return version
+
+    async def update(
+        self, namespace: str, key: str, apply: Callable[[Optional[bytes]], bytes]
+    ) -> Tuple[bytes, int]:
+        """Read-modify-write a document atomically; returns (new value, new version)
+
+        `apply` maps the current value (None if missing) to the new one. The
+        document is WATCHed, so a write by another worker between the read
+        and the write aborts the transaction and `apply` runs again on the
+        newer value.
+        """
+        from redis.exceptions import WatchError
+
+        doc_key = self._key(namespace, key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(doc_key)
+                    value = apply(await pipe.get(doc_key))
+                    pipe.multi()
+                    pipe.set(doc_key, value)
+                    pipe.incr(self._key(f"{namespace}:version", key))
+                    _, version = await pipe.execute()
+                    return value, version
+                except WatchError:
+                    continue
+
+    async def delete(self, namespace: str, key: str) -> Tuple[bool, int]:
+        """Delete a document; returns (existed, new version)"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(namespace, key))
+            pipe.incr(self._key(f"{namespace}:version", key))
+            deleted, version = await pipe.execute()
+        return bool(deleted), version
+
+    # Append-only lists with a version counter
+    async def get_version(self, namespace: str, key: str) -> int:
+        value = await self.redis.get(self._key(f"{namespace}:version", key))
+        return int(value or 0)
+
+    async def list_items(self, namespace: str, key: str) -> Tuple[int, List[bytes]]:
+        """All items and the version they correspond to (read atomically)"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.get(self._key(f"{namespace}:version", key))
+            pipe.lrange(self._key(namespace, key), 0, -1)
+            version, items = await pipe.execute()
+        return int(version or 0), items
+
+    async def list_append(self, namespace: str, key: str, item: bytes) -> int:
+        """Append an item and return the new version"""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._key(namespace, key), item)
+            pipe.incr(self._key(f"{namespace}:version", key))
+            _, version = await pipe.execute()
+        return version
+
+    async def list_remove(self, namespace: str, key: str, item: bytes) -> Optional[int]:
+        """Remove an item; returns the new version, or None if it was not there"""
+        list_key = self._key(namespace, key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(list_key, 1, item)
+            pipe.incr(self._key(f"{namespace}:version", key))
+            removed, version = await pipe.execute()
+        return version if removed else None
+
+    # Cross-worker events
+    def forward_event(self, event_type: str, payload: dict):
+        """Send a locally published event to the other workers (fire-and-forget)"""
+        message = dumps_bytes(
+            {"origin": self.worker_id, "type": event_type, "payload": payload}
+        )
+        task = asyncio.ensure_future(self.redis.publish(self._key("events", "all"), message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def listen_events(self, deliver):
+        """Deliver events published by other workers to `deliver(type, payload, remote=True)`"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver):
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self._key("events", "all"))
+        try:
+            async for message in pubsub.listen():
+                try:
+                    event = loads_bytes(message["data"])
+                    if event["origin"] != self.worker_id:
+                        deliver(event["type"], event["payload"], remote=True)
+                except Exception as e:
+                    print(f"Shared event error: {e}")
+        finally:
+            await pubsub.aclose()
+
+
+shared_state = SharedState()
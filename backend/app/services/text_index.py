@@ -0,0 +1,309 @@
+import asyncio
+import heapq
+import math
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+from app.config import get_settings
+
+MEMORY = "memory"
+CONVERSATION = "conversation"
+
+# BM25 parameters (phrases are the terms; lengths are in characters)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant for hybrid keyword + vector ranking
+RRF_K = 60
+
+# (ref, text, stored payload) as returned by an index loader
+Document = Tuple[str, str, Optional[Any]]
+
+
+def normalize(text: str) -> str:
+    """NFKC + casefold: full/half-width and case variants compare equal"""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def bigrams(normalized: str) -> List[str]:
+    """Character bigrams within whitespace-separated runs
+
+    Japanese has no word boundaries, so every adjacent character pair is a
+    term; any substring of two or more characters contains at least one.
+    """
+    grams = []
+    for run in normalized.split():
+        grams.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return grams
+
+
+class BigramIndex:
+    """Inverted index from character bigrams to sorted arrays of doc numbers
+
+    Doc numbers are assigned in insertion order, so appending keeps every
+    posting list sorted and an insert costs one append per distinct bigram.
+    Postings are `array('I')` (4 bytes per entry). Deletes leave a tombstone
+    and the index is rebuilt once tombstones pass a quarter of the docs.
+    Bigram hits are candidates only: each one is verified against the
+    normalized text, so results match exact substring semantics.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, array] = {}
+        self.texts: List[Optional[str]] = []  # normalized text per doc, None once deleted
+        self.refs: List[str] = []
+        self.payloads: List[Optional[Any]] = []
+        self.doc_numbers: Dict[str, int] = {}  # {ref: doc}
+        self.live_length = 0
+        self.deleted = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_numbers)
+
+    def add(self, ref: str, text: str, payload: Optional[Any] = None) -> bool:
+        if ref in self.doc_numbers:
+            return False
+        doc = len(self.texts)
+        normalized = normalize(text)
+        self.texts.append(normalized)
+        self.refs.append(ref)
+        self.payloads.append(payload)
+        self.doc_numbers[ref] = doc
+        self.live_length += len(normalized)
+        for gram in set(bigrams(normalized)):
+            posting = self.postings.get(gram)
+            if posting is None:
+                posting = self.postings[gram] = array("I")
+            posting.append(doc)
+        return True
+
+    def remove(self, ref: str) -> bool:
+        doc = self.doc_numbers.pop(ref, None)
+        if doc is None:
+            return False
+        self.live_length -= len(self.texts[doc])
+        self.texts[doc] = None
+        self.payloads[doc] = None
+        self.deleted += 1
+        if self.deleted > max(64, len(self.texts) // 4):
+            self._rebuild()
+        return True
+
+    def _rebuild(self):
+        live = [
+            (self.refs[doc], self.texts[doc], self.payloads[doc])
+            for doc in range(len(self.texts))
+            if self.texts[doc] is not None
+        ]
+        self.__init__()
+        for ref, normalized, payload in live:
+            # Already normalized; NFKC and casefold are idempotent
+            self.add(ref, normalized, payload)
+
+    def _candidates(self, term: str) -> Optional[Sequence[int]]:
+        """Docs containing every bigram of `term` (None: term too short to use the index)"""
+        import numpy as np
+
+        grams = set(bigrams(term))
+        if not grams:
+            return None
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        docs: Sequence[int] = postings[0]
+        for posting in postings[1:]:
+            if not len(docs):
+                break
+            if len(docs) * 16 < len(posting):
+                # Much shorter than the next list: binary-search each doc in it
+                docs = [doc for doc in docs if _contains(posting, doc)]
+            else:
+                docs = np.intersect1d(
+                    np.asarray(docs, dtype=np.uint32),
+                    np.frombuffer(posting, dtype=np.uint32),
+                    assume_unique=True,
+                )
+        return docs.tolist() if isinstance(docs, (array, np.ndarray)) else docs
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        where: Optional[Callable[[Optional[Any]], bool]] = None,
+    ) -> List[Tuple[str, float, Optional[Any]]]:
+        """(ref, BM25 score, payload) of docs containing every query term, best first
+
+        Terms are the whitespace-separated parts of the query, matched as
+        substrings after normalization. `where` keeps only docs whose payload
+        passes it; term statistics still cover the whole index.
+        """
+        terms = list(dict.fromkeys(normalize(query).split()))
+        n = len(self.doc_numbers)
+        if not terms or not n:
+            return []
+        average_length = max(self.live_length / n, 1.0)
+
+        scores: Optional[Dict[int, float]] = None
+        # Most selective term first so an empty intersection stops early
+        term_candidates = [(term, self._candidates(term)) for term in terms]
+        term_candidates.sort(key=lambda tc: len(tc[1]) if tc[1] is not None else n)
+        for term, candidates in term_candidates:
+            if candidates is None:
+                candidates = range(len(self.texts))
+            # Document frequency counts every doc containing the term, not
+            # only the survivors of earlier terms, so idf is corpus-wide
+            df = 0
+            matches = {}
+            for doc in candidates:
+                text = self.texts[doc]
+                if text is None or term not in text:
+                    continue
+                df += 1
+                if scores is None or doc in scores:
+                    matches[doc] = (text.count(term), len(text))
+            if not matches:
+                return []
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            term_scores = {
+                doc: idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+                for doc, (tf, length) in matches.items()
+            }
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {doc: scores[doc] + s for doc, s in term_scores.items()}
+
+        if where is not None:
+            scores = {doc: score for doc, score in scores.items() if where(self.payloads[doc])}
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [(self.refs[doc], round(score, 4), self.payloads[doc]) for doc, score in ranked]
+
+    def memory_bytes(self) -> int:
+        return sum(p.buffer_info()[1] * p.itemsize for p in self.postings.values())
+
+
+def _contains(posting: array, doc: int) -> bool:
+    i = bisect_left(posting, doc)
+    return i < len(posting) and posting[i] == doc
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Merge ranked ref lists (keyword, vector, ...) by summed 1 / (k + rank)"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, ref in enumerate(ranking, start=1):
+            scores[ref] = scores.get(ref, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class TextIndex:
+    """Per-user bigram indexes over memories and conversation logs
+
+    An index is built from its loader the first time a user is searched on
+    this worker, then kept current by memory / conversation events (which
+    every worker receives). Least recently searched indexes are dropped past
+    text_index_max_indexes and rebuilt on demand.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._indexes: "OrderedDict[Tuple[str, str], BigramIndex]" = OrderedDict()
+        self._loading: Dict[Tuple[str, str], asyncio.Future] = {}
+        # Refs removed while their index was loading; the loader's snapshot may predate the removal
+        self._removed_while_loading: Dict[Tuple[str, str], Set[str]] = {}
+
+    async def get(
+        self,
+        user_id: UUID,
+        kind: str,
+        loader: Callable[[UUID], Awaitable[Iterable[Document]]],
+    ) -> BigramIndex:
+        """A user's index of `kind`, loading it on first use"""
+        key = (str(user_id), kind)
+        loading = self._loading.get(key)
+        if loading is not None:
+            await asyncio.shield(loading)
+            return await self.get(user_id, kind, loader)
+        index = self._indexes.get(key)
+        if index is not None:
+            self._indexes.move_to_end(key)
+            return index
+
+        # Register before loading so inserts published meanwhile are kept
+        index = self._indexes[key] = BigramIndex()
+        loading = self._loading[key] = asyncio.get_running_loop().create_future()
+        removed = self._removed_while_loading[key] = set()
+        try:
+            for ref, text, payload in await loader(user_id):
+                index.add(ref, text, payload)
+            for ref in removed:
+                index.remove(ref)
+        except BaseException:
+            self._indexes.pop(key, None)
+            raise
+        finally:
+            del self._loading[key]
+            del self._removed_while_loading[key]
+            loading.set_result(None)
+        self._evict()
+        return index
+
+    def _evict(self):
+        while len(self._indexes) > self.settings.text_index_max_indexes:
+            key = next(iter(self._indexes))
+            if key in self._loading:
+                break
+            del self._indexes[key]
+
+    def clear(self):
+        self._indexes.clear()
+
+    def add(self, user_id: str, kind: str, ref: str, text: str, payload: Optional[Any] = None):
+        index = self._indexes.get((user_id, kind))
+        if index is not None:
+            index.add(ref, text, payload)
+
+    def remove(self, user_id: str, kind: str, ref: str):
+        key = (user_id, kind)
+        index = self._indexes.get(key)
+        if index is not None:
+            index.remove(ref)
+        removed = self._removed_while_loading.get(key)
+        if removed is not None:
+            removed.add(ref)
+
+    # Event handlers
+    def on_memory_created(self, event: dict):
+        memory = {
+            "id": event["memory_id"],
+            "user_id": event["user_id"],
+            "content": event["content"],
+            "category": event["category"],
+            "created_at": event["created_at"],
+        }
+        self.add(event["user_id"], MEMORY, event["memory_id"], event["content"], memory)
+
+    def on_memory_deleted(self, event: dict):
+        self.remove(event["user_id"], MEMORY, event["memory_id"])
+
+    def on_conversation_logged(self, event: dict):
+        log = event["log"]
+        self.add(event["user_id"], CONVERSATION, log["id"], log["content"], log)
+
+    def get_stats(self) -> dict:
+        return {
+            "indexes": len(self._indexes),
+            "documents": sum(len(i) for i in self._indexes.values()),
+            "bigrams": sum(len(i.postings) for i in self._indexes.values()),
+            "posting_bytes": sum(i.memory_bytes() for i in self._indexes.values()),
+        }
+
+
+text_index = TextIndex()
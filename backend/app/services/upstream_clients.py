@@ -0,0 +1,161 @@
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Optional
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+VAPI_BASE_URL = "https://api.vapi.ai"
+
+
+class UpstreamClients:
+    """Pooled HTTP clients shared by every service that talks to an upstream
+
+    Built in `main.lifespan` (`start`) and closed on shutdown (`close`). If a
+    client is used before startup (scripts, a TestClient without lifespan),
+    it is built on first access; httpx and openai are only imported then.
+    `override` installs caller-owned clients,
+    e.g. ones pointed at local fakes; those survive restarts of the registry
+    and are never closed by it.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self._openai: Optional["AsyncOpenAI"] = None
+        self._vapi: Optional["httpx.AsyncClient"] = None
+        self._http: Optional["httpx.AsyncClient"] = None
+        self._external: set = set()
+        # Clients may be built from the warm-up thread and the loop at once
+        self._lock = threading.Lock()
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    def _http_client(self, **kwargs) -> "httpx.AsyncClient":
+        import httpx
+
+        settings = self.settings
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.upstream_max_connections,
+                max_keepalive_connections=settings.upstream_max_keepalive_connections,
+                keepalive_expiry=settings.upstream_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(
+                settings.upstream_read_timeout_seconds,
+                connect=settings.upstream_connect_timeout_seconds,
+            ),
+            **kwargs,
+        )
+
+    def _build_openai(self) -> "AsyncOpenAI":
+        from openai import AsyncOpenAI
+
+        # Every OpenAI call goes through the admission controller, which has
+        # to see each 429 to back off; the SDK's own retries would absorb them
+        return AsyncOpenAI(
+            api_key=self.settings.openai_api_key,
+            http_client=self._http_client(),
+            max_retries=0,
+        )
+
+    def _build_vapi(self) -> "httpx.AsyncClient":
+        return self._http_client(
+            base_url=VAPI_BASE_URL,
+            headers={"Authorization": f"Bearer {self.settings.vapi_api_key}"},
+        )
+
+    def _get(self, name: str):
+        client = getattr(self, f"_{name}")
+        if client is None:
+            with self._lock:
+                client = getattr(self, f"_{name}")
+                if client is None:
+                    client = self._http_client() if name == "http" else getattr(self, f"_build_{name}")()
+                    setattr(self, f"_{name}", client)
+        return client
+
+    @property
+    def openai(self) -> "AsyncOpenAI":
+        return self._get("openai")
+
+    @property
+    def vapi(self) -> "httpx.AsyncClient":
+        """Client for the VAPI REST API (base URL and auth preset)"""
+        return self._get("vapi")
+
+    @property
+    def http(self) -> "httpx.AsyncClient":
+        """Unauthenticated client for absolute URLs (e.g. VAPI call control URLs)"""
+        return self._get("http")
+
+    def build(self):
+        """Build every client (blocking; run off the loop at startup)"""
+        for name in ("openai", "vapi", "http"):
+            self._get(name)
+
+    def override(
+        self,
+        openai: Optional["AsyncOpenAI"] = None,
+        vapi: Optional["httpx.AsyncClient"] = None,
+        http: Optional["httpx.AsyncClient"] = None,
+    ):
+        """Install caller-owned clients (tests, benchmarks)"""
+        for name, client in (("openai", openai), ("vapi", vapi), ("http", http)):
+            if client is not None:
+                setattr(self, f"_{name}", client)
+                self._external.add(name)
+
+    async def start(self):
+        """Build the clients and warm their connection pools in the background"""
+        await asyncio.to_thread(self.build)
+        if self.settings.upstream_warmup_connections > 0:
+            self._warmup_task = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self):
+        """Open keep-alive connections so the first real calls skip TCP/TLS setup"""
+        timeout = self.settings.upstream_connect_timeout_seconds
+        probes = []
+        if self.settings.openai_api_key or "openai" in self._external:
+            probes.append(("openai", lambda: self.openai.with_options(timeout=timeout).models.list()))
+        if self.settings.vapi_api_key or "vapi" in self._external:
+            probes.append(("vapi", lambda: self.vapi.head("/", timeout=timeout)))
+
+        async def touch(name: str, probe):
+            try:
+                await probe()
+            except Exception as e:
+                # Error statuses still leave a pooled connection behind
+                if getattr(e, "status_code", None) is None:
+                    print(f"Upstream warm-up failed ({name}): {e}")
+
+        await asyncio.gather(
+            *(
+                touch(name, probe)
+                for name, probe in probes
+                for _ in range(self.settings.upstream_warmup_connections)
+            )
+        )
+
+    async def wait_warm(self):
+        if self._warmup_task is not None:
+            await asyncio.shield(self._warmup_task)
+
+    async def close(self):
+        """Close registry-owned clients; they are rebuilt on next use"""
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+        for name in ("openai", "vapi", "http"):
+            client = getattr(self, f"_{name}")
+            if client is None or name in self._external:
+                continue
+            try:
+                # httpx clients close with aclose(), the OpenAI client with close()
+                await (client.aclose() if hasattr(client, "aclose") else client.close())
+            except Exception as e:
+                print(f"Error closing {name} client: {e}")
+            setattr(self, f"_{name}", None)
+
+
+upstream_clients = UpstreamClients()
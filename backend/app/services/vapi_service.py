@@ -1,51 +1,81 @@
-import httpx
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any
 from app.config import get_settings
+from app.services.upstream_clients import UpstreamClients, upstream_clients
+
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_MODEL = "gpt-4o"
+DEFAULT_VOICE_ID = "11labs-echo"
+FIRST_MESSAGE = "こんにちは！何かお手伝いできることはありますか？"
 
 
 class VAPIService:
     """Service for interacting with VAPI API"""
 
-    BASE_URL = "https://api.vapi.ai"
-
-    def __init__(self):
+    def __init__(self, clients: Optional[UpstreamClients] = None):
         self.settings = get_settings()
-        self.api_key = self.settings.vapi_api_key
+        self.clients = clients or upstream_clients
 
-    def _get_headers(self) -> Dict[str, str]:
-        return {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        return self.clients.vapi
 
     async def create_assistant(
         self,
         name: str,
         system_prompt: str,
-        voice_id: str = "11labs-echo",
-        model: str = "gpt-4o",
+        voice_id: str = DEFAULT_VOICE_ID,
+        model: str = DEFAULT_MODEL,
     ) -> Dict[str, Any]:
         """Create a new VAPI assistant"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.BASE_URL}/assistant",
-                headers=self._get_headers(),
-                json={
-                    "name": name,
-                    "model": {
-                        "provider": "openai",
-                        "model": model,
-                        "systemPrompt": system_prompt,
-                    },
-                    "voice": {
-                        "provider": "11labs",
-                        "voiceId": voice_id,
-                    },
-                    "firstMessage": "こんにちは！何かお手伝いできることはありますか？",
+        response = await self.client.post(
+            "/assistant",
+            json={
+                "name": name,
+                "model": {
+                    "provider": "openai",
+                    "model": model,
+                    "systemPrompt": system_prompt,
                 },
-            )
-            response.raise_for_status()
-            return response.json()
+                "voice": {
+                    "provider": "11labs",
+                    "voiceId": voice_id,
+                },
+                "firstMessage": FIRST_MESSAGE,
+            },
+        )
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def build_assistant_overrides(
+        system_prompt: str,
+        voice_id: Optional[str] = None,
+        speed: Optional[float] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        model: str = DEFAULT_MODEL,
+    ) -> Dict[str, Any]:
+        """assistantOverrides for starting a call (web SDK `vapi.start`)
+
+        Carries the same configuration `update_assistant` would PATCH, so a
+        session can start without a round-trip to VAPI.
+        """
+        overrides: Dict[str, Any] = {
+            "model": {
+                "provider": "openai",
+                "model": model,
+                "messages": [{"role": "system", "content": system_prompt}],
+            },
+            "firstMessage": FIRST_MESSAGE,
+        }
+        if voice_id and voice_id != "default":
+            overrides["voice"] = {"provider": "11labs", "voiceId": voice_id}
+            if speed:
+                overrides["voice"]["speed"] = speed
+        if metadata:
+            overrides["metadata"] = metadata
+        return overrides
 
     async def update_assistant(
         self,
@@ -62,44 +92,48 @@ class VAPIService:
         if voice_id:
             update_data["voice"] = {"voiceId": voice_id}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                f"{self.BASE_URL}/assistant/{assistant_id}",
-                headers=self._get_headers(),
-                json=update_data,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.patch(
+            f"/assistant/{assistant_id}",
+            json=update_data,
+        )
+        response.raise_for_status()
+        return response.json()
 
     async def get_assistant(self, assistant_id: str) -> Dict[str, Any]:
         """Get assistant details"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/assistant/{assistant_id}",
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.get(f"/assistant/{assistant_id}")
+        response.raise_for_status()
+        return response.json()
 
     async def list_assistants(self) -> list:
         """List all assistants"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/assistant",
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self.client.get("/assistant")
+        response.raise_for_status()
+        return response.json()
+
+    async def send_control_message(
+        self,
+        control_url: str,
+        content: str,
+        trigger_response: bool = True,
+    ) -> bool:
+        """Inject a message into a live call via its monitor control URL"""
+        response = await self.clients.http.post(
+            control_url,
+            json={
+                "type": "add-message",
+                "message": {"role": "system", "content": content},
+                "triggerResponseEnabled": trigger_response,
+            },
+        )
+        response.raise_for_status()
+        return True
 
     async def delete_assistant(self, assistant_id: str) -> bool:
         """Delete an assistant"""
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                f"{self.BASE_URL}/assistant/{assistant_id}",
-                headers=self._get_headers(),
-            )
-            response.raise_for_status()
-            return True
+        response = await self.client.delete(f"/assistant/{assistant_id}")
+        response.raise_for_status()
+        return True
 
 
 vapi_service = VAPIService()
@@ -0,0 +1,158 @@
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+from app.config import get_settings
+from app.services.memory_service import memory_service
+
+if TYPE_CHECKING:
+    import asyncpg
+
+CATEGORIES = ("profile", "preference", "context")
+
+
+def to_vector_literal(embedding: Sequence[float]) -> str:
+    """pgvector text input format: '[0.1,0.2,...]'"""
+    return "[" + ",".join(f"{x:.7g}" for x in embedding) + "]"
+
+
+class VectorMemoryStore:
+    """Memory embeddings in PostgreSQL/pgvector (migrations/002_memory_embeddings.sql)
+
+    `search` picks a strategy per user: an exact scan for users whose memory
+    count is at most `exact_max_rows` (recall 1.0, cheap over a small set) and
+    an HNSW scan with `ef_search` for larger users. A category filter is
+    spelled as `category = '<literal>'` so the planner can match the partial
+    HNSW index for that category.
+    """
+
+    def __init__(self, table: str = "memories"):
+        self.settings = get_settings()
+        self.table = table
+        self.enabled = self.settings.vector_search_enabled
+        self.ef_search = self.settings.vector_ef_search
+        self.exact_max_rows = self.settings.vector_exact_max_rows
+        self._pool: Optional["asyncpg.Pool"] = None
+        # {user_id: (count, fetched_at)}; adjusted locally on add/delete
+        self._counts: Dict[str, Tuple[int, float]] = {}
+
+    async def start(self, dsn: Optional[str] = None):
+        if self._pool is not None:
+            return
+        import asyncpg
+
+        self._pool = await asyncpg.create_pool(
+            dsn or self.settings.database_url,
+            min_size=1,
+            max_size=self.settings.vector_pool_size,
+        )
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    @property
+    def pool(self) -> "asyncpg.Pool":
+        if self._pool is None:
+            raise RuntimeError("Vector store is not started")
+        return self._pool
+
+    async def add(
+        self,
+        memory_id: UUID,
+        user_id: UUID,
+        content: str,
+        category: str,
+        embedding: Sequence[float],
+    ):
+        await self.pool.execute(
+            f"""
+            INSERT INTO {self.table} (id, user_id, content, category, embedding)
+            VALUES ($1, $2, $3, $4, $5::vector)
+            ON CONFLICT (id) DO UPDATE SET content = EXCLUDED.content, embedding = EXCLUDED.embedding
+            """,
+            memory_id, user_id, content, category, to_vector_literal(embedding),
+        )
+        cached = self._counts.get(str(user_id))
+        if cached:
+            self._counts[str(user_id)] = (cached[0] + 1, cached[1])
+
+    async def delete(self, memory_id: UUID, user_id: UUID):
+        await self.pool.execute(f"DELETE FROM {self.table} WHERE id = $1 AND user_id = $2", memory_id, user_id)
+        self._counts.pop(str(user_id), None)
+
+    async def count(self, user_id: UUID) -> int:
+        """Memories with an embedding for a user (cached for vector_count_ttl_seconds)"""
+        cached = self._counts.get(str(user_id))
+        if cached and time.monotonic() - cached[1] < self.settings.vector_count_ttl_seconds:
+            return cached[0]
+        n = await self.pool.fetchval(
+            f"SELECT count(*) FROM {self.table} WHERE user_id = $1 AND embedding IS NOT NULL", user_id
+        )
+        self._counts[str(user_id)] = (n, time.monotonic())
+        return n
+
+    def _query(self, category: Optional[str]) -> str:
+        # Inline the category literal (validated) so the partial index predicate matches
+        category_filter = f"AND category = '{category}'" if category else ""
+        return f"""
+            SELECT id, user_id, content, category, created_at, embedding <=> $2::vector AS distance
+            FROM {self.table}
+            WHERE user_id = $1 AND embedding IS NOT NULL {category_filter}
+            ORDER BY embedding <=> $2::vector
+            LIMIT $3
+        """
+
+    async def search(
+        self,
+        user_id: UUID,
+        embedding: Sequence[float],
+        limit: int = 5,
+        category: Optional[str] = None,
+        ef_search: Optional[int] = None,
+        exact: Optional[bool] = None,
+    ) -> List[dict]:
+        """Nearest memories by cosine distance, closest first
+
+        `exact` forces (True) or forbids (False) the exact strategy; by
+        default it is chosen from the user's memory count.
+        """
+        if category is not None and category not in CATEGORIES:
+            raise ValueError(f"Unknown category: {category}")
+        if exact is None:
+            exact = await self.count(user_id) <= self.exact_max_rows
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                if exact:
+                    # HNSW only supports plain index scans, so this leaves a
+                    # bitmap scan of the user_id btree followed by an exact sort
+                    await conn.execute("SET LOCAL enable_indexscan = off")
+                else:
+                    await conn.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search or self.ef_search)}")
+                    if self.settings.vector_iterative_scan:
+                        await conn.execute("SET LOCAL hnsw.iterative_scan = relaxed_order")
+                rows = await conn.fetch(
+                    self._query(category), user_id, to_vector_literal(embedding), limit
+                )
+
+        results = [dict(row) for row in rows]
+        if not exact:
+            # relaxed_order may return slightly out-of-order neighbours
+            results.sort(key=lambda r: r["distance"])
+        return results
+
+    # Event handlers keeping the table in step with the memory API
+    async def on_memory_created(self, event: dict):
+        embedding = await memory_service.create_embedding(event["content"])
+        if embedding:
+            await self.add(
+                UUID(event["memory_id"]), UUID(event["user_id"]),
+                event["content"], event["category"], embedding,
+            )
+
+    async def on_memory_deleted(self, event: dict):
+        await self.delete(UUID(event["memory_id"]), UUID(event["user_id"]))
+
+
+vector_store = VectorMemoryStore()
@@ -1,48 +1,73 @@
-import base64
-from typing import Optional
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING, List, Optional
 from app.config import get_settings
+from app.services.llm_cache import llm_cache
+from app.services.upstream_clients import UpstreamClients, upstream_clients
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 
 class VisionService:
     """Service for image analysis using GPT-4 Vision"""
 
-    def __init__(self):
+    def __init__(self, clients: Optional[UpstreamClients] = None):
         self.settings = get_settings()
-        self.client = AsyncOpenAI(api_key=self.settings.openai_api_key)
+        self.clients = clients or upstream_clients
 
-    async def analyze_image(
+    @property
+    def client(self) -> "AsyncOpenAI":
+        return self.clients.openai
+
+    async def analyze_images(
         self,
-        image_base64: str,
-        prompt: str = "この画像に何が写っていますか？詳しく説明してください。",
+        images_base64: List[str],
+        prompt: str,
         max_tokens: int = 500,
+        detail: str = "high",
     ) -> dict:
-        """Analyze an image using GPT-4 Vision"""
-        try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
+        """Analyze several JPEG images (e.g. frames in time order) in one request
+
+        Raises on upstream errors; analyze_image turns them into a message.
+        """
+        result = await llm_cache.chat_completion(
+            "vision",
+            self.client,
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        *(
                             {
                                 "type": "image_url",
                                 "image_url": {
                                     "url": f"data:image/jpeg;base64,{image_base64}",
-                                    "detail": "high",
+                                    "detail": detail,
                                 },
-                            },
-                        ],
-                    }
-                ],
-                max_tokens=max_tokens,
-            )
+                            }
+                            for image_base64 in images_base64
+                        ),
+                    ],
+                }
+            ],
+            max_tokens=max_tokens,
+        )
 
-            return {
-                "description": response.choices[0].message.content,
-                "tokens_used": response.usage.total_tokens if response.usage else None,
-            }
+        return {
+            "description": result["content"],
+            "tokens_used": result["usage"]["total_tokens"],
+        }
+
+    async def analyze_image(
+        self,
+        image_base64: str,
+        prompt: str = "この画像に何が写っていますか？詳しく説明してください。",
+        max_tokens: int = 500,
+    ) -> dict:
+        """Analyze an image using GPT-4 Vision"""
+        try:
+            return await self.analyze_images([image_base64], prompt, max_tokens)
 
         except Exception as e:
             return {
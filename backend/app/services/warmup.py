@@ -0,0 +1,74 @@
+import asyncio
+import importlib
+import time
+from typing import Dict, Optional
+from app.services.upstream_clients import upstream_clients
+
+# SDKs the services import lazily; loading them here keeps the cost off
+# worker boot and off the first request that needs them
+HEAVY_MODULES = (
+    "openai",
+    "numpy",
+    "PIL.Image",
+    "googleapiclient.discovery",
+    "google_auth_oauthlib.flow",
+    "google.oauth2.credentials",
+    "google.auth.transport.requests",
+)
+
+
+class WarmUp:
+    """Background startup work: SDK imports, client construction, pool warm-up
+
+    The worker accepts requests as soon as lifespan startup returns; `ready`
+    tells a readiness probe when the warm-up has finished.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self.timings_ms: Dict[str, float] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._task is not None and self._task.done()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        started = time.perf_counter()
+        for name in HEAVY_MODULES:
+            module_started = time.perf_counter()
+            try:
+                await asyncio.to_thread(importlib.import_module, name)
+            except ImportError as e:
+                print(f"Warm-up import failed ({name}): {e}")
+            self.timings_ms[name] = round((time.perf_counter() - module_started) * 1000, 1)
+
+        clients_started = time.perf_counter()
+        await upstream_clients.start()
+        await upstream_clients.wait_warm()
+        self.timings_ms["upstream_clients"] = round((time.perf_counter() - clients_started) * 1000, 1)
+        self.timings_ms["total"] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the warm-up to finish; False if it is still running after `timeout`"""
+        if self._task is None:
+            return False
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.shield(self._task)
+        except TimeoutError:
+            return False
+        return True
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self.timings_ms = {}
+
+
+warm_up = WarmUp()
@@ -0,0 +1,119 @@
+"""Session analytics benchmark: event ingestion, rollup queries, sketch accuracy
+
+    cd backend
+    python -m benchmarks.analytics --users 200 --sessions 20 --turns 30
+
+Feeds synthetic VAPI call lifecycles (status updates, speech updates, tool
+calls, transcripts, camera captures) through SessionAnalytics.on_event, then
+times the dashboard queries, which only merge pre-aggregated daily rollups.
+Turn latency percentiles from the sketches are compared with exact
+percentiles of the generated samples; exits non-zero if any is off by more
+than twice the configured relative accuracy.
+"""
+import argparse
+import random
+import sys
+import time
+import uuid
+
+from app.services.analytics import SessionAnalytics
+from benchmarks.harness import percentile, summarize
+
+TOOLS = ["search_memory", "save_memory", "capture_photo", "get_calendar_events", "start_recording"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=20, help="sessions per user")
+    parser.add_argument("--turns", type=int, default=30, help="turns per session")
+    parser.add_argument("--days", type=int, default=30, help="spread sessions over this many days")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def call_events(rng: random.Random, user_id: str, start: float, turns: int, latencies: list):
+    """Events of one call in arrival order"""
+    call = {"id": str(uuid.uuid4())}
+    session_id = str(uuid.uuid4())
+
+    def vapi(kind: str, ts: float, **fields):
+        return {"type": f"vapi.{kind}", "user_id": user_id,
+                "message": {"type": kind, "call": call, "timestamp": ts * 1000, **fields}}
+
+    t = start
+    yield vapi("status-update", t, status="in-progress")
+    for _ in range(turns):
+        t += rng.uniform(1, 6)
+        yield vapi("speech-update", t, role="user", status="stopped")
+        yield {"type": "conversation.logged", "user_id": user_id,
+               "log": {"session_id": session_id, "role": "user", "metadata": {"call_id": call["id"]}}}
+        latency = rng.lognormvariate(6.6, 0.4) / 1000  # ~700 ms median
+        latencies.append(latency * 1000)
+        t += latency
+        yield vapi("speech-update", t, role="assistant", status="started")
+        if rng.random() < 0.2:
+            yield {"type": "vapi.tool_call", "user_id": user_id, "call_id": call["id"],
+                   "name": rng.choice(TOOLS), "outcome": "ok" if rng.random() < 0.95 else "timeout",
+                   "duration_ms": rng.uniform(50, 3000)}
+        if rng.random() < 0.05:
+            yield {"type": "vision.captured", "session_id": call["id"]}
+        yield {"type": "conversation.logged", "user_id": user_id,
+               "log": {"session_id": session_id, "role": "assistant", "metadata": {"call_id": call["id"]}}}
+    t += rng.uniform(1, 5)
+    yield vapi("status-update", t, status="ended", endedReason="customer-ended-call")
+    yield vapi("end-of-call-report", t + 0.5, endedReason="customer-ended-call", durationSeconds=t - start)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    analytics = SessionAnalytics()
+    users = [str(uuid.uuid4()) for _ in range(args.users)]
+
+    now = time.time()
+    latencies: list = []
+    events = []
+    for user in users:
+        for _ in range(args.sessions):
+            start = now - rng.uniform(0, args.days * 86400)
+            events.extend(call_events(rng, user, start, args.turns, latencies))
+
+    started = time.perf_counter()
+    for event in events:
+        analytics.on_event(event)
+    ingest_s = time.perf_counter() - started
+    print(f"ingested {len(events)} events in {ingest_s:.2f}s ({len(events) / ingest_s:,.0f} events/s)")
+
+    queries = {
+        "overview (1 day)": lambda i: analytics.overview(1),
+        f"overview ({args.days} days)": lambda i: analytics.overview(args.days),
+        "user (7 days)": lambda i: analytics.user_summary(users[i % len(users)], 7),
+        "user sessions": lambda i: analytics.user_sessions(users[i % len(users)], 20),
+    }
+    print(f"\n{'query':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, query in queries.items():
+        timings = []
+        for i in range(args.queries):
+            started = time.perf_counter()
+            query(i)
+            timings.append(time.perf_counter() - started)
+        stats = summarize(timings, 0)
+        print(f"{name:<22}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}")
+
+    sketch = analytics.overview(args.days + 1)["turn_latency_ms"]
+    exact = sorted(latencies)
+    tolerance = 2 * analytics.alpha
+    failures = 0
+    print(f"\n{'turn latency':<14}{'sketch ms':>12}{'exact ms':>12}{'error':>9}")
+    for key, pct in (("p50", 50), ("p90", 90), ("p95", 95), ("p99", 99)):
+        true = percentile(exact, pct)
+        error = abs(sketch[key] - true) / true
+        failures += error > tolerance
+        print(f"{key:<14}{sketch[key]:>12.2f}{true:>12.2f}{error:>8.2%}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Memory compaction benchmark: pairwise similarity pass, full vs incremental
+
+    cd backend
+    python -m benchmarks.compaction --memories 1000,10000,50000 --new 100
+
+Builds synthetic unit embeddings (1536-d) with a known share of injected
+near-duplicates, then times the tiled pairwise pass used by MemoryCompactor:
+
+  full          every memory is new (first run for a user)
+  incremental   --new memories on top of an already-compacted set
+
+and checks that every injected duplicate pair is found.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.services.memory_compaction import cluster, duplicate_pairs
+
+DIMENSIONS = 1536
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--memories", default="1000,10000", help="comma-separated memory counts")
+    parser.add_argument("--new", type=int, default=100, help="new memories for the incremental pass")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="share of memories that are near-duplicates")
+    parser.add_argument("--threshold", type=float, default=0.92)
+    parser.add_argument("--block-rows", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def synthetic(rng: np.random.Generator, n: int, duplicate_share: float):
+    """Unit vectors where a share of rows are perturbed copies of earlier rows"""
+    vectors = rng.normal(size=(n, DIMENSIONS)).astype(np.float32)
+    expected = set()
+    for i in range(1, n):
+        if rng.random() < duplicate_share:
+            j = int(rng.integers(0, i))
+            # Per-component noise of 0.25 gives a cosine similarity of about 0.97
+            vectors[i] = vectors[j] + rng.normal(scale=0.25, size=DIMENSIONS).astype(np.float32)
+            expected.add((i, j))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors, expected
+
+
+def run_pass(vectors: np.ndarray, new_start: int, args):
+    started = time.perf_counter()
+    pairs = duplicate_pairs(vectors, new_start, args.threshold, args.block_rows)
+    clusters = cluster(len(vectors), pairs)
+    return time.perf_counter() - started, pairs, clusters
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+
+    header = f"{'memories':>10}{'pass':>13}{'compared':>14}{'ms':>10}{'pairs':>8}{'clusters':>10}{'recall':>8}"
+    print(header)
+    print("-" * len(header))
+    missed = 0
+    for n in [int(x) for x in args.memories.split(",")]:
+        vectors, expected = synthetic(rng, n + args.new, args.duplicates)
+
+        for name, new_start in (("full", 0), ("incremental", n)):
+            elapsed, pairs, clusters = run_pass(vectors, new_start, args)
+            found = {(i, j) for i, j, _ in pairs}
+            wanted = {(i, j) for i, j in expected if i >= new_start}
+            recall = len(found & wanted) / len(wanted) if wanted else 1.0
+            missed += len(wanted - found)
+            new = len(vectors) - new_start
+            compared = new * new_start + new * (new - 1) // 2
+            print(
+                f"{n:>10}{name:>13}{compared:>14}{elapsed * 1000:>10.1f}"
+                f"{len(pairs):>8}{len(clusters):>10}{recall:>8.3f}"
+            )
+
+    return 1 if missed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
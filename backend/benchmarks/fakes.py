@@ -0,0 +1,196 @@
+"""Fake OpenAI / VAPI / Google upstreams for benchmarks
+
+The fakes run as a real uvicorn server on a loopback port in a background
+thread, so the services talk to them over actual sockets. Every route sleeps
+for the configured latency (plus optional jitter) before answering.
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+class UpstreamLatency:
+    """Injected latency for the fake upstreams (mutable while running)"""
+
+    def __init__(self, openai_ms: float = 0, vapi_ms: float = 0, google_ms: float = 0, jitter: float = 0.0):
+        self.openai_ms = openai_ms
+        self.vapi_ms = vapi_ms
+        self.google_ms = google_ms
+        self.jitter = jitter  # fraction of the base latency, e.g. 0.2 = +/-20%
+
+    async def wait(self, base_ms: float):
+        if base_ms <= 0:
+            return
+        if self.jitter:
+            base_ms *= 1 + random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(base_ms / 1000)
+
+
+EXTRACTED_MEMORIES = {
+    "memories": [
+        {"content": "名前は田中です", "category": "profile"},
+        {"content": "コーヒーが好き", "category": "preference"},
+    ]
+}
+
+
+def create_fake_app(latency: UpstreamLatency) -> FastAPI:
+    app = FastAPI()
+    stats = {"openai": 0, "vapi": 0, "google": 0}
+    app.state.stats = stats
+
+    # OpenAI
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        stats["openai"] += 1
+        body = await request.json()
+        await latency.wait(latency.openai_ms)
+
+        content = body["messages"][-1]["content"]
+        if isinstance(content, list):
+            text = "テーブルの上にノートパソコンとコーヒーカップがあります。"
+        elif body.get("response_format", {}).get("type") == "json_object":
+            text = json.dumps(EXTRACTED_MEMORIES, ensure_ascii=False)
+        else:
+            text = "了解しました。"
+
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 120, "completion_tokens": 40, "total_tokens": 160},
+        }
+
+    @app.post("/openai/v1/embeddings")
+    async def embeddings(request: Request):
+        stats["openai"] += 1
+        body = await request.json()
+        await latency.wait(latency.openai_ms)
+
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        data = []
+        for i, text in enumerate(inputs):
+            rng = random.Random(text)
+            data.append(
+                {
+                    "object": "embedding",
+                    "index": i,
+                    "embedding": [rng.uniform(-1, 1) for _ in range(body.get("dimensions") or 1536)],
+                }
+            )
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model"),
+            "usage": {"prompt_tokens": 8, "total_tokens": 8},
+        }
+
+    # VAPI
+    @app.api_route("/vapi/assistant", methods=["GET", "POST"])
+    @app.api_route("/vapi/assistant/{assistant_id}", methods=["GET", "PATCH", "DELETE"])
+    async def vapi_assistant(request: Request, assistant_id: Optional[str] = None):
+        stats["vapi"] += 1
+        await latency.wait(latency.vapi_ms)
+        if request.method == "GET" and assistant_id is None:
+            return []
+        body = await request.json() if request.method in ("POST", "PATCH") else {}
+        return {"id": assistant_id or "asst-fake", **body}
+
+    @app.post("/vapi/call/{call_id}/control")
+    async def vapi_control(call_id: str):
+        stats["vapi"] += 1
+        await latency.wait(latency.vapi_ms)
+        return {"ok": True}
+
+    # Google (Calendar v3 / Docs v1 surface used by GoogleService)
+    @app.get("/google/calendar/v3/calendars/{calendar_id}/events")
+    async def calendar_list(calendar_id: str):
+        stats["google"] += 1
+        await latency.wait(latency.google_ms)
+        return {"items": [{"id": "evt-1", "summary": "定例ミーティング"}]}
+
+    @app.post("/google/calendar/v3/calendars/{calendar_id}/events")
+    async def calendar_insert(calendar_id: str, request: Request):
+        stats["google"] += 1
+        await latency.wait(latency.google_ms)
+        return {"id": "evt-new", **(await request.json())}
+
+    @app.post("/google/v1/documents")
+    async def docs_create(request: Request):
+        stats["google"] += 1
+        await latency.wait(latency.google_ms)
+        return {"documentId": "doc-fake", **(await request.json())}
+
+    @app.post("/google/token")
+    async def google_token():
+        stats["google"] += 1
+        await latency.wait(latency.google_ms)
+        return {"access_token": "fake-token", "expires_in": 3600, "token_type": "Bearer"}
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeUpstreams:
+    """Run the fake upstreams on a loopback port for the duration of a `with` block"""
+
+    def __init__(self, latency: Optional[UpstreamLatency] = None):
+        self.latency = latency or UpstreamLatency()
+        self.app = create_fake_app(self.latency)
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off")
+        )
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.url}/openai/v1"
+
+    @property
+    def vapi_base_url(self) -> str:
+        return f"{self.url}/vapi"
+
+    @property
+    def google_base_url(self) -> str:
+        return f"{self.url}/google"
+
+    @property
+    def stats(self) -> dict:
+        return self.app.state.stats
+
+    def __enter__(self) -> "FakeUpstreams":
+        self._thread = threading.Thread(target=self._server.run, name="fake-upstreams", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake upstream server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=5)
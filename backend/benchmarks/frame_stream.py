@@ -0,0 +1,156 @@
+"""Continuous camera mode benchmark: frame rate vs vision calls, detection cost
+
+    cd backend
+    python -m benchmarks.frame_stream --fps 1,2,5,10 --duration 120
+
+Replays the same synthetic wearable-camera timeline (sensor noise, head
+jitter, auto-exposure drift, and a scene change every ~15 s: a cut to a new
+scene or an object entering the view) at several frame rates through
+FrameStreamService, with a fake vision upstream. Time is compressed by
+--speed. Reports per frame rate how many frames were selected and how many
+vision requests were made, which scene changes were detected within a
+second, and the per-frame decode + diff cost. Exits non-zero if a scene
+change is missed.
+"""
+import argparse
+import asyncio
+import io
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.config import get_settings
+from app.services.frame_stream import FrameStreamService
+from benchmarks.harness import summarize
+
+WIDTH, HEIGHT = 640, 480
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fps", default="1,2,5,10", help="comma-separated frame rates")
+    parser.add_argument("--duration", type=float, default=120.0, help="timeline length in seconds")
+    parser.add_argument("--change-every", type=float, default=15.0, help="mean seconds between scene changes")
+    parser.add_argument("--vision-ms", type=float, default=1500.0, help="fake vision request latency")
+    parser.add_argument("--speed", type=float, default=20.0, help="time compression factor")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+class FakeVision:
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+        self.requests = 0
+        self.images = 0
+
+    async def analyze_images(self, images_base64, prompt, max_tokens=500, detail="high"):
+        self.requests += 1
+        self.images += len(images_base64)
+        await asyncio.sleep(self.latency_s)
+        return {"description": f"scene {self.requests}", "tokens_used": 85 * len(images_base64)}
+
+
+def texture(rng: np.random.Generator) -> np.ndarray:
+    """Smooth random RGB scene"""
+    coarse = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    return np.asarray(Image.fromarray(coarse).resize((WIDTH, HEIGHT), Image.BICUBIC), dtype=np.float32)
+
+
+def timeline(rng: np.random.Generator, duration: float, change_every: float):
+    """[(time, scene)] where each scene is a cut or the previous scene plus an object"""
+    scenes = [(0.0, texture(rng))]
+    t = rng.exponential(change_every) + 5
+    while t < duration - 2:
+        if rng.random() < 0.5:
+            scene = texture(rng)
+        else:
+            scene = scenes[-1][1].copy()
+            h, w = HEIGHT // 2, WIDTH // 2
+            y, x = rng.integers(0, HEIGHT - h), rng.integers(0, WIDTH - w)
+            scene[y:y + h, x:x + w] = rng.integers(0, 256, 3)
+        scenes.append((t, scene))
+        t += max(rng.exponential(change_every), 3.0)
+    return scenes
+
+
+def render(rng: np.random.Generator, scene: np.ndarray, t: float) -> bytes:
+    """Camera frame: head jitter, exposure drift, sensor noise, JPEG q80"""
+    dy, dx = rng.integers(-4, 5, 2)
+    frame = np.roll(scene, (dy, dx), axis=(0, 1))
+    frame = frame * (1 + 0.12 * np.sin(t / 7)) + rng.normal(0, 4, frame.shape)
+    buffer = io.BytesIO()
+    Image.fromarray(frame.clip(0, 255).astype(np.uint8)).save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+async def run(args, fps: float, scenes) -> dict:
+    rng = np.random.default_rng(args.seed)
+    frames = []
+    index = 0
+    for i in range(int(args.duration * fps)):
+        t = i / fps
+        while index + 1 < len(scenes) and scenes[index + 1][0] <= t:
+            index += 1
+        frames.append((t, render(rng, scenes[index][1], t)))
+
+    vision = FakeVision(args.vision_ms / 1000 / args.speed)
+    service = FrameStreamService(vision=vision)
+    service.settings = get_settings().model_copy(update={
+        "vision_stream_min_interval_seconds": get_settings().vision_stream_min_interval_seconds / args.speed,
+    })
+
+    selected_at, detect = [], []
+    started = time.perf_counter()
+    for t, jpeg in frames:
+        delay = started + t / args.speed - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        frame_started = time.perf_counter()
+        _, _, selected = service.add_frame("bench", jpeg)
+        detect.append(time.perf_counter() - frame_started)
+        if selected:
+            selected_at.append(t)
+    stream = service.get("bench")
+    if stream.task is not None:
+        await stream.task
+
+    changes = [t for t, _ in scenes[1:]]
+    window = max(1.0, 1.0 / fps)
+    detected = sum(any(c <= s <= c + window for s in selected_at) for c in changes)
+    spurious = sum(not any(c <= s <= c + window for c in [0.0] + changes) for s in selected_at)
+    return {
+        "frames": len(frames),
+        "selected": len(selected_at),
+        "requests": vision.requests,
+        "images": vision.images,
+        "changes": len(changes),
+        "detected": detected,
+        "spurious": spurious,
+        "detect": summarize(detect, 0),
+    }
+
+
+async def main_async(args) -> int:
+    scenes = timeline(np.random.default_rng(args.seed), args.duration, args.change_every)
+    header = (f"{'fps':>5}{'frames':>8}{'selected':>10}{'requests':>10}{'images':>8}"
+              f"{'detected':>10}{'spurious':>10}{'p50 ms':>8}{'p95 ms':>8}")
+    print(header)
+    print("-" * len(header))
+    missed = 0
+    for fps in [float(x) for x in args.fps.split(",")]:
+        r = await run(args, fps, scenes)
+        missed += r["changes"] - r["detected"]
+        print(f"{fps:>5g}{r['frames']:>8}{r['selected']:>10}{r['requests']:>10}{r['images']:>8}"
+              f"{r['detected']:>6}/{r['changes']:<3}{r['spurious']:>10}"
+              f"{r['detect']['p50_ms']:>8.2f}{r['detect']['p95_ms']:>8.2f}")
+    return 1 if missed else 0
+
+
+def main(argv=None) -> int:
+    return asyncio.run(main_async(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Google OAuth token handling benchmark: credential wait on the call path
+
+    cd backend
+    python -m benchmarks.google_tokens --accounts 20 --callers 10 --google-latency-ms 150
+
+Each account gets a burst of concurrent integration calls (a voice turn that
+reads the calendar) in three token states, against the fake Google token
+endpoint:
+
+  lazy      expired token, refreshed inside each call as the API client did
+  cold      expired token through GoogleCredentialStore (single-flight)
+  ahead     token inside the refresh margin: served immediately while one
+            background refresh renews it (what the periodic refresher keeps
+            active accounts at)
+
+Reports how long calls waited for credentials and how many token requests
+were made. Exits non-zero if a burst made more than one token request or an
+`ahead` call waited for the network.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.fakes import FakeUpstreams, UpstreamLatency
+from benchmarks.harness import summarize
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--callers", type=int, default=10, help="concurrent calls per account")
+    parser.add_argument("--google-latency-ms", type=float, default=150.0, help="token endpoint latency")
+    return parser.parse_args(argv)
+
+
+def credentials(token_uri: str, expires_in: float):
+    from google.oauth2.credentials import Credentials
+
+    return Credentials(
+        token="stale-token",
+        refresh_token="refresh-token",
+        token_uri=token_uri,
+        client_id="bench-client",
+        client_secret="bench-secret",
+        expiry=datetime.utcnow() + timedelta(seconds=expires_in),
+    )
+
+
+async def lazy(args, token_uri: str) -> list:
+    from google.auth.transport.requests import Request
+
+    waits = []
+
+    async def call(creds):
+        started = time.perf_counter()
+        if not creds.valid:
+            await asyncio.to_thread(creds.refresh, Request())
+        waits.append(time.perf_counter() - started)
+
+    for _ in range(args.accounts):
+        creds = credentials(token_uri, -60)
+        await asyncio.gather(*(call(creds) for _ in range(args.callers)))
+    return waits
+
+
+async def through_store(args, token_uri: str, expires_in: float) -> list:
+    from app.services.google_credentials import GoogleCredentialStore
+
+    store = GoogleCredentialStore()
+    waits = []
+
+    async def call(account_id: str):
+        started = time.perf_counter()
+        await store.get(account_id)
+        waits.append(time.perf_counter() - started)
+
+    for i in range(args.accounts):
+        store.put(f"account-{i}", credentials(token_uri, expires_in))
+        await asyncio.gather(*(call(f"account-{i}") for _ in range(args.callers)))
+    await asyncio.gather(*store._refreshing.values(), return_exceptions=True)
+    await store.close()
+    return waits
+
+
+async def main_async(args, fakes: FakeUpstreams) -> int:
+    token_uri = f"{fakes.google_base_url}/token"
+    modes = {
+        "lazy": lambda: lazy(args, token_uri),
+        "cold": lambda: through_store(args, token_uri, -60),
+        "ahead": lambda: through_store(args, token_uri, 300),
+    }
+    failures = 0
+    header = f"{'mode':<8}{'calls':>8}{'token reqs':>12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, run in modes.items():
+        before = fakes.stats["google"]
+        waits = await run()
+        requests = fakes.stats["google"] - before
+        stats = summarize(waits, 0)
+        print(f"{name:<8}{len(waits):>8}{requests:>12}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{max(waits) * 1000:>10.3f}")
+        if name != "lazy" and requests > args.accounts:
+            failures += 1
+        if name == "ahead" and max(waits) * 1000 >= args.google_latency_ms:
+            failures += 1
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    with FakeUpstreams(UpstreamLatency(google_ms=args.google_latency_ms)) as fakes:
+        return asyncio.run(main_async(args, fakes))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
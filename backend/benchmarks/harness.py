@@ -0,0 +1,142 @@
+"""Timing, percentile and baseline helpers shared by the benchmark tools"""
+import asyncio
+import json
+import os
+import platform
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies_s: List[float], wall_s: float, errors: int = 0) -> Dict[str, float]:
+    """Throughput and latency percentiles (ms) for one measured run"""
+    values = sorted(latencies_s)
+    ms = [v * 1000 for v in values]
+    return {
+        "ops": len(values),
+        "errors": errors,
+        "throughput": round(len(values) / wall_s, 2) if wall_s > 0 else 0.0,
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+async def measure(
+    op: Callable[[int], Awaitable[None]],
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 0,
+) -> Dict[str, float]:
+    """Run `op(i)` `iterations` times across `concurrency` workers and summarize"""
+    for i in range(warmup):
+        await op(i)
+
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(iterations))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                await op(i)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+@asynccontextmanager
+async def asgi_client(app, base_url: str = "http://bench"):
+    """httpx client bound to the app through in-process ASGI transport (lifespan included)"""
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url=base_url, timeout=60
+        ) as client:
+            yield client
+
+
+def environment_info() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": str(os.cpu_count()),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def save_results(path: str, results: Dict[str, dict], config: dict):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"environment": environment_info(), "config": config, "results": results},
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare_to_baseline(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    threshold: float,
+) -> List[str]:
+    """Return a message per scenario that regressed by more than `threshold` (0.1 = 10%)
+
+    p99 is reported but not gated; it is too noisy at benchmark sample sizes.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if base[key] > 0 and current[key] > base[key] * (1 + threshold):
+                regressions.append(
+                    f"{name}: {key} {current[key]:.3f} > baseline {base[key]:.3f} (+{threshold:.0%})"
+                )
+        if base["throughput"] > 0 and current["throughput"] < base["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {current['throughput']:.1f} < baseline {base['throughput']:.1f} (-{threshold:.0%})"
+            )
+        if current.get("errors", 0) > base.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} errors (baseline {base.get('errors', 0)})")
+    return regressions
+
+
+def print_table(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None):
+    header = f"{'scenario':<24}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        line = f"{name:<24}{r['throughput']:>10.1f}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['errors']:>8}"
+        if baseline and name in baseline and baseline[name]["p95_ms"] > 0:
+            delta = r["p95_ms"] / baseline[name]["p95_ms"] - 1
+            line += f"   p95 {delta:+.1%}"
+        print(line)
@@ -0,0 +1,277 @@
+"""Concurrent voice-session load generator
+
+    cd backend
+    python -m benchmarks.loadgen --concurrency 1,4,16,64 --duration 20
+    python -m benchmarks.loadgen --url http://localhost:8000 --concurrency 8,32
+
+Each virtual user runs voice sessions back-to-back against the existing
+endpoints: settings + context fetch at session start, then per turn a think
+time, a memory search and a transcript write (stored as a `context` memory,
+the closest existing write path), plus occasional camera captures and push
+notifications. Without --url the app runs in-process over ASGI transport with
+fake upstreams. One step is run per concurrency level and the report shows
+where throughput stops scaling (the saturation knee).
+
+A 4xx response other than 429 means the generator sent a request the API
+rejects, not that the server is saturated; any such response is reported
+and makes the run exit non-zero, since its numbers are not meaningful.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, List
+from uuid import UUID
+
+import httpx
+
+from benchmarks.fakes import FakeUpstreams, UpstreamLatency
+from benchmarks.harness import asgi_client, environment_info, summarize
+from benchmarks.scenarios import fake_image_base64, memory_fixture, reset_state, use_fake_upstreams
+
+SEARCH_QUERIES = ["コーヒー", "京都", "予定", "家族", "締め切り", "ランニング"]
+UTTERANCES = [
+    "明日の天気はどうかな",
+    "来週の予定を確認して",
+    "最近読んだ本について話したい",
+    "京都でおすすめのカフェはある？",
+    "今日は疲れたから早めに寝るよ",
+]
+CAMERA_FRAME = fake_image_base64()
+
+
+class SessionMix:
+    """Shape of a simulated voice session"""
+
+    def __init__(
+        self,
+        turns_min: int = 3,
+        turns_max: int = 12,
+        think_mean_s: float = 2.0,
+        camera_prob: float = 0.05,
+        notification_prob: float = 0.03,
+        seed_memories: int = 50,
+    ):
+        self.turns_min = turns_min
+        self.turns_max = turns_max
+        self.think_mean_s = think_mean_s
+        self.camera_prob = camera_prob
+        self.notification_prob = notification_prob
+        self.seed_memories = seed_memories
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        # {endpoint: {status: count}} for 4xx responses other than 429
+        self.client_errors: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.sessions = 0
+
+    async def call(self, name: str, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+            response.raise_for_status()
+        except Exception as e:
+            self.errors[name] += 1
+            status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+            if status is not None and 400 <= status < 500 and status != 429:
+                self.client_errors[name][status] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        return response
+
+
+async def voice_session(client: httpx.AsyncClient, user_id: UUID, mix: SessionMix, rng: random.Random, rec: Recorder):
+    await rec.call("settings", client.get(f"/api/settings/{user_id}"))
+    await rec.call("context", client.get(f"/api/memory/{user_id}/context"))
+
+    for turn in range(rng.randint(mix.turns_min, mix.turns_max)):
+        if mix.think_mean_s > 0:
+            await asyncio.sleep(rng.expovariate(1 / mix.think_mean_s))
+
+        await rec.call(
+            "memory_search",
+            client.post(f"/api/memory/{user_id}/search", params={"query": rng.choice(SEARCH_QUERIES)}),
+        )
+        await rec.call(
+            "transcript_write",
+            client.post(
+                f"/api/memory/{user_id}",
+                json={"content": f"user: {rng.choice(UTTERANCES)} ({turn})", "category": "context"},
+            ),
+        )
+        if rng.random() < mix.camera_prob:
+            await rec.call(
+                "camera_capture",
+                client.post("/api/vision/capture", json={"image_base64": CAMERA_FRAME, "user_id": str(user_id)}),
+            )
+        if rng.random() < mix.notification_prob:
+            await rec.call(
+                "notification",
+                client.post(
+                    "/api/simulation/notification/receive",
+                    json={"title": "リマインダー", "body": "15時から打ち合わせです", "app_name": "Calendar"},
+                ),
+            )
+
+    rec.sessions += 1
+
+
+async def virtual_user(client, user_id: UUID, mix: SessionMix, seed: int, stop_at: float, rec: Recorder):
+    rng = random.Random(seed)
+    while time.monotonic() < stop_at:
+        await voice_session(client, user_id, mix, rng, rec)
+
+
+async def seed_users(client: httpx.AsyncClient, users: List[UUID], mix: SessionMix):
+    for user_id in users:
+        for payload in memory_fixture(mix.seed_memories, seed=user_id.int % 1000):
+            (await client.post(f"/api/memory/{user_id}", json=payload)).raise_for_status()
+
+
+async def run_step(client, concurrency: int, duration: float, mix: SessionMix, seed: int) -> dict:
+    users = [UUID(int=(seed << 32) + i) for i in range(concurrency)]
+    await seed_users(client, users, mix)
+
+    rec = Recorder()
+    started = time.perf_counter()
+    stop_at = time.monotonic() + duration
+    await asyncio.gather(
+        *(virtual_user(client, user, mix, seed + i, stop_at, rec) for i, user in enumerate(users))
+    )
+    wall = time.perf_counter() - started
+
+    all_latencies = [v for values in rec.latencies.values() for v in values]
+    return {
+        "concurrency": concurrency,
+        "sessions": rec.sessions,
+        "sessions_per_s": round(rec.sessions / wall, 2),
+        "requests": summarize(all_latencies, wall, sum(rec.errors.values())),
+        "client_errors": {name: dict(statuses) for name, statuses in rec.client_errors.items()},
+        "endpoints": {
+            name: summarize(values, wall, rec.errors.get(name, 0)) for name, values in sorted(rec.latencies.items())
+        },
+    }
+
+
+def find_knee(steps: List[dict], min_gain: float = 0.1, p95_factor: float = 2.0):
+    """First concurrency level where throughput stops scaling or p95 blows up"""
+    base_p95 = steps[0]["requests"]["p95_ms"] or 1e-9
+    for prev, step in zip(steps, steps[1:]):
+        prev_tp = prev["requests"]["throughput"] or 1e-9
+        gain = step["requests"]["throughput"] / prev_tp - 1
+        if gain < min_gain or step["requests"]["p95_ms"] > base_p95 * p95_factor:
+            return prev["concurrency"]
+    return None
+
+
+def client_errors(steps: List[dict]) -> List[str]:
+    """'<endpoint> <status> x<count> at concurrency <n>' for every 4xx a step got"""
+    return [
+        f"{name} {status} x{count} at concurrency {step['concurrency']}"
+        for step in steps
+        for name, statuses in step["client_errors"].items()
+        for status, count in statuses.items()
+    ]
+
+
+@asynccontextmanager
+async def target_client(url: str):
+    if url:
+        limits = httpx.Limits(max_connections=1000, max_keepalive_connections=1000)
+        async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+            yield client
+    else:
+        from app.main import app
+
+        async with asgi_client(app) as client:
+            yield client
+
+
+async def run(args, mix: SessionMix) -> List[dict]:
+    steps = []
+    async with target_client(args.url) as client:
+        for concurrency in args.concurrency:
+            if not args.url:
+                reset_state()
+            step = await run_step(client, concurrency, args.duration, mix, args.seed)
+            steps.append(step)
+            r = step["requests"]
+            print(
+                f"{concurrency:>6}{step['sessions_per_s']:>12.2f}{r['throughput']:>10.1f}"
+                f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['errors']:>8}",
+                flush=True,
+            )
+    return steps
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="", help="drive a running server instead of the in-process app")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32,64", help="comma-separated session counts")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per concurrency step")
+    parser.add_argument("--turns", default="3-12", help="turns per session, e.g. 3-12")
+    parser.add_argument("--think-mean", type=float, default=2.0, help="mean think time between turns (s)")
+    parser.add_argument("--camera-prob", type=float, default=0.05)
+    parser.add_argument("--notification-prob", type=float, default=0.03)
+    parser.add_argument("--seed-memories", type=int, default=50, help="memories seeded per virtual user")
+    parser.add_argument("--openai-latency-ms", type=float, default=200.0)
+    parser.add_argument("--vapi-latency-ms", type=float, default=50.0)
+    parser.add_argument("--google-latency-ms", type=float, default=80.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", metavar="PATH", help="write the saturation curve as JSON")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c]
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    turns_min, _, turns_max = args.turns.partition("-")
+    mix = SessionMix(
+        turns_min=int(turns_min),
+        turns_max=int(turns_max or turns_min),
+        think_mean_s=args.think_mean,
+        camera_prob=args.camera_prob,
+        notification_prob=args.notification_prob,
+        seed_memories=args.seed_memories,
+    )
+
+    print(f"{'conc':>6}{'sessions/s':>12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    if args.url:
+        steps = asyncio.run(run(args, mix))
+    else:
+        latency = UpstreamLatency(args.openai_latency_ms, args.vapi_latency_ms, args.google_latency_ms, jitter=0.2)
+        with FakeUpstreams(latency) as fakes:
+            use_fake_upstreams(fakes.openai_base_url, fakes.vapi_base_url)
+            steps = asyncio.run(run(args, mix))
+
+    knee = find_knee(steps)
+    print(f"\nSaturation knee: {knee if knee is not None else 'not reached'} concurrent sessions")
+    rejected = client_errors(steps)
+    for line in rejected:
+        print(f"  rejected: {line}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {"environment": environment_info(), "config": vars(args), "steps": steps, "knee": knee},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"Saved saturation curve to {args.save}")
+    if rejected:
+        print("\nThe API rejected generated requests (4xx); the curve above is not valid")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
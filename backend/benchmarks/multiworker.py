@@ -0,0 +1,230 @@
+"""Multi-worker consistency check
+
+    cd backend
+    REDIS_URL=redis://localhost:6379/15 python -m benchmarks.multiworker --workers 4
+
+Starts gunicorn with N uvicorn workers on a loopback port and drives it over
+fresh connections so requests land on different workers. It verifies that:
+
+  readiness     every worker reports ready on /ready
+  settings      a settings update is visible from every worker
+  concurrent    partial settings updates sent to different workers at once
+                all survive (no lost read-modify-write)
+  memories      memories written through different workers are all listed
+                by every worker, with one ETag across workers
+  deletes       a deleted memory disappears from every worker
+  drain         SIGTERM shuts down cleanly while requests are in flight
+
+Use a scratch Redis database: the check writes under a random user id but
+does not clean up. Exits non-zero if any check fails. tests/test_multiworker.py
+runs the same checks under pytest when REDIS_URL is set.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--memories", type=int, default=40, help="memories written across workers")
+    parser.add_argument("--reads", type=int, default=40, help="reads per consistency check")
+    parser.add_argument("--rounds", type=int, default=20, help="rounds of concurrent settings updates")
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", ""))
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    return parser.parse_args(argv)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def fresh_request(base_url: str, method: str, path: str, **kwargs) -> httpx.Response:
+    """One request on a new connection, so the kernel may pick any worker"""
+    with httpx.Client(base_url=base_url, timeout=30, headers={"Connection": "close"}) as client:
+        return client.request(method, path, **kwargs)
+
+
+class Check:
+    def __init__(self):
+        self.failures = []  # failed check names and details
+
+    def __call__(self, name: str, ok: bool, detail: str = ""):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}{f' ({detail})' if detail else ''}")
+        if not ok:
+            self.failures.append(f"{name}: {detail}" if detail else name)
+
+
+def wait_ready(base_url: str, workers: int, timeout: float) -> set:
+    """Poll /ready until every worker has answered ready once"""
+    ready = set()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and len(ready) < workers:
+        try:
+            response = fresh_request(base_url, "GET", "/ready")
+            if response.status_code == 200:
+                ready.add(response.json()["worker"])
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    return ready
+
+
+def run_checks(base_url: str, args, check: Check):
+    user = uuid.uuid4()
+
+    ready = wait_ready(base_url, args.workers, args.startup_timeout)
+    check("readiness", len(ready) == args.workers, f"{len(ready)}/{args.workers} workers ready")
+
+    prompt = f"multiworker {uuid.uuid4().hex[:6]}"
+    fresh_request(base_url, "PUT", f"/api/settings/{user}", json={"system_prompt": prompt}).raise_for_status()
+    seen = {fresh_request(base_url, "GET", f"/api/settings/{user}").json()["system_prompt"] for _ in range(args.reads)}
+    check("settings", seen == {prompt}, f"saw {sorted(seen)}")
+    check_concurrent_settings(base_url, args, check)
+
+    written = []
+    for i in range(args.memories):
+        response = fresh_request(
+            base_url, "POST", f"/api/memory/{user}", json={"content": f"memory {i}", "category": "context"}
+        )
+        response.raise_for_status()
+        written.append(response.json()["id"])
+
+    listings, etags = set(), set()
+    for _ in range(args.reads):
+        response = fresh_request(base_url, "GET", f"/api/memory/{user}", params={"limit": 100})
+        listings.add(frozenset(m["id"] for m in response.json()))
+        etags.add(response.headers.get("etag"))
+    check(
+        "memories",
+        listings == {frozenset(written)},
+        f"{len(listings)} distinct listings, expected {len(written)} ids",
+    )
+    check("memory etag", len(etags) == 1, f"{len(etags)} distinct ETags")
+
+    deleted = written[: len(written) // 2]
+    statuses = [
+        fresh_request(base_url, "DELETE", f"/api/memory/{user}/{memory_id}").status_code
+        for memory_id in deleted
+    ]
+    check("delete responses", set(statuses) == {200}, f"statuses {sorted(set(statuses))}")
+    expected = frozenset(written) - frozenset(deleted)
+    listings = {
+        frozenset(m["id"] for m in fresh_request(base_url, "GET", f"/api/memory/{user}", params={"limit": 100}).json())
+        for _ in range(args.reads)
+    }
+    check("deletes", listings == {expected}, f"{len(listings)} distinct listings after deletes")
+
+
+def check_concurrent_settings(base_url: str, args, check: Check):
+    """Each round updates every field of a fresh user in parallel, one field per request"""
+    lost = 0
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for round_ in range(args.rounds):
+            user = uuid.uuid4()
+            fields = {
+                "system_prompt": f"prompt {round_}",
+                "voice_id": f"voice {round_}",
+                "speed": 1.25,
+                "silence_sensitivity": 77,
+            }
+            responses = pool.map(
+                lambda item: fresh_request(base_url, "PUT", f"/api/settings/{user}", json=dict([item])),
+                fields.items(),
+            )
+            for response in responses:
+                response.raise_for_status()
+            saved = fresh_request(base_url, "GET", f"/api/settings/{user}").json()
+            lost += sum(saved[name] != value for name, value in fields.items())
+    check("concurrent", lost == 0, f"{lost} field updates lost over {args.rounds} rounds")
+
+
+def check_drain(base_url: str, server: subprocess.Popen, check: Check):
+    """SIGTERM while a stream of requests is running: in-flight ones must complete"""
+    statuses = []
+    stop = threading.Event()
+
+    def traffic():
+        while not stop.is_set():
+            try:
+                statuses.append(fresh_request(base_url, "GET", "/health").status_code)
+            except httpx.HTTPError:
+                # Refused after the listener closed: expected once draining starts
+                statuses.append(None)
+                time.sleep(0.01)
+
+    threads = [threading.Thread(target=traffic) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.5)
+    server.send_signal(signal.SIGTERM)
+    try:
+        code = server.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        code = None
+    stop.set()
+    for t in threads:
+        t.join()
+
+    failed = [s for s in statuses if s is not None and s != 200]
+    check("drain", code == 0 and not failed, f"exit code {code}, {len(failed)} failed responses")
+
+
+def run(args) -> Check:
+    """Start the server, run every check against it and shut it down"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(args.workers),
+        "BIND": f"127.0.0.1:{port}",
+        "REDIS_URL": args.redis_url,
+        "ACCESS_LOG": "",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.main:app", "-c", "gunicorn.conf.py"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    check = Check()
+    try:
+        run_checks(base_url, args, check)
+        check_drain(base_url, server, check)
+    finally:
+        if server.poll() is None:
+            # SIGTERM so the master takes its workers down with it
+            server.terminate()
+            try:
+                server.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+    return check
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.workers > 1 and not args.redis_url:
+        print("warning: no --redis-url / REDIS_URL; workers will not share state and checks will fail")
+
+    check = run(args)
+    print(f"\n{'all checks passed' if not check.failures else f'{len(check.failures)} check(s) failed'}")
+    return 1 if check.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Reproducible benchmarks for the backend hot paths
+
+    cd backend
+    python -m benchmarks.run                                    # run everything
+    python -m benchmarks.run --save benchmarks/baselines/local.json
+    python -m benchmarks.run --baseline benchmarks/baselines/local.json --threshold 0.15
+
+The app is driven in-process through httpx's ASGI transport; OpenAI/VAPI/Google
+are replaced by local fake servers with configurable injected latency. Exits
+non-zero when any scenario regresses beyond --threshold against --baseline.
+"""
+import argparse
+import asyncio
+import random
+import sys
+
+from benchmarks.fakes import FakeUpstreams, UpstreamLatency
+from benchmarks.harness import (
+    asgi_client,
+    compare_to_baseline,
+    load_results,
+    measure,
+    print_table,
+    save_results,
+)
+from benchmarks.scenarios import SCENARIOS, reset_state, use_fake_upstreams
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--memories", type=int, default=500, help="memories seeded per user")
+    parser.add_argument("--openai-latency-ms", type=float, default=20.0)
+    parser.add_argument("--vapi-latency-ms", type=float, default=10.0)
+    parser.add_argument("--google-latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter", type=float, default=0.0, help="latency jitter fraction, e.g. 0.2")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed regression (0.15 = 15%%)")
+    return parser.parse_args(argv)
+
+
+async def run_benchmarks(args) -> dict:
+    from app.main import app
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {}
+    for name in names:
+        random.seed(args.seed)
+        reset_state()
+        async with asgi_client(app) as client:
+            op = await SCENARIOS[name](client, {"memories": args.memories})
+            results[name] = await measure(op, args.iterations, args.concurrency, args.warmup)
+    return results
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    latency = UpstreamLatency(args.openai_latency_ms, args.vapi_latency_ms, args.google_latency_ms, args.jitter)
+
+    with FakeUpstreams(latency) as fakes:
+        use_fake_upstreams(fakes.openai_base_url, fakes.vapi_base_url)
+        results = asyncio.run(run_benchmarks(args))
+
+    baseline = load_results(args.baseline) if args.baseline else None
+    print_table(results, baseline)
+
+    if args.save:
+        config = {k: v for k, v in vars(args).items() if k not in ("save", "baseline")}
+        save_results(args.save, results, config)
+        print(f"\nSaved results to {args.save}")
+
+    if baseline:
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Backend hot-path scenarios exercised by the benchmark and load tools"""
+import base64
+import random
+from typing import Awaitable, Callable, Dict, Optional
+from uuid import UUID
+
+import httpx
+from openai import AsyncOpenAI
+
+BENCH_USER = UUID("00000000-0000-4000-8000-000000000001")
+
+MEMORY_TEMPLATES = {
+    "profile": ["名前は{n}です", "職業はエンジニアで{n}年目", "{n}人家族で東京に住んでいる"],
+    "preference": ["{n}杯目のコーヒーが好き", "辛い食べ物は苦手（{n}）", "週末は{n}時間ランニングする"],
+    "context": ["来週{n}日にプロジェクトの締め切りがある", "{n}月に京都へ旅行予定", "英語の勉強を{n}ヶ月続けている"],
+}
+
+TRANSCRIPT = "\n".join(
+    [
+        "user: こんにちは、田中です。最近コーヒーにはまっています。",
+        "assistant: こんにちは田中さん。どんなコーヒーがお好きですか？",
+        "user: 浅煎りが好きです。来週の金曜日に京都に行く予定なので、おすすめのカフェを探しています。",
+        "assistant: 京都には素敵なカフェがたくさんありますね。",
+    ]
+)
+
+
+def memory_fixture(count: int, seed: int = 42):
+    """Deterministic Japanese memory payloads"""
+    rng = random.Random(seed)
+    for i in range(count):
+        category = rng.choice(list(MEMORY_TEMPLATES))
+        content = rng.choice(MEMORY_TEMPLATES[category]).format(n=i)
+        yield {"content": content, "category": category}
+
+
+def fake_image_base64(size: int = 48_000, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    return base64.b64encode(bytes(rng.getrandbits(8) for _ in range(size))).decode("ascii")
+
+
+def use_fake_upstreams(openai_base_url: str, vapi_base_url: Optional[str] = None):
+    """Point the shared upstream clients at the fake upstream servers"""
+    from app.services.upstream_clients import upstream_clients
+
+    upstream_clients.override(
+        openai=AsyncOpenAI(api_key="bench", base_url=openai_base_url, max_retries=0),
+        vapi=httpx.AsyncClient(base_url=vapi_base_url) if vapi_base_url else None,
+    )
+
+
+def reset_state():
+    """Clear the in-memory stores between scenarios"""
+    from app.routers.memory import context_cache, memory_store, memory_versions
+    from app.routers.conversations import conversation_store
+    from app.routers.session import bootstrap_cache
+    from app.services.text_index import text_index
+    from app.routers.settings import settings_store, settings_versions
+
+    memory_store.clear()
+    memory_versions.clear()
+    context_cache.clear()
+    settings_store.clear()
+    settings_versions.clear()
+    bootstrap_cache.clear()
+    conversation_store.clear()
+    text_index.clear()
+
+
+async def seed_memories(client: httpx.AsyncClient, count: int, user_id: UUID = BENCH_USER):
+    for payload in memory_fixture(count):
+        response = await client.post(f"/api/memory/{user_id}", json=payload)
+        response.raise_for_status()
+
+
+Op = Callable[[int], Awaitable[None]]
+ScenarioFactory = Callable[[httpx.AsyncClient, dict], Awaitable[Op]]
+
+
+async def settings_get(client: httpx.AsyncClient, options: dict) -> Op:
+    await client.post(
+        f"/api/settings/{BENCH_USER}",
+        json={"system_prompt": "あなたは親切なAIアシスタントです。", "voice_id": "11labs-echo"},
+    )
+
+    async def op(i: int):
+        (await client.get(f"/api/settings/{BENCH_USER}")).raise_for_status()
+
+    return op
+
+
+async def memory_search(client: httpx.AsyncClient, options: dict) -> Op:
+    await seed_memories(client, options["memories"])
+    queries = ["コーヒー", "京都", "締め切り", "エンジニア", "存在しない語"]
+
+    async def op(i: int):
+        response = await client.post(
+            f"/api/memory/{BENCH_USER}/search", params={"query": queries[i % len(queries)]}
+        )
+        response.raise_for_status()
+
+    return op
+
+
+async def memory_list(client: httpx.AsyncClient, options: dict) -> Op:
+    await seed_memories(client, options["memories"])
+
+    async def op(i: int):
+        (await client.get(f"/api/memory/{BENCH_USER}", params={"limit": 100})).raise_for_status()
+
+    return op
+
+
+async def context_build(client: httpx.AsyncClient, options: dict) -> Op:
+    await seed_memories(client, options["memories"])
+
+    async def op(i: int):
+        (await client.get(f"/api/memory/{BENCH_USER}/context")).raise_for_status()
+
+    return op
+
+
+async def session_bootstrap(client: httpx.AsyncClient, options: dict) -> Op:
+    await seed_memories(client, options["memories"])
+    await client.post(
+        f"/api/settings/{BENCH_USER}",
+        json={"system_prompt": "あなたは親切なAIアシスタントです。", "voice_id": "11labs-echo"},
+    )
+
+    async def op(i: int):
+        (await client.get(f"/api/session/{BENCH_USER}/bootstrap")).raise_for_status()
+
+    return op
+
+
+async def vision_capture(client: httpx.AsyncClient, options: dict) -> Op:
+    payload = {"image_base64": fake_image_base64(), "user_id": str(BENCH_USER)}
+
+    async def op(i: int):
+        (await client.post("/api/vision/capture", json=payload)).raise_for_status()
+
+    return op
+
+
+async def vision_analyze(client: httpx.AsyncClient, options: dict) -> Op:
+    from app.services.vision_service import vision_service
+
+    image = fake_image_base64()
+
+    async def op(i: int):
+        result = await vision_service.analyze_image(image, prompt=f"この画像に何が写っていますか？ ({i})")
+        if result["tokens_used"] is None:
+            raise RuntimeError(result["description"])
+
+    return op
+
+
+async def simulation_trigger(client: httpx.AsyncClient, options: dict) -> Op:
+    presets = ["home", "office", "station", "convenience_store"]
+
+    async def op(i: int):
+        if i % 2:
+            response = await client.post(
+                "/api/simulation/notification/receive",
+                json={"title": "ニュース速報", "body": f"本日の株価は{i}円です", "app_name": "News"},
+            )
+        else:
+            response = await client.post(f"/api/simulation/geofence/preset/{presets[i % 4]}")
+        response.raise_for_status()
+
+    return op
+
+
+async def transcript_ingestion(client: httpx.AsyncClient, options: dict) -> Op:
+    from app.services.memory_service import memory_service
+
+    async def op(i: int):
+        extracted = await memory_service.extract_memory_from_conversation(f"{TRANSCRIPT}\n({i})")
+        if not extracted:
+            raise RuntimeError("No memories extracted")
+        for memory in extracted:
+            (await client.post(f"/api/memory/{BENCH_USER}", json=memory)).raise_for_status()
+
+    return op
+
+
+def vapi_headers() -> dict:
+    """X-Vapi-Secret for the webhook, configuring a benchmark secret if none is set"""
+    from app.config import get_settings
+
+    settings = get_settings()
+    if not settings.vapi_server_secret:
+        settings.vapi_server_secret = "bench-secret"
+    return {"x-vapi-secret": settings.vapi_server_secret}
+
+
+async def vapi_tool_call(client: httpx.AsyncClient, options: dict) -> Op:
+    await seed_memories(client, options["memories"])
+    headers = vapi_headers()
+    queries = ["コーヒー", "京都", "締め切り"]
+
+    async def op(i: int):
+        payload = {
+            "message": {
+                "type": "tool-calls",
+                "call": {"id": f"call-{i}", "metadata": {"user_id": str(BENCH_USER)}},
+                "toolCallList": [
+                    {
+                        "id": f"tc-{i}",
+                        "type": "function",
+                        "function": {"name": "search_memory", "arguments": {"query": queries[i % 3]}},
+                    }
+                ],
+            }
+        }
+        (await client.post("/api/vapi/webhook", json=payload, headers=headers)).raise_for_status()
+
+    return op
+
+
+SCENARIOS: Dict[str, ScenarioFactory] = {
+    "settings_get": settings_get,
+    "memory_search": memory_search,
+    "memory_list": memory_list,
+    "context_build": context_build,
+    "session_bootstrap": session_bootstrap,
+    "vision_capture": vision_capture,
+    "vision_analyze": vision_analyze,
+    "simulation_trigger": simulation_trigger,
+    "transcript_ingestion": transcript_ingestion,
+    "vapi_tool_call": vapi_tool_call,
+}
@@ -0,0 +1,85 @@
+"""CPU cost of JSON rendering for the largest responses
+
+    cd backend
+    python -m benchmarks.serialization --iterations 2000
+
+Compares, per response, the default path (pydantic dump to JSON-compatible
+Python + stdlib JSONResponse) against FastJSONResponse (orjson) and the
+pre-serialized byte payloads, reporting CPU microseconds per request.
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from typing import Callable, List
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.responses import FastJSONResponse, RawJSONResponse
+from app.routers.memory import MemoryCategory, MemoryResponse
+from app.routers.settings import DEFAULT_SETTINGS, StudioSettingsResponse, _default_settings_response
+from app.routers.simulation import PRESET_LOCATIONS, PRESET_LOCATIONS_JSON
+from benchmarks.scenarios import memory_fixture
+
+
+def cpu_us_per_call(fn: Callable[[], object], iterations: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def build_cases(memories: int):
+    user_id = uuid4()
+    items: List[MemoryResponse] = [
+        MemoryResponse(id=uuid4(), user_id=user_id, created_at=datetime.now(), **m)
+        for m in memory_fixture(memories)
+    ]
+    listing = TypeAdapter(List[MemoryResponse])
+    context = {
+        "context": "\n".join(
+            ["【ユーザープロフィール】"] + [m.content for m in items if m.category == MemoryCategory.PROFILE][:50]
+        )
+    }
+
+    def default_settings_model():
+        now = datetime.now()
+        model = StudioSettingsResponse(
+            id=user_id, user_id=user_id, **DEFAULT_SETTINGS.model_dump(), created_at=now, updated_at=now
+        )
+        return JSONResponse(model.model_dump(mode="json"))
+
+    return {
+        f"memory_list[{memories}]": (
+            lambda: JSONResponse(listing.dump_python(items, mode="json")),
+            lambda: FastJSONResponse(listing.dump_python(items, mode="json")),
+        ),
+        "context": (lambda: JSONResponse(context), lambda: FastJSONResponse(context)),
+        "preset_locations": (
+            lambda: JSONResponse(jsonable_encoder(PRESET_LOCATIONS)),
+            lambda: RawJSONResponse(PRESET_LOCATIONS_JSON),
+        ),
+        "default_settings": (default_settings_model, lambda: _default_settings_response(user_id)),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--memories", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    print(f"{'response':<22}{'default us':>12}{'fast us':>10}{'saved us':>10}{'speedup':>9}")
+    for name, (default, fast) in build_cases(args.memories).items():
+        slow_us = cpu_us_per_call(default, args.iterations)
+        fast_us = cpu_us_per_call(fast, args.iterations)
+        print(f"{name:<22}{slow_us:>12.1f}{fast_us:>10.1f}{slow_us - fast_us:>10.1f}{slow_us / fast_us:>8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Worker startup-time benchmark
+
+    cd backend
+    python -m benchmarks.startup                         # 10 cold starts
+    python -m benchmarks.startup --runs 20 --save benchmarks/baselines/startup.json
+    python -m benchmarks.startup --baseline benchmarks/baselines/startup.json
+
+Each run is a fresh interpreter (a cold worker) that measures:
+
+  import            `import app.main`
+  lifespan          lifespan startup until the app can accept requests
+  first_request     first GET /health
+  first_ai_request  first VAPI camera tool call (vision analysis via the fake OpenAI)
+  warm_up           lifespan start until the background warm-up has finished
+
+Requests are driven as raw ASGI calls so the measuring code imports nothing
+the app does not import itself. OpenAI is a local fake server.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.fakes import FakeUpstreams, UpstreamLatency
+from benchmarks.harness import compare_to_baseline, load_results, print_table, save_results, summarize
+from benchmarks.scenarios import fake_image_base64
+
+METRICS = ("import", "lifespan", "first_request", "first_ai_request", "warm_up")
+
+# Runs inside the cold worker; prints one JSON line of timings in ms
+CHILD = r"""
+import asyncio, json, sys, time
+
+t0 = time.perf_counter()
+from app.main import app
+t_import = time.perf_counter()
+
+
+async def call(method, path, body=b""):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "server": ("bench", 80), "client": ("127.0.0.1", 1),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json"), (b"x-vapi-secret", b"bench-secret")],
+    }
+    sent = False
+    status = []
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    if status[0] >= 400:
+        raise SystemExit(f"{method} {path} -> {status[0]}")
+
+
+async def main():
+    from app.services.warmup import warm_up
+
+    image = sys.stdin.read()
+    timings = {"import": (t_import - t0) * 1000}
+    async with app.router.lifespan_context(app):
+        started = time.perf_counter()
+        timings["lifespan"] = (started - t_import) * 1000
+
+        t = time.perf_counter()
+        await call("GET", "/health")
+        timings["first_request"] = (time.perf_counter() - t) * 1000
+
+        capture = json.dumps({"image_base64": image, "session_id": "startup"}).encode()
+        tool_call = json.dumps({"message": {
+            "type": "tool-calls", "call": {"id": "startup"},
+            "toolCallList": [{"id": "tc", "function": {"name": "capture_photo", "arguments": {}}}],
+        }}).encode()
+        t = time.perf_counter()
+        await call("POST", "/api/vision/capture", capture)
+        await call("POST", "/api/vapi/webhook", tool_call)
+        timings["first_ai_request"] = (time.perf_counter() - t) * 1000
+
+        await warm_up.wait()
+        timings["warm_up"] = (time.perf_counter() - t_import) * 1000
+    print(json.dumps(timings))
+
+
+asyncio.run(main())
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="cold starts to measure")
+    parser.add_argument("--openai-latency-ms", type=float, default=20.0)
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed regression (0.15 = 15%%)")
+    return parser.parse_args(argv)
+
+
+def cold_start(openai_base_url: str, image: str) -> dict:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {
+        **os.environ,
+        "PYTHONPATH": backend_dir,
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": openai_base_url,
+        "LLM_CACHE_PATH": "",
+        "VAPI_SERVER_SECRET": "bench-secret",
+    }
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        input=image,
+        capture_output=True,
+        text=True,
+        cwd=backend_dir,
+        env=env,
+        timeout=120,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"cold start failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    image = fake_image_base64()
+    samples = {name: [] for name in METRICS}
+
+    with FakeUpstreams(UpstreamLatency(openai_ms=args.openai_latency_ms)) as fakes:
+        for _ in range(args.runs):
+            timings = cold_start(fakes.openai_base_url, image)
+            for name in METRICS:
+                samples[name].append(timings[name] / 1000)
+
+    # Sequential cold starts: throughput is meaningless, so only latencies are gated
+    results = {name: summarize(values, 0) for name, values in samples.items()}
+    baseline = load_results(args.baseline) if args.baseline else None
+    print_table(results, baseline)
+    print(f"\nmedian import {statistics.median(samples['import']) * 1000:.0f}ms over {args.runs} runs")
+
+    if args.save:
+        config = {k: v for k, v in vars(args).items() if k not in ("save", "baseline")}
+        save_results(args.save, results, config)
+        print(f"\nSaved results to {args.save}")
+
+    if baseline:
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
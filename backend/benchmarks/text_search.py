@@ -0,0 +1,117 @@
+"""Keyword search benchmark: bigram inverted index vs substring scan
+
+    cd backend
+    python -m benchmarks.text_search --documents 10000,100000 --queries 500
+
+Builds synthetic Japanese conversation lines (several months of transcripts
+for one user), indexes them with BigramIndex, and compares query latency
+with the case-folded substring scan the search endpoints used before. Every
+query's result set is checked against the scan; exits non-zero on mismatch.
+"""
+import argparse
+import random
+import sys
+import time
+
+from app.services.text_index import BigramIndex, normalize
+from benchmarks.harness import summarize
+
+WORDS = (
+    "今日 明日 昨日 来週 天気 晴れ 雨 会議 資料 締め切り 京都 東京 大阪 旅行 新幹線 "
+    "ホテル 予約 コーヒー 紅茶 ラーメン 寿司 カレー 映画 音楽 ギター ピアノ 散歩 "
+    "ジム ランニング 読書 小説 仕事 プロジェクト エンジニア デザイン レビュー 家族 "
+    "子供 誕生日 プレゼント 買い物 スーパー 料理 レシピ 病院 薬 電話 メール 写真 "
+    "カメラ 公園 桜 紅葉 海 山 温泉 週末 予定 確認 お願い ありがとう Python FastAPI"
+).split()
+PARTICLES = "は が を に で と も の へ から まで".split()
+KANA = "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワン"
+ENDINGS = ("です。", "でした。", "ですか？", "しましょう。", "したい。", "だね。", "かな。")
+
+QUERIES = ["京都", "締め切り", "コーヒー", "新幹線 予約", "誕生日 プレゼント", "python", "ＰＹＴＨＯＮ", "温泉旅行", "存在しない語"]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", default="10000,100000", help="comma-separated corpus sizes")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--vocabulary", type=int, default=5000, help="long-tail words besides the common ones")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def vocabulary(rng: random.Random, size: int) -> list:
+    """Common words followed by a long tail of names/places (katakana)"""
+    tail = {"".join(rng.choice(KANA) for _ in range(rng.randint(3, 5))) for _ in range(size)}
+    return WORDS + sorted(tail)
+
+
+def sentence(rng: random.Random, vocab: list, weights: list) -> str:
+    words = rng.choices(vocab, weights, k=rng.randint(3, 7))
+    return "".join(w + rng.choice(PARTICLES) for w in words[:-1]) + words[-1] + rng.choice(ENDINGS)
+
+
+def scan(texts, query: str) -> set:
+    """Reference semantics: every normalized term is a substring"""
+    terms = normalize(query).split()
+    return {i for i, text in enumerate(texts) if all(t in normalize(text) for t in terms)}
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    rng = random.Random(args.seed)
+    vocab = vocabulary(rng, args.vocabulary)
+    # Zipf-like word frequencies: common words dominate, tail words are rare
+    weights = [1.0 / (rank + 10) for rank in range(len(vocab))]
+    mismatches = 0
+
+    header = f"{'documents':>10}{'method':>10}{'build s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'MiB':>8}"
+    print(header)
+    print("-" * len(header))
+    for n in [int(x) for x in args.documents.split(",")]:
+        texts = [sentence(rng, vocab, weights) for _ in range(n)]
+
+        started = time.perf_counter()
+        index = BigramIndex()
+        for i, text in enumerate(texts):
+            index.add(str(i), text)
+        build_s = time.perf_counter() - started
+
+        # Half fixed queries, half long-tail words (names, places)
+        tail = vocab[len(WORDS):]
+        queries = [QUERIES[i % len(QUERIES)] if i % 2 else rng.choice(tail) for i in range(args.queries)]
+        index_latencies, scan_latencies = [], []
+        for query in queries:
+            started = time.perf_counter()
+            index.search(query, args.limit)
+            index_latencies.append(time.perf_counter() - started)
+
+        # The old path lower-cased every text per query; sample fewer on big corpora
+        scan_queries = queries[: max(len(QUERIES), args.queries * 10_000 // max(n, 1))]
+        for query in scan_queries:
+            started = time.perf_counter()
+            lowered = query.lower()
+            [t for t in texts if lowered in t.lower()][: args.limit]
+            scan_latencies.append(time.perf_counter() - started)
+
+        for query in QUERIES:
+            found = {int(ref) for ref, _, _ in index.search(query, len(texts))}
+            if found != scan(texts, query):
+                mismatches += 1
+                print(f"mismatch for {query!r}")
+
+        for method, latencies, build, size in (
+            ("index", index_latencies, f"{build_s:.2f}", f"{index.memory_bytes() / 2**20:.1f}"),
+            ("scan", scan_latencies, "-", "-"),
+        ):
+            stats = summarize(latencies, 0)
+            print(
+                f"{n:>10}{method:>10}{build:>10}{stats['p50_ms']:>10.3f}"
+                f"{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{size:>8}"
+            )
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""Gunicorn settings for running the API with several uvicorn workers
+
+    gunicorn app.main:app -c gunicorn.conf.py
+    WEB_CONCURRENCY=4 REDIS_URL=redis://localhost:6379/0 gunicorn app.main:app -c gunicorn.conf.py
+
+More than one worker needs REDIS_URL so settings, memories and events are
+shared; LLM_CACHE_PATH may point at one SQLite file for all workers. On
+SIGTERM each worker stops accepting connections, finishes in-flight
+requests, then runs the app's lifespan shutdown (drains background tasks
+and flushes write-behind buffers) within `graceful_timeout`.
+"""
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Seconds a worker gets after SIGTERM before it is killed; keep above
+# SHUTDOWN_DRAIN_TIMEOUT_SECONDS plus the slowest request
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = os.getenv("ACCESS_LOG", "-") or None
+errorlog = "-"
+
+
+def on_starting(server):
+    if workers > 1 and not os.getenv("REDIS_URL"):
+        server.log.warning(
+            "Running %d workers without REDIS_URL: each worker keeps its own "
+            "settings and memories", workers
+        )
+
+
+def worker_exit(server, worker):
+    server.log.info("Worker %s exited", worker.pid)
@@ -0,0 +1,44 @@
+-- Voice Engine Studio - Memory embeddings with pgvector
+-- Requires the pgvector extension (>= 0.5.0 for HNSW, >= 0.8.0 for iterative index scans)
+
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- ==========================================
+-- Embedding column (text-embedding-3-small, 1536 dimensions)
+-- ==========================================
+ALTER TABLE memories ADD COLUMN IF NOT EXISTS embedding VECTOR(1536);
+
+-- ==========================================
+-- ANN indexes (cosine distance)
+-- ==========================================
+-- Search is always scoped to one user, which an HNSW graph cannot filter on
+-- directly. The query path picks a strategy per user:
+--   * users with few memories: exact scan via the composite btree below
+--     (ORDER BY distance over a handful of rows is cheaper and has recall 1.0)
+--   * users with many memories: HNSW scan filtered by user_id, with
+--     hnsw.iterative_scan so the filter cannot starve the result set
+-- The category filter has a fixed set of values, so each category gets a
+-- partial HNSW index; the planner uses it when the query repeats the predicate.
+
+CREATE INDEX IF NOT EXISTS idx_memories_embedding_hnsw
+    ON memories USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS idx_memories_embedding_hnsw_profile
+    ON memories USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE category = 'profile';
+
+CREATE INDEX IF NOT EXISTS idx_memories_embedding_hnsw_preference
+    ON memories USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE category = 'preference';
+
+CREATE INDEX IF NOT EXISTS idx_memories_embedding_hnsw_context
+    ON memories USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE category = 'context';
+
+-- Exact per-user search and per-user counts
+CREATE INDEX IF NOT EXISTS idx_memories_user_category
+    ON memories(user_id, category, created_at DESC);
@@ -0,0 +1,51 @@
+"""Shared fixtures: the in-process app and per-test settings"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from benchmarks.scenarios import reset_state
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """Set environment variables and have get_settings() re-read them
+
+    Only code that calls get_settings() at use time sees the change; module
+    singletons keep the settings they were created with.
+    """
+
+    def set_env(**values):
+        for name, value in values.items():
+            monkeypatch.setenv(name.upper(), str(value))
+        get_settings.cache_clear()
+
+    yield set_env
+    get_settings.cache_clear()
+
+
+@pytest.fixture
+def client():
+    """The app with its lifespan running and empty in-memory stores"""
+    from app.main import app
+
+    reset_state()
+    with TestClient(app) as client:
+        yield client
+    reset_state()
+
+
+@pytest.fixture(scope="session")
+def upstream_server():
+    from benchmarks.fakes import FakeUpstreams, UpstreamLatency
+
+    with FakeUpstreams(UpstreamLatency(0, 0, 0)) as fakes:
+        yield fakes
+
+
+@pytest.fixture
+def fake_upstreams(upstream_server):
+    """Point the shared OpenAI/VAPI clients at the local fake upstreams"""
+    from benchmarks.scenarios import use_fake_upstreams
+
+    use_fake_upstreams(upstream_server.openai_base_url, upstream_server.vapi_base_url)
+    return upstream_server
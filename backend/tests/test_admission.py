@@ -0,0 +1,133 @@
+"""Adaptive admission control for upstream AI calls"""
+import asyncio
+
+import pytest
+
+from app.services.admission import (
+    BACKGROUND,
+    INTERACTIVE,
+    AdmissionController,
+    AdmissionRejected,
+    UpstreamLimiter,
+)
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+def limiter(initial_limit=4, min_limit=1, max_limit=8, target_latency=10.0, background_share=0.5) -> UpstreamLimiter:
+    return UpstreamLimiter("openai", initial_limit, min_limit, max_limit, target_latency, background_share)
+
+
+@pytest.fixture
+def controller() -> AdmissionController:
+    controller = AdmissionController()
+    controller._limiters["openai"] = limiter()
+    return controller
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_additively_with_fast_successes(controller):
+    for _ in range(4):
+        async with controller.admit("openai"):
+            pass
+    upstream = controller.limiter("openai")
+    assert 4.9 < upstream.limit < 5.0
+    assert upstream.in_flight == {INTERACTIVE: 0, BACKGROUND: 0}
+
+
+@pytest.mark.asyncio
+async def test_a_429_burst_backs_off_once(controller):
+    upstream = controller.limiter("openai")
+
+    async def throttled_call():
+        with pytest.raises(Throttled):
+            async with controller.admit("openai"):
+                await asyncio.sleep(0.01)
+                raise Throttled()
+
+    # Both calls started before the first decrease, so only one counts
+    await asyncio.gather(throttled_call(), throttled_call())
+    assert upstream.limit == pytest.approx(4 * 0.7)
+    assert upstream.decreases == 1
+    assert upstream.stats["interactive"]["throttled"] == 2
+
+    await throttled_call()
+    assert upstream.limit == pytest.approx(4 * 0.7 * 0.7)
+
+
+@pytest.mark.asyncio
+async def test_slow_responses_shrink_the_limit_down_to_the_minimum():
+    upstream = limiter(initial_limit=2, target_latency=0.001)
+    for _ in range(5):
+        slot = await upstream.acquire(INTERACTIVE, queue_timeout=1)
+        await asyncio.sleep(0.005)
+        upstream.release(slot, throttled=False)
+    assert upstream.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_call_is_rejected_at_its_deadline(controller):
+    upstream = controller.limiter("openai")
+    slots = [await upstream.acquire(INTERACTIVE, 1) for _ in range(4)]
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        async with controller.admit("openai", INTERACTIVE, queue_timeout=0.02):
+            pass
+    assert rejected.value.upstream == "openai"
+    assert rejected.value.waited_ms >= 20
+    assert upstream.stats["interactive"]["rejected"] == 1
+
+    for slot in slots:
+        upstream.release(slot, throttled=False)
+    assert upstream.get_stats()["queue_depth"] == {"interactive": 0, "background": 0}
+
+
+@pytest.mark.asyncio
+async def test_interactive_calls_jump_the_background_queue():
+    upstream = limiter(initial_limit=2, background_share=1.0)
+    held = [await upstream.acquire(BACKGROUND, 1) for _ in range(2)]
+    order = []
+
+    async def call(priority, name):
+        slot = await upstream.acquire(priority, 1)
+        order.append(name)
+        upstream.release(slot, throttled=False, record=False)
+
+    waiting = [asyncio.create_task(call(BACKGROUND, "background")), asyncio.create_task(call(INTERACTIVE, "interactive"))]
+    await asyncio.sleep(0)
+    upstream.release(held.pop(), throttled=False, record=False)
+    await asyncio.gather(*waiting)
+    assert order == ["interactive", "background"]
+
+
+@pytest.mark.asyncio
+async def test_background_calls_keep_headroom_for_interactive():
+    upstream = limiter(initial_limit=4, background_share=0.5)
+    await upstream.acquire(BACKGROUND, 1)
+    await upstream.acquire(BACKGROUND, 1)
+    with pytest.raises(AdmissionRejected):
+        await upstream.acquire(BACKGROUND, 0.01)
+    # Interactive calls still get the rest of the limit
+    await upstream.acquire(INTERACTIVE, 0.01)
+    await upstream.acquire(INTERACTIVE, 0.01)
+    assert upstream.in_flight == {INTERACTIVE: 2, BACKGROUND: 2}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_calls_do_not_leak_slots_or_move_the_limit(controller):
+    upstream = controller.limiter("openai")
+
+    async def hang():
+        async with controller.admit("openai"):
+            await asyncio.sleep(10)
+
+    tasks = [asyncio.create_task(hang()) for _ in range(6)]
+    await asyncio.sleep(0.01)
+    assert upstream.get_stats()["queue_depth"]["interactive"] == 2
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert upstream.in_flight == {INTERACTIVE: 0, BACKGROUND: 0}
+    assert upstream.limit == 4
@@ -0,0 +1,113 @@
+"""Streaming session analytics and the DDSketch quantile sketch"""
+import random
+import time
+
+import pytest
+
+from app.services.analytics import IDLE_TIMEOUT_REASON, QuantileSketch, SessionAnalytics
+
+USER_ID = "00000000-0000-4000-8000-00000000000a"
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_sketch_quantiles_are_within_the_relative_error():
+    rng = random.Random(5)
+    values = [rng.lognormvariate(6, 1.2) for _ in range(20000)]
+    sketch = QuantileSketch(alpha=0.01)
+    for value in values:
+        sketch.add(value)
+
+    qs = [0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999]
+    for q, estimate in zip(qs, sketch.quantiles(qs)):
+        assert abs(estimate - exact_quantile(values, q)) <= 0.01 * exact_quantile(values, q) * 1.0001
+    assert sketch.quantile(1.0) == max(values)
+    assert sketch.summary()["count"] == 20000
+
+
+def test_merged_sketches_equal_one_sketch_over_all_values():
+    rng = random.Random(6)
+    values = [rng.expovariate(1 / 300) for _ in range(5000)] + [0.0] * 50
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i % 2 else right).add(value)
+    left.merge(right)
+
+    qs = [0.005, 0.5, 0.99]
+    assert left.quantiles(qs) == whole.quantiles(qs)
+    assert left.quantile(0.005) == 0.0
+    assert (left.count, left.max) == (whole.count, whole.max)
+
+
+def test_sketch_edge_cases():
+    assert QuantileSketch().quantiles([0.5, 0.9]) == [None, None]
+    assert QuantileSketch().summary() == {"count": 0}
+    with pytest.raises(ValueError, match="different accuracy"):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def vapi(analytics, message_type, call_id, user_id=USER_ID, **message):
+    message = {"type": message_type, "call": {"id": call_id}, **message}
+    analytics.on_event({"type": f"vapi.{message_type}", "message": message, "user_id": user_id})
+
+
+def test_a_call_is_rolled_up_per_session_user_and_day():
+    analytics = SessionAnalytics()
+    now_ms = time.time() * 1000
+
+    vapi(analytics, "status-update", "call-1", status="in-progress", timestamp=now_ms)
+    assert analytics.overview()["active_sessions"] == 1
+
+    vapi(analytics, "speech-update", "call-1", role="user", status="stopped", timestamp=now_ms + 1000)
+    vapi(analytics, "speech-update", "call-1", role="assistant", status="started", timestamp=now_ms + 1800)
+    analytics.on_event({"type": "vapi.tool_call", "call_id": "call-1", "user_id": USER_ID,
+                        "name": "capture_photo", "outcome": "timeout", "duration_ms": 900.0})
+    analytics.on_event({"type": "conversation.logged", "user_id": USER_ID,
+                        "log": {"role": "user", "metadata": {"call_id": "call-1"}}})
+    vapi(analytics, "status-update", "call-1", status="ended", endedReason="customer-ended-call",
+         timestamp=now_ms + 60000)
+    # The end-of-call report of the same call must not count it twice
+    vapi(analytics, "end-of-call-report", "call-1", durationSeconds=60, timestamp=now_ms + 61000)
+
+    session = analytics.session_summary("call-1")
+    assert session["ended_reason"] == "customer-ended-call" and not session["active"]
+    assert session["duration_seconds"] == 60.0
+    assert session["turn_latency_ms"]["p50"] == pytest.approx(800, rel=0.01)
+    assert session["tool_outcomes"] == {"timeout": 1}
+    assert session["vision"]["analyses"] == 1
+
+    for rollup in (analytics.overview(), analytics.user_summary(USER_ID)):
+        assert rollup["sessions"] == 1
+        assert rollup["message_count"] == 1
+        assert rollup["tool_calls"] == {"capture_photo": 1}
+    assert analytics.overview()["active_sessions"] == 0
+    assert [s["session_id"] for s in analytics.user_sessions(USER_ID)] == ["call-1"]
+
+
+def test_sessions_without_an_end_are_ended_when_idle(env):
+    env(analytics_session_idle_seconds=60)
+    analytics = SessionAnalytics()
+    vapi(analytics, "status-update", "lost-call", status="in-progress")
+    # Sessions seen only through other events are never counted as active
+    vapi(analytics, "speech-update", "no-status", role="user", status="started")
+    assert analytics.overview()["active_sessions"] == 1
+
+    last_event = time.time() - 120
+    analytics.sessions["lost-call"].last_event_at = last_event
+    overview = analytics.overview()
+    assert overview["active_sessions"] == 0
+    assert overview["sessions"] == 1
+
+    session = analytics.session_summary("lost-call")
+    assert session["ended_reason"] == IDLE_TIMEOUT_REASON
+    assert analytics.sessions["lost-call"].ended_at == last_event
+
+
+def test_analytics_endpoints(client):
+    assert client.get("/api/analytics/overview").status_code == 200
+    assert client.get("/api/analytics/overview", params={"days": 0}).status_code == 422
+    assert client.get("/api/analytics/sessions/unknown-call").status_code == 404
@@ -0,0 +1,65 @@
+"""Benchmark harness: statistics, baseline gating and a short end-to-end run"""
+import asyncio
+
+import pytest
+
+from benchmarks import run
+from benchmarks.harness import compare_to_baseline, load_results, measure, percentile, save_results, summarize
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+    assert percentile([], 95) == 0.0
+
+
+def test_summarize_reports_milliseconds():
+    summary = summarize([0.001, 0.002, 0.003], wall_s=0.5, errors=1)
+    assert summary["ops"] == 3
+    assert summary["errors"] == 1
+    assert summary["throughput"] == 6.0
+    assert summary["p50_ms"] == 2.0
+
+
+def test_measure_counts_failed_operations():
+    async def op(i):
+        if i % 4 == 0:
+            raise RuntimeError("boom")
+
+    summary = asyncio.run(measure(op, iterations=20, concurrency=3))
+    assert summary["ops"] == 15
+    assert summary["errors"] == 5
+
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = {"a": {"p50_ms": 1.0, "p95_ms": 2.0, "throughput": 100.0, "errors": 0}}
+    within = {"a": {"p50_ms": 1.1, "p95_ms": 2.2, "throughput": 90.0, "errors": 0}}
+    slower = {"a": {"p50_ms": 1.5, "p95_ms": 2.0, "throughput": 60.0, "errors": 2}}
+
+    assert compare_to_baseline(within, baseline, threshold=0.15) == []
+    regressions = compare_to_baseline(slower, baseline, threshold=0.15)
+    assert [r.split(" ")[1] for r in regressions] == ["p50_ms", "throughput", "2"]
+    # Scenarios missing from the baseline are not gated
+    assert compare_to_baseline({"b": slower["a"]}, baseline, threshold=0.15) == []
+
+
+def test_run_saves_and_gates_against_a_baseline(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    argv = ["settings_get", "memory_search", "--iterations", "30", "--warmup", "2", "--memories", "20"]
+    assert run.main([*argv, "--save", path]) == 0
+
+    results = load_results(path)
+    assert set(results) == {"settings_get", "memory_search"}
+    assert all(r["errors"] == 0 and r["ops"] == 30 for r in results.values())
+
+    # Against an impossibly fast baseline every scenario regresses
+    fast = str(tmp_path / "fast.json")
+    save_results(fast, {name: {**r, "p50_ms": r["p50_ms"] / 1000} for name, r in results.items()}, {})
+    assert run.main([*argv, "--baseline", fast]) == 1
+
+
+def test_run_rejects_unknown_scenarios():
+    with pytest.raises(SystemExit, match="Unknown scenarios: nope"):
+        run.main(["nope", "--iterations", "1"])
@@ -0,0 +1,110 @@
+"""Continuous camera mode: change-gated frame selection and batched vision calls"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.config import get_settings
+from app.services.frame_stream import FrameDecodeError, FrameStreamService, frame_stream_service, luminance_thumbnail
+from benchmarks.frame_stream import FakeVision, render, texture
+
+USER_ID = "00000000-0000-4000-8000-00000000000b"
+
+
+def stream_service(vision, **settings) -> FrameStreamService:
+    service = FrameStreamService(vision=vision)
+    service.settings = get_settings().model_copy(update=settings)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_only_scene_changes_are_selected_and_analyzed():
+    rng = np.random.default_rng(3)
+    vision = FakeVision(0)
+    service = stream_service(vision, vision_stream_min_interval_seconds=0)
+    first, second = texture(rng), texture(rng)
+
+    selected = [service.add_frame("walk", render(rng, first, t))[2] for t in range(6)]
+    # The first frame sets the reference; jitter, noise and exposure drift do not count as change
+    assert selected == [True] + [False] * 5
+    await service.get("walk").task
+
+    stream, score, cut = service.add_frame("walk", render(rng, second, 6))
+    assert cut and score > service.settings.vision_stream_change_threshold
+    await stream.task
+
+    assert vision.requests == 2
+    assert stream.to_dict()["description"] == "scene 2"
+    assert (stream.frames, stream.selected_frames, stream.frames_analyzed) == (7, 2, 2)
+
+
+@pytest.mark.asyncio
+async def test_frames_selected_during_a_request_are_batched():
+    rng = np.random.default_rng(4)
+    vision = FakeVision(0.05)
+    service = stream_service(vision, vision_stream_min_interval_seconds=0, vision_stream_max_frames=2)
+
+    stream, _, _ = service.add_frame("cuts", render(rng, texture(rng), 0))
+    await asyncio.sleep(0)
+    for t in range(1, 4):
+        service.add_frame("cuts", render(rng, texture(rng), t))
+    # The first frame is in flight; only the newest of the later ones are kept
+    assert len(stream.pending) == 2
+    await stream.task
+
+    assert vision.requests == 2
+    assert vision.images == 3
+    assert service.get_stats()["frames_per_analysis"] == 2.0
+
+
+def test_undecodable_frames_raise():
+    with pytest.raises(FrameDecodeError):
+        luminance_thumbnail(b"not a jpeg")
+    service = FrameStreamService(vision=FakeVision(0))
+    with pytest.raises(FrameDecodeError):
+        service.add_frame("broken", b"\xff\xd8\xff\xe0 truncated")
+    assert service.get("broken") is None
+
+
+@pytest.fixture
+def streams(client, monkeypatch):
+    monkeypatch.setattr(frame_stream_service, "vision", FakeVision(0))
+    monkeypatch.setattr(frame_stream_service, "_streams", type(frame_stream_service._streams)())
+    return client
+
+
+def push(client, session_id, body, content_type="image/jpeg", **kwargs):
+    return client.post(
+        f"/api/vision/stream/{session_id}/frames",
+        content=body,
+        headers={"content-type": content_type},
+        **kwargs,
+    )
+
+
+def test_frame_endpoint_selects_and_reports(streams):
+    frame = render(np.random.default_rng(5), texture(np.random.default_rng(6)), 0)
+
+    response = push(streams, "glasses", frame, params={"user_id": USER_ID})
+    assert response.status_code == 200
+    assert response.json()["selected"] and response.json()["change_score"] == 1.0
+    assert not push(streams, "glasses", frame).json()["selected"]
+
+    status = streams.get("/api/vision/stream/glasses").json()
+    assert (status["frames"], status["selected_frames"], status["user_id"]) == (2, 1, USER_ID)
+    assert streams.delete("/api/vision/stream/glasses").status_code == 200
+    assert streams.get("/api/vision/stream/glasses").status_code == 404
+
+
+def test_frame_endpoint_rejects_bad_frames(streams):
+    max_bytes = get_settings().vision_stream_max_frame_bytes
+
+    assert push(streams, "bad", b"x" * (max_bytes + 1)).status_code == 413
+    # Without a Content-Length the body is cut off at the cap
+    chunks = iter([b"x" * max_bytes, b"x"])
+    assert push(streams, "bad", chunks).status_code == 413
+    assert push(streams, "bad", b"plain text", content_type="text/plain").status_code == 415
+    response = push(streams, "bad", b"not a jpeg")
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid image frame")
+    assert streams.get("/api/vision/stream/bad").status_code == 404
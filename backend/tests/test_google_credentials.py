@@ -0,0 +1,158 @@
+"""Google OAuth credentials: single-flight refresh, unlink on revoke, per-user linking"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+
+from app.services.google_credentials import DEFAULT_ACCOUNT, GoogleCredentialStore, google_credential_store
+from app.services.google_service import GoogleService, google_service
+from benchmarks.google_tokens import credentials
+
+USER_ID = "00000000-0000-4000-8000-00000000000c"
+
+
+@pytest.fixture
+def token_uri(upstream_server):
+    return f"{upstream_server.google_base_url}/token"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_refresh(upstream_server, token_uri):
+    store = GoogleCredentialStore()
+    store.put("account", credentials(token_uri, -60))
+    before = upstream_server.stats["google"]
+
+    results = await asyncio.gather(*(store.get("account") for _ in range(10)))
+
+    assert upstream_server.stats["google"] - before == 1
+    assert {c.token for c in results} == {"fake-token"}
+    assert store.stats["refreshes"] == 1 and store.stats["blocked_calls"] == 10
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_tokens_close_to_expiry_are_served_while_refreshing(upstream_server, token_uri):
+    store = GoogleCredentialStore()
+    store.put("account", credentials(token_uri, 300))
+
+    stale = await store.get("account")
+    assert stale.token == "stale-token"
+    await asyncio.gather(*store._refreshing.values())
+    assert (await store.get("account")).token == "fake-token"
+    await store.close()
+
+
+def failing_refresh(error):
+    def refresh(request):
+        raise error
+
+    return refresh
+
+
+@pytest.mark.asyncio
+async def test_a_revoked_refresh_token_unlinks_the_account(token_uri):
+    store = GoogleCredentialStore()
+    revoked = credentials(token_uri, -60)
+    revoked.refresh = failing_refresh(RefreshError("invalid_grant: Token has been expired or revoked.", retryable=False))
+    store.put("account", revoked)
+
+    with pytest.raises(ValueError, match="no longer valid"):
+        await store.get("account")
+    assert await store.get("account") is None
+    assert store.stats["unlinked"] == 1
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_transient_refresh_errors_keep_the_account_and_back_off(token_uri):
+    store = GoogleCredentialStore()
+    flaky = credentials(token_uri, 300)
+    flaky.refresh = failing_refresh(RefreshError("backend error", retryable=True))
+    store.put("account", flaky)
+
+    await store.get("account")
+    await asyncio.gather(*store._refreshing.values(), return_exceptions=True)
+    assert store._backing_off("account")
+    # Served as-is without another background attempt until the retry delay passes
+    assert await store.get("account") is flaky
+    assert not store._refreshing
+    assert store.stats["refresh_errors"] == 1 and store.stats["unlinked"] == 0
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_accounts_resolve_per_user(env, token_uri):
+    env(google_default_account_fallback=False)
+    service = GoogleService(GoogleCredentialStore())
+    assert await service.resolve_account(USER_ID) is None
+    service.credential_store.put(USER_ID, credentials(token_uri, 3600))
+    assert await service.resolve_account(USER_ID) == USER_ID
+
+    service.settings = service.settings.model_copy(update={"google_default_account_fallback": True})
+    assert await service.resolve_account("someone-else") == DEFAULT_ACCOUNT
+    await service.credential_store.close()
+
+
+class FakeFlow:
+    """OAuth flow whose code exchange succeeds for any code but "bad" """
+
+    def __init__(self, redirect_uri: str, state=None):
+        self.redirect_uri = redirect_uri
+        self.credentials = None
+
+    def authorization_url(self, **kwargs):
+        return "https://accounts.example/auth", None
+
+    def fetch_token(self, code: str):
+        if code == "bad":
+            raise ValueError("invalid_grant")
+        self.credentials = Credentials(
+            token="user-token",
+            refresh_token="user-refresh-token",
+            token_uri="https://oauth2.example/token",
+            client_id="client-id",
+            client_secret="client-secret",
+            expiry=datetime.utcnow() + timedelta(hours=1),
+        )
+
+
+@pytest.fixture
+def oauth(client, env, monkeypatch):
+    env(google_client_id="client-id", google_client_secret="client-secret")
+    monkeypatch.setattr(google_service, "settings", google_service.settings.model_copy(
+        update={"google_client_id": "client-id", "google_client_secret": "client-secret"}
+    ))
+    monkeypatch.setattr(google_service, "_flow", FakeFlow)
+    yield client
+    client.delete(f"/api/google/auth/{USER_ID}")
+
+
+def test_oauth_callback_links_the_users_own_account(oauth):
+    assert oauth.get("/api/google/auth/url", params={"user_id": USER_ID}).status_code == 200
+    state = google_service.oauth_state(USER_ID)
+
+    response = oauth.get("/api/google/auth/callback", params={"code": "auth-code", "state": state})
+    assert response.json() == {"user_id": USER_ID, "authenticated": True}
+    assert google_credential_store._credentials[USER_ID].token == "user-token"
+    assert oauth.get(f"/api/google/auth/status/{USER_ID}").json()["authenticated"]
+
+    oauth.delete(f"/api/google/auth/{USER_ID}")
+    assert not oauth.get(f"/api/google/auth/status/{USER_ID}").json()["authenticated"]
+
+
+def test_oauth_callback_rejects_bad_state_and_codes(oauth, monkeypatch):
+    state = google_service.oauth_state(USER_ID)
+    tampered = state.replace(USER_ID, "00000000-0000-4000-8000-0000000000ff")
+    assert oauth.get("/api/google/auth/callback", params={"code": "c", "state": tampered}).status_code == 400
+    assert oauth.get("/api/google/auth/callback", params={"code": "bad", "state": state}).status_code == 400
+
+    monkeypatch.setattr("app.services.google_service.OAUTH_STATE_TTL_SECONDS", -1)
+    assert oauth.get("/api/google/auth/callback", params={"code": "c", "state": state}).status_code == 400
+    assert not oauth.get(f"/api/google/auth/status/{USER_ID}").json()["authenticated"]
+
+
+def test_oauth_requires_a_client_id(client, env):
+    env(google_client_id="")
+    assert client.get("/api/google/auth/url", params={"user_id": USER_ID}).status_code == 503
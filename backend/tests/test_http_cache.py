@@ -0,0 +1,96 @@
+"""ETag revalidation and response compression for memory endpoints"""
+import gzip
+from uuid import UUID
+
+import brotli
+import pytest
+from starlette.requests import Request
+
+from app.http_cache import is_not_modified, weak_etag
+from benchmarks.scenarios import memory_fixture
+
+USER_ID = UUID("00000000-0000-4000-8000-000000000002")
+
+
+def request_with(if_none_match: str) -> Request:
+    return Request({"type": "http", "headers": [(b"if-none-match", if_none_match.encode())]})
+
+
+@pytest.fixture
+def seeded(client):
+    for payload in memory_fixture(40):
+        client.post(f"/api/memory/{USER_ID}", json=payload).raise_for_status()
+    return client
+
+
+def test_weak_etag_varies_by_version_and_variant():
+    assert weak_etag(1, "context") == weak_etag(1, "context")
+    assert weak_etag(1, "context") != weak_etag(2, "context")
+    assert weak_etag(1, None, 50) != weak_etag(1, None, 10)
+    assert weak_etag(1).startswith('W/"')
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = weak_etag(3, "context")
+    assert is_not_modified(request_with(etag.removeprefix("W/")), etag)
+    assert is_not_modified(request_with(f'"other", {etag}'), etag)
+    assert is_not_modified(request_with("*"), etag)
+    assert not is_not_modified(request_with(weak_etag(4, "context")), etag)
+    assert not is_not_modified(Request({"type": "http", "headers": []}), etag)
+
+
+@pytest.mark.parametrize("path", ["", "/context"])
+def test_revalidation_until_memories_change(seeded, path):
+    url = f"/api/memory/{USER_ID}{path}"
+    first = seeded.get(url)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    cached = seeded.get(url, headers={"if-none-match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    seeded.post(f"/api/memory/{USER_ID}", json={"content": "新しい記憶", "category": "context"})
+    changed = seeded.get(url, headers={"if-none-match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_etag_differs_per_query(seeded):
+    url = f"/api/memory/{USER_ID}"
+    assert seeded.get(url).headers["etag"] != seeded.get(url, params={"limit": 10}).headers["etag"]
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [("gzip, br", "br"), ("br;q=0, gzip", "gzip"), ("gzip", "gzip"), ("identity", None), ("", None)],
+)
+def test_content_encoding_negotiation(seeded, accept_encoding, expected):
+    response = seeded.get(f"/api/memory/{USER_ID}", headers={"accept-encoding": accept_encoding})
+    assert response.headers.get("content-encoding") == expected
+    if expected:
+        assert "accept-encoding" in response.headers["vary"].lower()
+    assert len(response.json()) == 40
+
+
+def test_compressed_body_decodes_to_the_same_json(seeded):
+    url = f"/api/memory/{USER_ID}"
+    plain = seeded.get(url, headers={"accept-encoding": "identity"})
+    for coding, decode in (("br", brotli.decompress), ("gzip", gzip.decompress)):
+        with seeded.stream("GET", url, headers={"accept-encoding": coding}) as response:
+            raw = b"".join(response.iter_raw())
+        assert response.headers["content-encoding"] == coding
+        assert len(raw) < len(plain.content)
+        assert decode(raw) == plain.content
+
+
+def test_small_and_not_modified_responses_are_not_compressed(seeded):
+    small = seeded.get(f"/api/settings/{USER_ID}", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    url = f"/api/memory/{USER_ID}"
+    etag = seeded.get(url).headers["etag"]
+    cached = seeded.get(url, headers={"if-none-match": etag, "accept-encoding": "gzip"})
+    assert cached.status_code == 304
+    assert "content-encoding" not in cached.headers
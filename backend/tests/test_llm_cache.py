@@ -0,0 +1,138 @@
+"""Single-flight LLM response cache"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm_cache import LLMCallLayer, PersistentCacheStore
+
+REQUEST = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "この写真を説明して"}]}
+
+
+class FakeChat:
+    """Stands in for AsyncOpenAI: client.chat.completions.create(**request)"""
+
+    def __init__(self, delay: float = 0.05, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, **request):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15)
+        message = SimpleNamespace(content=f"answer {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def outcomes(layer: LLMCallLayer, feature: str = "vision") -> dict:
+    return {o: v["calls"] for o, v in layer.get_stats()["features"][feature]["outcomes"].items() if v["calls"]}
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_share_one_upstream_call():
+    layer, client = LLMCallLayer(), FakeChat()
+
+    results = await asyncio.gather(*(layer.chat_completion("vision", client, **REQUEST) for _ in range(5)))
+    assert client.calls == 1
+    assert {r["content"] for r in results} == {"answer 1"}
+
+    cached = await layer.chat_completion("vision", client, **REQUEST)
+    assert cached["usage"]["total_tokens"] == 15
+    assert client.calls == 1
+    assert outcomes(layer) == {"miss": 1, "coalesced": 4, "hit": 1}
+
+    other = await layer.chat_completion("vision", client, **{**REQUEST, "temperature": 0})
+    assert other["content"] == "answer 2"
+
+
+@pytest.mark.asyncio
+async def test_cancelling_the_first_caller_keeps_the_call_for_the_others():
+    layer, client = LLMCallLayer(), FakeChat()
+
+    first = asyncio.create_task(layer.chat_completion("vision", client, **REQUEST))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(layer.chat_completion("vision", client, **REQUEST))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert (await second)["content"] == "answer 1"
+    assert (client.calls, client.cancelled) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_once_every_caller_has_gone():
+    layer, client = LLMCallLayer(), FakeChat()
+
+    callers = [asyncio.create_task(layer.chat_completion("vision", client, **REQUEST)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert client.cancelled == 1
+    assert layer.get_stats()["inflight"] == 0
+
+    # The next caller starts a fresh call instead of joining the cancelled one
+    assert (await layer.chat_completion("vision", client, **REQUEST))["content"] == "answer 2"
+
+
+@pytest.mark.asyncio
+async def test_upstream_errors_reach_every_caller_and_are_not_cached():
+    layer, client = LLMCallLayer(), FakeChat(error=RuntimeError("rate limited"))
+
+    results = await asyncio.gather(
+        *(layer.chat_completion("vision", client, **REQUEST) for _ in range(3)), return_exceptions=True
+    )
+    assert [type(r) for r in results] == [RuntimeError] * 3
+    assert client.calls == 1
+
+    client.error = None
+    assert (await layer.chat_completion("vision", client, **REQUEST))["content"] == "answer 2"
+
+
+@pytest.mark.asyncio
+async def test_persistent_store_survives_a_restart(env, tmp_path):
+    env(llm_cache_path=tmp_path / "llm_cache.db", llm_cache_flush_interval_seconds=60)
+    client = FakeChat(delay=0)
+
+    layer = LLMCallLayer()
+    layer.start()
+    await layer.chat_completion("memory_extraction", client, **REQUEST)
+    assert layer.get_stats()["pending_writes"] == 1
+    # Closing writes what the periodic flusher has not reached yet
+    await layer.close()
+
+    restarted = LLMCallLayer()
+    restarted.start()
+    try:
+        result = await restarted.chat_completion("memory_extraction", client, **REQUEST)
+    finally:
+        await restarted.close()
+    assert result["content"] == "answer 1"
+    assert client.calls == 1
+    assert outcomes(restarted, "memory_extraction") == {"hit_persistent": 1}
+
+
+def test_store_drops_expired_entries(tmp_path):
+    store = PersistentCacheStore(str(tmp_path / "llm_cache.db"))
+    store.put("fresh", {"content": "a"}, expires_at=4_000_000_000)
+    store.put("stale", {"content": "b"}, expires_at=1)
+    assert store.flush() == 2
+    assert store.get("fresh") == {"content": "a"}
+    assert store.get("stale") is None
+    assert store.get("missing") is None
+
+    store.put("late", {"content": "c"}, expires_at=4_000_000_000)
+    store.close(store.take_pending())
+    reopened = PersistentCacheStore(str(tmp_path / "llm_cache.db"))
+    assert reopened.get("late") == {"content": "c"}
+    reopened.close()
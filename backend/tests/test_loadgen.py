@@ -0,0 +1,66 @@
+"""Voice-session load generator"""
+import asyncio
+
+import httpx
+
+from benchmarks import loadgen
+from benchmarks.harness import asgi_client
+
+
+def step(requests: dict, concurrency: int, client_errors: dict = None) -> dict:
+    return {"concurrency": concurrency, "requests": requests, "client_errors": client_errors or {}}
+
+
+def test_session_steps_are_accepted_by_the_api(fake_upstreams):
+    from app.main import app
+
+    mix = loadgen.SessionMix(turns_min=2, turns_max=2, think_mean_s=0, camera_prob=1.0, notification_prob=1.0, seed_memories=5)
+
+    async def run():
+        async with asgi_client(app) as client:
+            return await loadgen.run_step(client, concurrency=2, duration=0.2, mix=mix, seed=1)
+
+    result = asyncio.run(run())
+    assert result["sessions"] > 0
+    assert result["client_errors"] == {}
+    assert result["requests"]["errors"] == 0
+    assert {"camera_capture", "notification", "memory_search", "transcript_write"} <= set(result["endpoints"])
+
+
+def test_recorder_separates_client_errors():
+    def respond(request):
+        return httpx.Response({"/bad": 400, "/busy": 429, "/down": 503}.get(request.url.path, 200))
+
+    async def run():
+        rec = loadgen.Recorder()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(respond), base_url="http://t") as client:
+            for path in ("/ok", "/bad", "/bad", "/busy", "/down"):
+                await rec.call(path.strip("/"), client.get(path))
+        return rec
+
+    rec = asyncio.run(run())
+    assert dict(rec.errors) == {"bad": 2, "busy": 1, "down": 1}
+    assert {name: dict(s) for name, s in rec.client_errors.items()} == {"bad": {400: 2}}
+    assert len(rec.latencies["ok"]) == 1
+
+
+def test_client_errors_are_listed_per_step():
+    steps = [
+        step({}, 1),
+        step({}, 4, {"camera_capture": {400: 3}}),
+    ]
+    assert loadgen.client_errors(steps) == ["camera_capture 400 x3 at concurrency 4"]
+
+
+def test_find_knee():
+    def requests(throughput, p95):
+        return {"throughput": throughput, "p95_ms": p95}
+
+    scaling = [step(requests(100, 10), 1), step(requests(190, 11), 2), step(requests(370, 12), 4)]
+    assert loadgen.find_knee(scaling) is None
+
+    flat = [step(requests(100, 10), 1), step(requests(190, 11), 2), step(requests(195, 12), 4)]
+    assert loadgen.find_knee(flat) == 2
+
+    slow = [step(requests(100, 10), 1), step(requests(190, 25), 2)]
+    assert loadgen.find_knee(slow) == 1
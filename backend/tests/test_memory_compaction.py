@@ -0,0 +1,144 @@
+"""Near-duplicate memory compaction"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+
+import numpy as np
+import pytest
+
+from app.services import memory_compaction
+from app.services.memory_compaction import MemoryCompactor, cluster, duplicate_pairs
+
+USER_ID = UUID("00000000-0000-4000-8000-000000000007")
+
+
+def test_cluster_joins_connected_pairs():
+    pairs = [(1, 0, 0.9), (4, 3, 0.95), (5, 4, 0.93), (3, 5, 0.91)]
+    assert sorted(cluster(7, pairs)) == [[0, 1], [3, 4, 5]]
+    # Components do not depend on pair order
+    assert sorted(cluster(7, list(reversed(pairs)))) == [[0, 1], [3, 4, 5]]
+    # Chains are transitive: 0-1 and 1-2 put 0 and 2 together
+    assert cluster(3, [(1, 0, 0.9), (2, 1, 0.9)]) == [[0, 1, 2]]
+    assert cluster(4, []) == []
+
+
+@pytest.mark.parametrize("new_start", [0, 5, 23])
+def test_tiled_pairs_match_a_full_comparison(new_start):
+    rng = np.random.default_rng(1)
+    base = rng.normal(size=(6, 16))
+    vectors = base[rng.integers(0, 6, size=30)] + rng.normal(scale=0.05, size=(30, 16))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    sims = vectors @ vectors.T
+    expected = {(i, j) for i in range(new_start, 30) for j in range(i) if sims[i, j] >= 0.95}
+    found = duplicate_pairs(vectors, new_start, 0.95, block_rows=4)
+    assert {(i, j) for i, j, _ in found} == expected
+    assert expected  # the data does contain near-duplicates
+
+
+class Memories:
+    """Memories with hand-made embeddings and an in-memory delete"""
+
+    def __init__(self, monkeypatch):
+        self.items = []
+        self.vectors = {}
+        self.fail_embeddings = False
+        monkeypatch.setattr(memory_compaction.memory_service, "create_embeddings", self.embed)
+
+    def add(self, content, vector, category="preference", age_days=0):
+        memory = SimpleNamespace(
+            id=uuid4(), content=content, category=category,
+            created_at=datetime(2024, 1, 1) + timedelta(days=age_days),
+        )
+        self.items.append(memory)
+        self.vectors[content] = vector
+        return memory
+
+    async def embed(self, texts):
+        return [] if self.fail_embeddings else [self.vectors[t] for t in texts]
+
+    async def remove(self, user_id, memory_id):
+        before = len(self.items)
+        self.items = [m for m in self.items if m.id != memory_id]
+        return len(self.items) < before
+
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_the_most_detailed_memory(monkeypatch):
+    memories = Memories(monkeypatch)
+    detailed = memories.add("浅煎りのエチオピアのコーヒーが好き", [1.0, 0.0, 0.0])
+    memories.add("コーヒーが好き", [0.99, 0.14, 0.0])
+    memories.add("コーヒーが好き", [1.0, 0.0, 0.0], age_days=1)
+    memories.add("ランニングが趣味", [0.0, 1.0, 0.0])
+    # Same vector, other category: never a duplicate
+    memories.add("コーヒーの話をした", [1.0, 0.0, 0.0], category="context")
+
+    compactor = MemoryCompactor()
+    result = await compactor.compact(USER_ID, list(memories.items), memories.remove)
+
+    assert [r["content"] for r in result["removed"]] == ["コーヒーが好き", "コーヒーが好き"]
+    assert {r["action"] for r in result["removed"]} == {"drop"}
+    assert {r["survivor_id"] for r in result["removed"]} == {str(detailed.id)}
+    assert [r["match"] for r in result["removed"]] == ["duplicate", "duplicate"]
+    assert len(memories.items) == 3
+    assert [r["content"] for r in await compactor.get_audit(USER_ID)] == ["コーヒーが好き", "コーヒーが好き"]
+
+    # Nothing new since the last run: no comparisons at all
+    again = await compactor.compact(USER_ID, list(memories.items), memories.remove)
+    assert (again["new"], again["compared"], again["removed"]) == (0, 0, [])
+
+
+@pytest.mark.asyncio
+async def test_paraphrases_and_chains(monkeypatch):
+    memories = Memories(monkeypatch)
+    memories.add("週末は京都でカフェ巡りをする", [1.0, 0.0])
+    memories.add("週末は京都のカフェへ行く", [0.94, 0.34])
+    # Similar to the paraphrase but not to the survivor: kept
+    memories.add("週末は大阪へ行く", [0.77, 0.64])
+
+    compactor = MemoryCompactor()
+    compactor.threshold, compactor.exact_threshold = 0.92, 0.97
+    plan = await compactor.compact(USER_ID, list(memories.items), memories.remove, dry_run=True)
+    assert [(r["content"], r["match"]) for r in plan["removed"]] == [("週末は京都のカフェへ行く", "paraphrase")]
+    # A dry run removes nothing and leaves the memories uncompacted
+    assert len(memories.items) == 3
+    assert (await compactor.compact(USER_ID, list(memories.items), memories.remove))["new"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_embeddings_are_retried_on_the_next_run(monkeypatch):
+    memories = Memories(monkeypatch)
+    memories.add("コーヒーが好き", [1.0, 0.0])
+    memories.add("コーヒーが大好き", [1.0, 0.01])
+
+    compactor = MemoryCompactor()
+    memories.fail_embeddings = True
+    failed = await compactor.compact(USER_ID, list(memories.items), memories.remove)
+    assert (failed["new"], failed["removed"]) == (0, [])
+
+    memories.fail_embeddings = False
+    retried = await compactor.compact(USER_ID, list(memories.items), memories.remove)
+    assert [r["content"] for r in retried["removed"]] == ["コーヒーが好き"]
+
+
+@pytest.mark.asyncio
+async def test_memories_deleted_meanwhile_are_not_reported(monkeypatch):
+    memories = Memories(monkeypatch)
+    memories.add("コーヒーが大好きです", [1.0, 0.0])
+    memories.add("コーヒーが好き", [1.0, 0.0])
+
+    async def already_gone(user_id, memory_id):
+        return False
+
+    compactor = MemoryCompactor()
+    result = await compactor.compact(USER_ID, list(memories.items), already_gone)
+    assert result["removed"] == []
+    assert await compactor.get_audit(USER_ID) == []
+    assert compactor.stats["dropped"] == 0
+
+
+def test_compact_endpoint(client):
+    response = client.post(f"/api/memory/{USER_ID}/compact", params={"dry_run": True})
+    assert response.status_code == 200
+    assert response.json()["removed"] == []
+    assert client.get(f"/api/memory/{USER_ID}/compaction-log", params={"limit": 1000}).status_code == 422
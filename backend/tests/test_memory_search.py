@@ -0,0 +1,82 @@
+"""Memory search: keyword ranking fused with pgvector similarity"""
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import pytest
+
+from app.routers import memory
+from app.services.vector_store import VectorMemoryStore, to_vector_literal
+
+USER_ID = UUID("00000000-0000-4000-8000-000000000006")
+
+MEMORIES = [
+    {"content": "浅煎りのコーヒーが好き", "category": "preference"},
+    {"content": "コーヒー豆を京都で買った", "category": "context"},
+    {"content": "毎朝ランニングしている", "category": "preference"},
+]
+
+
+@pytest.fixture
+def seeded(client):
+    for payload in MEMORIES:
+        client.post(f"/api/memory/{USER_ID}", json=payload).raise_for_status()
+    return client
+
+
+def search(client, **params):
+    response = client.post(f"/api/memory/{USER_ID}/search", params=params)
+    assert response.status_code == 200, response.text
+    return [m["content"] for m in response.json()]
+
+
+def test_keyword_search_with_category_filter(seeded):
+    assert set(search(seeded, query="コーヒー")) == {MEMORIES[0]["content"], MEMORIES[1]["content"]}
+    assert search(seeded, query="コーヒー", category="context") == [MEMORIES[1]["content"]]
+    assert search(seeded, query="コーヒー", category="profile") == []
+
+
+def test_invalid_search_parameters_are_rejected(seeded):
+    url = f"/api/memory/{USER_ID}/search"
+    assert seeded.post(url, params={"query": "x", "category": "secret"}).status_code == 422
+    assert seeded.post(url, params={"query": "x", "limit": 100}).status_code == 422
+
+
+def test_vector_matches_are_fused_with_keyword_matches(seeded, monkeypatch):
+    vector_only = {
+        "id": uuid4(), "user_id": USER_ID, "content": "カフェ巡りが趣味", "category": "preference",
+        "created_at": datetime(2024, 5, 1), "distance": 0.1,
+    }
+    keyword_hit = next(m for m in memory.memory_store[str(USER_ID)] if m.content == MEMORIES[0]["content"])
+    calls = []
+
+    async def create_embedding(text):
+        return [0.1, 0.2]
+
+    async def vector_search(user_id, embedding, limit, category):
+        calls.append((user_id, limit, category))
+        return [vector_only, {**keyword_hit.model_dump(), "distance": 0.2}]
+
+    monkeypatch.setattr(memory.vector_store, "enabled", True)
+    monkeypatch.setattr(memory.vector_store, "search", vector_search)
+    monkeypatch.setattr(memory.memory_service, "create_embedding", create_embedding)
+
+    results = search(seeded, query="コーヒー", category="preference", limit=2)
+    # Found by both rankings first, then the best vector-only match
+    assert results == [MEMORIES[0]["content"], "カフェ巡りが趣味"]
+    assert calls == [(USER_ID, 8, "preference")]
+
+
+def test_vector_literal_and_category_predicate():
+    assert to_vector_literal([0.5, -1, 1e-9]) == "[0.5,-1,1e-09]"
+    store = VectorMemoryStore()
+    assert "AND category = 'context'" in store._query("context")
+    assert "category =" not in store._query(None)
+
+
+@pytest.mark.asyncio
+async def test_vector_store_rejects_bad_input_before_querying():
+    store = VectorMemoryStore()
+    with pytest.raises(ValueError, match="Unknown category"):
+        await store.search(USER_ID, [0.1], category="x'; DROP TABLE memories; --")
+    with pytest.raises(RuntimeError, match="not started"):
+        await store.search(USER_ID, [0.1], exact=True)
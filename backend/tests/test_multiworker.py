@@ -0,0 +1,25 @@
+"""Multi-worker consistency checks (benchmarks/multiworker.py) under pytest
+
+The shared-state run needs a scratch Redis database in REDIS_URL and is
+skipped without one; the single-worker run covers the in-memory stores.
+"""
+import os
+
+import pytest
+
+from benchmarks import multiworker
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+
+def run_checks(*argv: str) -> list:
+    return multiworker.run(multiworker.parse_args([*argv, "--rounds", "10"])).failures
+
+
+def test_single_worker():
+    assert run_checks("--workers", "1", "--redis-url", "") == []
+
+
+@pytest.mark.skipif(not REDIS_URL, reason="needs a scratch Redis database in REDIS_URL")
+def test_workers_share_state():
+    assert run_checks("--workers", "4", "--redis-url", REDIS_URL) == []
@@ -0,0 +1,63 @@
+"""Sampling profiler, slow-request recorder and their admin endpoints"""
+import sys
+import time
+from collections import Counter
+
+from app.services.profiler_service import SlowRequestRecorder, collapse_stack, format_collapsed
+
+
+def test_collapse_stack_is_root_first():
+    def inner():
+        return collapse_stack(sys._getframe())
+
+    def outer():
+        return inner()
+
+    frames = outer().split(";")
+    names = [frame.split(" (")[0] for frame in frames]
+    assert names[-2:] == [
+        "test_collapse_stack_is_root_first.<locals>.outer",
+        "test_collapse_stack_is_root_first.<locals>.inner",
+    ]
+    assert frames[-1].endswith(")") and "test_profiler.py:" in frames[-1]
+
+
+def test_format_collapsed_orders_by_count():
+    samples = Counter({"a;b": 1, "a;c": 3})
+    assert format_collapsed(samples) == "a;c 3\na;b 1\n"
+
+
+def test_slow_request_recorder_keeps_only_slow_requests():
+    recorder = SlowRequestRecorder()
+    recorder.threshold = 0.05
+
+    recorder.end(recorder.begin("GET", "/fast"))
+    token = recorder.begin("GET", "/slow", "q=1")
+    recorder.response_started(token, 200)
+    time.sleep(0.06)
+    recorder.end(token)
+
+    records = recorder.get_records()
+    assert [r["path"] for r in records] == ["/slow"]
+    assert records[0]["status"] == 200
+    assert records[0]["timings_ms"]["total"] >= 50
+
+
+def test_admin_endpoints_need_the_admin_key(client, env):
+    env(admin_api_key="")
+    assert client.get("/api/admin/slow-requests").status_code == 403
+
+    env(admin_api_key="secret")
+    assert client.get("/api/admin/slow-requests").status_code == 401
+    assert client.get("/api/admin/slow-requests", headers={"x-admin-key": "wrong"}).status_code == 401
+    assert client.get("/api/admin/slow-requests", headers={"x-admin-key": "secret"}).status_code == 200
+
+
+def test_profile_rejects_too_long_runs(client, env):
+    env(admin_api_key="secret", profiler_max_seconds=1)
+    headers = {"x-admin-key": "secret"}
+    assert client.get("/api/admin/profile", params={"seconds": 5}, headers=headers).status_code == 400
+
+    response = client.get("/api/admin/profile", params={"seconds": 0.05, "format": "json"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["samples"] > 0
@@ -0,0 +1,107 @@
+"""Chunked, resumable recording upload"""
+import hashlib
+import os
+
+import pytest
+
+from app.services.recording_service import WRITE_BUFFER_BYTES, recording_service
+
+USER_ID = "00000000-0000-4000-8000-000000000004"
+OTHER_USER_ID = "00000000-0000-4000-8000-000000000005"
+
+
+@pytest.fixture
+def recordings(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(recording_service, "storage_dir", str(tmp_path))
+    monkeypatch.setattr(recording_service, "_sessions", {})
+    return client
+
+
+def create(client, content_type="audio/webm") -> str:
+    response = client.post(f"/api/recording/{USER_ID}", json={"content_type": content_type})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def put_chunk(client, recording_id, index, offset, data):
+    return client.put(
+        f"/api/recording/{USER_ID}/{recording_id}/chunks/{index}",
+        params={"offset": offset},
+        content=data,
+        headers={"content-type": "application/octet-stream"},
+    )
+
+
+def test_upload_resume_and_download(recordings, tmp_path):
+    chunks = [os.urandom(WRITE_BUFFER_BYTES + 17), b"second", os.urandom(1000)]
+    recording_id = create(recordings, "audio/mp4")
+
+    offset = 0
+    for index, chunk in enumerate(chunks[:2]):
+        status = put_chunk(recordings, recording_id, index, offset, chunk).json()
+        offset += len(chunk)
+        assert (status["next_index"], status["size"]) == (index + 1, offset)
+
+    # A restarted worker rebuilds the session (and running hash) from disk
+    recording_service._sessions.clear()
+    status = recordings.get(f"/api/recording/{USER_ID}/{recording_id}").json()
+    assert (status["next_index"], status["size"]) == (2, offset)
+
+    # A retransmitted chunk whose response was lost is acknowledged, not appended
+    assert put_chunk(recordings, recording_id, 1, len(chunks[0]), b"second").json()["size"] == offset
+    put_chunk(recordings, recording_id, 2, offset, chunks[2]).raise_for_status()
+
+    audio = b"".join(chunks)
+    done = recordings.post(
+        f"/api/recording/{USER_ID}/{recording_id}/complete", json={"sha256": hashlib.sha256(audio).hexdigest()}
+    ).json()
+    assert done["completed"] and done["size"] == len(audio)
+
+    download = recordings.get(f"/api/recording/{USER_ID}/{recording_id}/audio")
+    assert download.content == audio
+    assert f"recording-{recording_id}.m4a" in download.headers["content-disposition"]
+
+    assert recordings.delete(f"/api/recording/{USER_ID}/{recording_id}").status_code == 200
+    assert os.listdir(tmp_path) == []
+
+
+def test_out_of_order_chunks_are_rejected(recordings):
+    recording_id = create(recordings)
+    put_chunk(recordings, recording_id, 0, 0, b"abc").raise_for_status()
+
+    skipped = put_chunk(recordings, recording_id, 2, 3, b"def")
+    assert skipped.status_code == 409
+    assert skipped.json()["detail"] == "Expected chunk 1 at offset 3"
+    assert put_chunk(recordings, recording_id, 1, 0, b"def").status_code == 409
+
+
+def test_checksum_mismatch_keeps_the_upload_open(recordings):
+    recording_id = create(recordings)
+    put_chunk(recordings, recording_id, 0, 0, b"audio").raise_for_status()
+    url = f"/api/recording/{USER_ID}/{recording_id}"
+
+    wrong = recordings.post(f"{url}/complete", json={"sha256": hashlib.sha256(b"other").hexdigest()})
+    assert wrong.status_code == 409
+    assert recordings.get(f"{url}/audio").status_code == 409
+
+    put_chunk(recordings, recording_id, 1, 5, b"!").raise_for_status()
+    right = recordings.post(f"{url}/complete", json={"sha256": hashlib.sha256(b"audio!").hexdigest()})
+    assert right.json()["completed"]
+    assert put_chunk(recordings, recording_id, 2, 6, b"more").status_code == 409
+
+
+def test_oversized_chunk_is_rejected_and_can_be_resent(recordings, monkeypatch):
+    settings = recording_service.settings.model_copy(update={"recording_max_chunk_bytes": 1024})
+    monkeypatch.setattr(recording_service, "settings", settings)
+    recording_id = create(recordings)
+
+    assert put_chunk(recordings, recording_id, 0, 0, b"x" * 2048).status_code == 413
+    status = put_chunk(recordings, recording_id, 0, 0, b"x" * 1024).json()
+    assert (status["next_index"], status["size"]) == (1, 1024)
+
+
+def test_recordings_are_private_to_their_user(recordings):
+    recording_id = create(recordings)
+    assert recordings.get(f"/api/recording/{OTHER_USER_ID}/{recording_id}").status_code == 404
+    assert recordings.get(f"/api/recording/{USER_ID}/..%2Fetc").status_code == 404
+    assert recordings.get(f"/api/recording/{USER_ID}/{'0' * 32}").status_code == 404
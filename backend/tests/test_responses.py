@@ -0,0 +1,47 @@
+"""Fast JSON serialization path"""
+import json
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+from fastapi.responses import JSONResponse
+
+from app import responses
+from app.responses import FastJSONResponse, dumps_bytes, loads_bytes, preserialize
+
+PAYLOAD = {"content": "京都でおすすめのカフェ", "score": 0.5, "tags": ["a", None, True], "nested": {"n": 1}}
+USER_ID = UUID("00000000-0000-4000-8000-000000000001")
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(responses, "orjson", None)
+    return request.param
+
+
+def test_fast_response_matches_the_default_encoder(encoder):
+    assert FastJSONResponse(PAYLOAD).body == JSONResponse(PAYLOAD).body
+    assert loads_bytes(dumps_bytes(PAYLOAD)) == PAYLOAD
+
+
+def test_preserialize_encodes_models_and_datetimes():
+    from app.routers.settings import DEFAULT_SETTINGS
+
+    body = preserialize({"settings": DEFAULT_SETTINGS, "at": datetime(2024, 1, 2, 3, 4, 5)})
+    assert json.loads(body) == {"settings": DEFAULT_SETTINGS.model_dump(), "at": "2024-01-02T03:04:05"}
+
+
+def test_default_settings_are_spliced_into_valid_json(client):
+    response = client.get(f"/api/settings/{USER_ID}")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user_id"] == str(USER_ID)
+    assert body["system_prompt"] == "あなたは親切なAIアシスタントです。"
+
+
+def test_invalid_input_raises(encoder):
+    with pytest.raises(ValueError):
+        loads_bytes(b'{"content": ')
+    with pytest.raises(TypeError):
+        dumps_bytes({"at": object()})
@@ -0,0 +1,68 @@
+"""Cached session bootstrap (system prompt assembly)"""
+from uuid import UUID
+
+import pytest
+
+from app.routers import session
+from app.routers.settings import DEFAULT_SETTINGS
+
+USER_ID = UUID("00000000-0000-4000-8000-000000000008")
+URL = f"/api/session/{USER_ID}/bootstrap"
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count system prompt assemblies (cache misses)"""
+    calls = []
+    assemble = session.assemble_system_prompt
+
+    def counting(studio_prompt, context):
+        calls.append(studio_prompt)
+        return assemble(studio_prompt, context)
+
+    monkeypatch.setattr(session, "assemble_system_prompt", counting)
+    return calls
+
+
+def test_bootstrap_assembles_prompt_and_overrides(client):
+    client.put(f"/api/settings/{USER_ID}", json={"system_prompt": "あなたは旅行ガイドです。", "speed": 1.2})
+    client.post(f"/api/memory/{USER_ID}", json={"content": "京都が好き", "category": "preference"})
+
+    body = client.get(URL).json()
+    assert body["system_prompt"].startswith("あなたは旅行ガイドです。\n\n")
+    assert "京都が好き" in body["system_prompt"]
+    assert body["speed"] == 1.2
+    assert body["assistant_overrides"]["metadata"] == {"user_id": str(USER_ID)}
+
+
+def test_bootstrap_is_rebuilt_only_when_inputs_change(client, builds):
+    first = client.get(URL)
+    assert first.json()["system_prompt"] == DEFAULT_SETTINGS.system_prompt
+    etag = first.headers["etag"]
+
+    assert client.get(URL).content == first.content
+    assert client.get(URL, headers={"if-none-match": etag}).status_code == 304
+    assert len(builds) == 1
+
+    client.post(f"/api/memory/{USER_ID}", json={"content": "犬を飼っている", "category": "profile"})
+    after_memory = client.get(URL, headers={"if-none-match": etag})
+    assert after_memory.status_code == 200
+    assert "犬を飼っている" in after_memory.json()["system_prompt"]
+
+    client.put(f"/api/settings/{USER_ID}", json={"system_prompt": "簡潔に答えてください。"})
+    after_settings = client.get(URL, headers={"if-none-match": after_memory.headers["etag"]})
+    assert after_settings.json()["system_prompt"].startswith("簡潔に答えてください。")
+    assert len(builds) == 3
+
+
+def test_deleted_settings_fall_back_to_the_default_prompt(client):
+    client.put(f"/api/settings/{USER_ID}", json={"system_prompt": "カスタム"})
+    assert client.get(URL).json()["system_prompt"] == "カスタム"
+
+    assert client.delete(f"/api/settings/{USER_ID}").status_code == 200
+    assert client.get(URL).json()["system_prompt"] == DEFAULT_SETTINGS.system_prompt
+    assert client.delete(f"/api/settings/{USER_ID}").status_code == 404
+
+
+def test_bootstrap_rejects_malformed_user_ids(client):
+    assert client.get("/api/session/not-a-user/bootstrap").status_code == 422
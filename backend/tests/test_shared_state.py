@@ -0,0 +1,92 @@
+"""Cross-worker event bus and Redis-backed shared state
+
+The Redis cases need a scratch database in REDIS_URL and are skipped
+without one (see test_multiworker.py for the end-to-end checks).
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from app.services.event_bus import EventBus
+from app.services.shared_state import SharedState
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+needs_redis = pytest.mark.skipif(not REDIS_URL, reason="needs a scratch Redis database in REDIS_URL")
+
+
+def test_remote_events_skip_local_only_handlers():
+    bus, seen = EventBus(), []
+    bus.subscribe("memory.created", lambda e: seen.append(("index", e["id"])))
+    bus.subscribe("memory.created", lambda e: seen.append(("embed", e["id"])), local_only=True)
+
+    bus.deliver("memory.created", {"id": 1})
+    bus.deliver("memory.created", {"id": 2}, remote=True)
+    assert seen == [("index", 1), ("embed", 1), ("index", 2)]
+
+
+def test_publish_forwards_to_other_workers_and_tolerates_failures():
+    bus, forwarded, seen = EventBus(), [], []
+
+    def broken_forwarder(event_type, payload):
+        raise ConnectionError("redis down")
+
+    bus.subscribe("*", lambda e: seen.append(e["type"]))
+    bus.subscribe("*", lambda e: 1 / 0)
+    bus.set_forwarder(lambda event_type, payload: forwarded.append(event_type))
+    bus.publish("vapi.tool_call", {})
+    assert forwarded == ["vapi.tool_call"]
+
+    # Neither a failing forwarder nor a failing handler stops local delivery
+    bus.set_forwarder(broken_forwarder)
+    bus.publish("recording.start", {})
+    assert seen == ["vapi.tool_call", "recording.start"]
+
+
+@pytest.mark.asyncio
+async def test_async_handlers_are_drained():
+    bus, seen = EventBus(), []
+
+    async def handler(event):
+        await asyncio.sleep(0.01)
+        seen.append(event["n"])
+
+    bus.subscribe("tick", handler)
+    bus.subscribe("tick", handler)  # already subscribed: no duplicate delivery
+    for n in range(3):
+        bus.publish("tick", {"n": n})
+    assert seen == []
+    await bus.drain()
+    assert sorted(seen) == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_disabled_shared_state(env):
+    env(redis_url="")
+    state = SharedState()
+    await state.start()
+    assert not state.enabled and state.connected
+    with pytest.raises(RuntimeError, match="not started"):
+        await state.get("settings", "user")
+
+
+@needs_redis
+@pytest.mark.asyncio
+async def test_concurrent_updates_are_not_lost(env):
+    env(redis_url=REDIS_URL, redis_key_prefix=f"test-{uuid.uuid4().hex[:8]}")
+    state = SharedState()
+    await state.start()
+    try:
+        def increment(value):
+            return str(int(value or 0) + 1).encode()
+
+        results = await asyncio.gather(*(state.update("counter", "k", increment) for _ in range(20)))
+        assert await state.get("counter", "k") == b"20"
+        assert sorted(version for _, version in results) == list(range(1, 21))
+        assert await state.get_version("counter", "k") == 20
+    finally:
+        keys = await state.redis.keys(f"{state.prefix}:*")
+        if keys:
+            await state.redis.delete(*keys)
+        await state.close()
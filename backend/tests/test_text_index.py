@@ -0,0 +1,138 @@
+"""Bigram inverted index, BM25 ranking and fusion"""
+import asyncio
+import random
+from uuid import UUID
+
+import pytest
+
+from app.services.text_index import MEMORY, BigramIndex, TextIndex, bigrams, normalize, reciprocal_rank_fusion
+
+USER_ID = UUID("00000000-0000-4000-8000-000000000009")
+
+DOCS = {
+    "a": "来週の金曜日に京都へ旅行する",
+    "b": "京都のカフェでコーヒーを飲んだ",
+    "c": "ｺｰﾋｰ豆をＡＭＡＺＯＮで注文した",
+    "d": "毎朝コーヒーを二杯飲む。コーヒーが大好き",
+    "e": "English notes about Coffee",
+}
+
+
+def build(docs=DOCS) -> BigramIndex:
+    index = BigramIndex()
+    for ref, text in docs.items():
+        index.add(ref, text, {"ref": ref})
+    return index
+
+
+def refs(hits) -> list:
+    return [ref for ref, _, _ in hits]
+
+
+def test_normalization_and_bigrams():
+    assert normalize("ｺｰﾋｰ ＡＭＡＺＯＮ") == "コーヒー amazon"
+    assert bigrams("京都 カフェ") == ["京都", "カフ", "フェ"]
+
+
+def test_search_matches_substrings_of_every_term():
+    index = build()
+    assert sorted(refs(index.search("コーヒー"))) == ["b", "c", "d"]
+    assert refs(index.search("京都 コーヒー")) == ["b"]
+    assert refs(index.search("amazon")) == ["c"]
+    assert refs(index.search("COFFEE")) == ["e"]
+    # Single characters have no bigram and are matched by a scan
+    assert sorted(refs(index.search("豆"))) == ["c"]
+    assert index.search("存在しない") == []
+    assert index.search("   ") == []
+
+
+def test_bm25_prefers_frequent_terms_in_short_docs():
+    index = build()
+    assert refs(index.search("コーヒー"))[0] == "d"
+    # Scores do not depend on the order the terms are given in
+    assert index.search("京都 コーヒー") == index.search("コーヒー 京都")
+
+
+def test_filtered_search_keeps_corpus_wide_scores():
+    index = build()
+    everything = {ref: score for ref, score, _ in index.search("コーヒー")}
+    filtered = index.search("コーヒー", where=lambda payload: payload["ref"] != "d")
+    assert refs(filtered) == [ref for ref in sorted(everything, key=everything.get, reverse=True) if ref != "d"]
+    assert all(score == everything[ref] for ref, score, _ in filtered)
+
+
+def test_results_match_a_brute_force_scan_through_removals_and_rebuilds():
+    rng = random.Random(3)
+    alphabet = "京都カフェコーヒー旅行予定"
+    docs = {str(i): "".join(rng.choice(alphabet) for _ in range(rng.randint(2, 12))) for i in range(400)}
+    index = build(docs)
+    for ref in rng.sample(sorted(docs), 150):
+        assert index.remove(ref)
+        del docs[ref]
+    assert not index.remove("missing")
+    assert index.deleted < 150  # tombstones were compacted by a rebuild
+
+    for query in ("京都", "カフェ 予定", "コー", "行予", "都"):
+        expected = {ref for ref, text in docs.items() if all(t in text for t in query.split())}
+        assert set(refs(index.search(query, limit=1000))) == expected
+    assert len(index) == len(docs)
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert [ref for ref, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_searches_share_one_load():
+    text_index, loads = TextIndex(), []
+
+    async def loader(user_id):
+        loads.append(user_id)
+        await asyncio.sleep(0.01)
+        return [(ref, text, None) for ref, text in DOCS.items()]
+
+    indexes = await asyncio.gather(*(text_index.get(USER_ID, MEMORY, loader) for _ in range(5)))
+    assert len(loads) == 1
+    assert all(index is indexes[0] for index in indexes)
+
+
+@pytest.mark.asyncio
+async def test_changes_during_a_load_are_kept():
+    text_index = TextIndex()
+    snapshot_taken = asyncio.Event()
+    release = asyncio.Event()
+
+    async def loader(user_id):
+        snapshot = [(ref, text, None) for ref, text in DOCS.items()]
+        snapshot_taken.set()
+        await release.wait()
+        return snapshot
+
+    loading = asyncio.create_task(text_index.get(USER_ID, MEMORY, loader))
+    await snapshot_taken.wait()
+    # Published after the loader read its snapshot
+    text_index.on_memory_deleted({"user_id": str(USER_ID), "memory_id": "b"})
+    text_index.add(str(USER_ID), MEMORY, "f", "京都で抹茶を飲んだ")
+    release.set()
+    index = await loading
+
+    assert sorted(refs(index.search("京都"))) == ["a", "f"]
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_retried():
+    text_index, attempts = TextIndex(), []
+
+    async def loader(user_id):
+        attempts.append(user_id)
+        if len(attempts) == 1:
+            raise ConnectionError("database unavailable")
+        return [("a", DOCS["a"], None)]
+
+    with pytest.raises(ConnectionError):
+        await text_index.get(USER_ID, MEMORY, loader)
+    assert text_index.get_stats()["indexes"] == 0
+    index = await text_index.get(USER_ID, MEMORY, loader)
+    assert refs(index.search("京都")) == ["a"]
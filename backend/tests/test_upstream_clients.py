@@ -0,0 +1,82 @@
+"""Shared, pooled upstream clients"""
+import threading
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+from app.services.memory_service import memory_service
+from app.services.upstream_clients import UpstreamClients, upstream_clients
+from app.services.vapi_service import vapi_service
+from app.services.vision_service import vision_service
+
+
+def counting_transport(status_code: int = 404):
+    seen = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        return httpx.Response(status_code, json={})
+
+    return httpx.MockTransport(respond), seen
+
+
+def test_services_share_the_registry_clients():
+    assert vision_service.client is upstream_clients.openai
+    assert memory_service.client is upstream_clients.openai
+    assert vapi_service.client is upstream_clients.vapi
+
+
+def test_clients_are_built_once_and_never_retry():
+    clients = UpstreamClients()
+    built = []
+
+    def build():
+        built.append(clients.openai)
+
+    threads = [threading.Thread(target=build) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(client) for client in built}) == 1
+    # Retries would hide 429s from the admission controller
+    assert clients.openai.max_retries == 0
+    assert str(clients.vapi.base_url).startswith("https://api.vapi.ai")
+
+
+@pytest.mark.asyncio
+async def test_close_releases_owned_clients_only():
+    clients = UpstreamClients()
+    owned = clients.http
+    external = httpx.AsyncClient()
+    clients.override(vapi=external)
+
+    await clients.close()
+    assert owned.is_closed
+    assert not external.is_closed
+    assert clients.vapi is external
+    # Owned clients are rebuilt on next use
+    assert clients.http is not owned and not clients.http.is_closed
+    await external.aclose()
+    await clients.close()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_connections_and_tolerates_errors(env):
+    env(upstream_warmup_connections=2)
+    clients = UpstreamClients()
+    openai_transport, openai_seen = counting_transport(404)
+    clients.override(
+        openai=AsyncOpenAI(
+            api_key="test", base_url="http://openai.test/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=openai_transport),
+        ),
+        vapi=httpx.AsyncClient(transport=httpx.MockTransport(lambda request: 1 / 0), base_url="http://vapi.test"),
+    )
+
+    # Error statuses and a failing upstream are logged, not raised
+    await clients.start()
+    await clients.wait_warm()
+    assert openai_seen == ["/v1/models", "/v1/models"]
+    await clients.close()
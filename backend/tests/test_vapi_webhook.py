@@ -0,0 +1,118 @@
+"""VAPI tool-call webhook: auth, dispatch, deadlines and fallbacks"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.routers import vapi_webhook
+from app.routers.vapi_webhook import FALLBACK_DEFAULT, GOOGLE_NOT_LINKED, ToolSpec
+
+USER_ID = "00000000-0000-4000-8000-000000000003"
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def webhook(client, env):
+    env(vapi_server_secret=SECRET)
+
+    def post(*tool_calls, call=None):
+        message = {
+            "type": "tool-calls",
+            "call": call or {"id": "call-1", "metadata": {"user_id": USER_ID}},
+            "toolCallList": list(tool_calls),
+        }
+        response = client.post("/api/vapi/webhook", json={"message": message}, headers={"x-vapi-secret": SECRET})
+        assert response.status_code == 200
+        return response.json()["results"]
+
+    return post
+
+
+def tool_call(name: str, arguments, call_id: str = "tc-1") -> dict:
+    return {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+
+
+def test_webhook_requires_the_server_secret(client, env):
+    body = {"message": {"type": "status-update"}}
+    env(vapi_server_secret="")
+    assert client.post("/api/vapi/webhook", json=body).status_code == 503
+
+    env(vapi_server_secret=SECRET)
+    assert client.post("/api/vapi/webhook", json=body).status_code == 401
+    assert client.post("/api/vapi/webhook", json=body, headers={"x-vapi-secret": "wrong"}).status_code == 401
+    assert client.post("/api/vapi/webhook", json=body, headers={"x-vapi-secret": SECRET}).json() == {}
+
+    response = client.post("/api/vapi/webhook", content=b"{not json", headers={"x-vapi-secret": SECRET})
+    assert response.status_code == 400
+
+
+def test_memory_tools_round_trip(webhook):
+    saved = webhook(tool_call("save_memory", json.dumps({"content": "京都の抹茶が好き", "category": "preference"})))
+    assert saved == [{"toolCallId": "tc-1", "result": "覚えておきます。"}]
+
+    found = webhook(tool_call("search_memory", {"query": "抹茶"}))
+    assert found[0]["result"] == "京都の抹茶が好き"
+
+
+def test_tool_calls_in_one_message_keep_their_ids(webhook):
+    results = webhook(
+        tool_call("start_recording", {}, "a"),
+        tool_call("nope", {}, "b"),
+        tool_call("save_memory", "[1, 2]", "c"),
+        tool_call("save_memory", "{broken", "d"),
+    )
+    assert results == [
+        {"toolCallId": "a", "result": "録音を開始します。"},
+        {"toolCallId": "b", "error": "Unknown tool: nope"},
+        {"toolCallId": "c", "error": "Invalid tool arguments: expected an object"},
+        {"toolCallId": "d", "error": "Invalid tool arguments: not JSON"},
+    ]
+
+
+def test_slow_or_failing_tools_fall_back(webhook, monkeypatch):
+    async def slow(args, call):
+        await asyncio.sleep(1)
+        return "too late"
+
+    async def broken(args, call):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setitem(vapi_webhook.TOOLS, "slow", ToolSpec(slow, deadline=0.05, fallback="間に合いませんでした"))
+    monkeypatch.setitem(vapi_webhook.TOOLS, "broken", ToolSpec(broken))
+    # A missing required argument fails inside the handler, not the request
+    results = webhook(tool_call("slow", {}, "a"), tool_call("broken", {}, "b"), tool_call("save_memory", {}, "c"))
+    assert [r["result"] for r in results] == ["間に合いませんでした", FALLBACK_DEFAULT, "記憶の保存に失敗しました。"]
+
+
+def test_long_running_tools_are_acknowledged_then_delivered(webhook, monkeypatch):
+    delivered = []
+
+    async def send_control_message(control_url, content):
+        delivered.append((control_url, content))
+        return True
+
+    async def lookup(args, call):
+        return "結果です"
+
+    monkeypatch.setattr(vapi_webhook.vapi_service, "send_control_message", send_control_message)
+    monkeypatch.setitem(vapi_webhook.TOOLS, "lookup", ToolSpec(lookup, long_running=True))
+    call = {"id": "call-2", "monitor": {"controlUrl": "http://control/call-2"}}
+
+    results = webhook(tool_call("lookup", {}), call=call)
+    assert results == [{"toolCallId": "tc-1", "result": vapi_webhook.ACK_LONG_RUNNING}]
+    # The client's event loop thread finishes the delivery in the background
+    for _ in range(100):
+        if delivered:
+            break
+        time.sleep(0.01)
+    assert delivered == [("http://control/call-2", "結果です")]
+
+    # Without a control URL the result is returned inline
+    assert webhook(tool_call("lookup", {}))[0]["result"] == "結果です"
+
+
+def test_google_tools_need_a_linked_account(webhook):
+    # No account is linked for the user and the shared fallback is off by default
+    results = webhook(tool_call("get_calendar_events", {}))
+    assert results == [{"toolCallId": "tc-1", "result": GOOGLE_NOT_LINKED}]
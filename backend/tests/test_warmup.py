@@ -0,0 +1,84 @@
+"""Lazy SDK imports and the background warm-up"""
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app.services import warmup
+from app.services.upstream_clients import UpstreamClients
+from app.services.warmup import HEAVY_MODULES, WarmUp
+
+BACKEND_DIR = __file__.rsplit("/tests/", 1)[0]
+
+
+@pytest.fixture
+def own_clients(monkeypatch):
+    """Warm up a private client registry instead of the app's"""
+    monkeypatch.setattr(warmup, "upstream_clients", UpstreamClients())
+
+
+def test_importing_the_app_loads_no_heavy_sdk():
+    code = (
+        "import json, sys\n"
+        "import app.main\n"
+        "from app.services.warmup import HEAVY_MODULES\n"
+        "print(json.dumps([m for m in HEAVY_MODULES if m in sys.modules]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+@pytest.mark.asyncio
+async def test_warm_up_imports_sdks_in_the_background(own_clients):
+    warm = WarmUp()
+    assert not warm.ready
+    assert await warm.wait(0) is False
+
+    warm.start()
+    assert await warm.wait(30)
+    assert warm.ready
+    assert set(warm.timings_ms) == {*HEAVY_MODULES, "upstream_clients", "total"}
+    assert all(m in sys.modules for m in HEAVY_MODULES)
+
+    await warm.stop()
+    assert not warm.ready and warm.timings_ms == {}
+
+
+@pytest.mark.asyncio
+async def test_missing_sdk_does_not_fail_the_warm_up(own_clients, monkeypatch):
+    monkeypatch.setattr(warmup, "HEAVY_MODULES", ("no_such_sdk", "json"))
+    warm = WarmUp()
+    warm.start()
+    assert await warm.wait(5)
+    assert set(warm.timings_ms) == {"no_such_sdk", "json", "upstream_clients", "total"}
+    await warm.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_an_unfinished_warm_up(own_clients, monkeypatch):
+    async def slow_start():
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(warmup.upstream_clients, "start", slow_start)
+    warm = WarmUp()
+    warm.start()
+    assert await warm.wait(0.05) is False
+    await warm.stop()
+    assert not warm.ready
+
+
+def test_readiness_waits_for_the_warm_up(client):
+    # 503 "starting" while the warm-up runs, then ready
+    for _ in range(300):
+        response = client.get("/ready")
+        if response.status_code == 200:
+            break
+        assert response.json()["status"] == "starting"
+        time.sleep(0.1)
+    assert response.json()["status"] == "ready"
+    assert "total" in response.json()["warm_up_ms"]
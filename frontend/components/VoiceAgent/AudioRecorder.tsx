@@ -2,14 +2,34 @@
 
 import { useState, useRef, useCallback, useEffect } from 'react'
 import { Circle, Square, Download, X } from 'lucide-react'
+import { api } from '@/lib/api'
+
+// MediaRecorder timeslice: chunks are uploaded while recording is in progress
+const CHUNK_INTERVAL_MS = 2000
+const MAX_UPLOAD_RETRIES = 3
 
 interface AudioRecorderProps {
   isOpen: boolean
   onClose: () => void
   onRecordingComplete?: (audioBlob: Blob) => void
+  userId?: string // when set, the recording is streamed to the backend in chunks
+  onRecordingUploaded?: (recordingId: string) => void
+}
+
+async function sha256Hex(blob: Blob) {
+  const digest = await crypto.subtle.digest('SHA-256', await blob.arrayBuffer())
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, '0'))
+    .join('')
 }
 
-export function AudioRecorder({ isOpen, onClose, onRecordingComplete }: AudioRecorderProps) {
+export function AudioRecorder({
+  isOpen,
+  onClose,
+  onRecordingComplete,
+  userId,
+  onRecordingUploaded,
+}: AudioRecorderProps) {
   const [isRecording, setIsRecording] = useState(false)
   const [audioURL, setAudioURL] = useState<string | null>(null)
   const [duration, setDuration] = useState(0)
@@ -18,6 +38,33 @@ export function AudioRecorder({ isOpen, onClose, onRecordingComplete }: AudioRec
   const mediaRecorderRef = useRef<MediaRecorder | null>(null)
   const chunksRef = useRef<Blob[]>([])
   const timerRef = useRef<NodeJS.Timeout | null>(null)
+  const recordingIdRef = useRef<string | null>(null)
+  const uploadQueueRef = useRef<Promise<void>>(Promise.resolve())
+
+  // Upload every chunk the server has not committed yet, resuming from its status
+  const syncChunks = useCallback(async () => {
+    const recordingId = recordingIdRef.current
+    if (!userId || !recordingId) return
+
+    for (let attempt = 0; attempt < MAX_UPLOAD_RETRIES; attempt++) {
+      try {
+        let status = await api.getRecordingStatus(userId, recordingId)
+        while (status.next_index < chunksRef.current.length) {
+          status = await api.uploadRecordingChunk(
+            userId,
+            recordingId,
+            status.next_index,
+            status.size,
+            chunksRef.current[status.next_index]
+          )
+        }
+        return
+      } catch (err) {
+        console.warn('Chunk upload failed, retrying:', err)
+        await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** attempt))
+      }
+    }
+  }, [userId])
 
   const startRecording = useCallback(async () => {
     try {
@@ -25,14 +72,26 @@ export function AudioRecorder({ isOpen, onClose, onRecordingComplete }: AudioRec
       const mediaRecorder = new MediaRecorder(stream)
       mediaRecorderRef.current = mediaRecorder
       chunksRef.current = []
+      recordingIdRef.current = null
+      uploadQueueRef.current = Promise.resolve()
+
+      if (userId) {
+        try {
+          const recording = await api.createRecording(userId, 'audio/webm')
+          recordingIdRef.current = recording.id
+        } catch (err) {
+          console.warn('Recording upload unavailable, keeping it local:', err)
+        }
+      }
 
       mediaRecorder.ondataavailable = (e) => {
         if (e.data.size > 0) {
           chunksRef.current.push(e.data)
+          uploadQueueRef.current = uploadQueueRef.current.then(syncChunks)
         }
       }
 
-      mediaRecorder.onstop = () => {
+      mediaRecorder.onstop = async () => {
         const blob = new Blob(chunksRef.current, { type: 'audio/webm' })
         const url = URL.createObjectURL(blob)
         setAudioURL(url)
@@ -40,9 +99,22 @@ export function AudioRecorder({ isOpen, onClose, onRecordingComplete }: AudioRec
 
         // Stop all tracks
         stream.getTracks().forEach((track) => track.stop())
+
+        const recordingId = recordingIdRef.current
+        if (userId && recordingId) {
+          try {
+            await uploadQueueRef.current
+            await syncChunks()
+            await api.completeRecording(userId, recordingId, await sha256Hex(blob))
+            onRecordingUploaded?.(recordingId)
+          } catch (err) {
+            console.error('Recording upload error:', err)
+            setError('録音のアップロードに失敗しました')
+          }
+        }
       }
 
-      mediaRecorder.start()
+      mediaRecorder.start(userId ? CHUNK_INTERVAL_MS : undefined)
       setIsRecording(true)
       setError(null)
       setDuration(0)
@@ -55,7 +127,7 @@ export function AudioRecorder({ isOpen, onClose, onRecordingComplete }: AudioRec
       console.error('Recording error:', err)
       setError('マイクにアクセスできませんでした')
     }
-  }, [onRecordingComplete])
+  }, [onRecordingComplete, onRecordingUploaded, syncChunks, userId])
 
   const stopRecording = useCallback(() => {
     if (mediaRecorderRef.current && isRecording) {
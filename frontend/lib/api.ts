@@ -4,6 +4,27 @@ interface FetchOptions extends RequestInit {
   params?: Record<string, string>
 }
 
+export interface RecordingStatus {
+  id: string
+  user_id: string
+  content_type: string
+  size: number
+  next_index: number
+  completed: boolean
+  sha256: string | null
+  created_at: string
+}
+
+export interface StreamFrameResult {
+  session_id: string
+  selected: boolean
+  change_score: number
+  pending_frames: number
+  analyzing: boolean
+  description: string | null
+  analyzed_at: string | null
+}
+
 class ApiClient {
   private baseUrl: string
 
@@ -130,22 +151,83 @@ class ApiClient {
     })
   }
 
-  async captureAndAnalyze(imageBase64: string) {
+  // The capture is only visible to the camera tool of the same call / user
+  async captureAndAnalyze(imageBase64: string, ids: { userId?: string; callId?: string }) {
     return this.request('/api/vision/capture', {
       method: 'POST',
       body: JSON.stringify({
         image_base64: imageBase64,
+        user_id: ids.userId,
+        session_id: ids.callId,
       }),
     })
   }
 
+  // Continuous camera mode: post JPEG frames at a low rate (1-2 fps); the
+  // backend only analyzes frames where the scene changed
+  async sendStreamFrame(sessionId: string, frame: Blob, userId?: string) {
+    return this.request<StreamFrameResult>(`/api/vision/stream/${sessionId}/frames`, {
+      method: 'POST',
+      params: userId ? { user_id: userId } : undefined,
+      body: frame,
+      headers: { 'Content-Type': 'image/jpeg' },
+    })
+  }
+
+  async stopStream(sessionId: string) {
+    return this.request(`/api/vision/stream/${sessionId}`, { method: 'DELETE' })
+  }
+
+  // Recording API
+  async createRecording(userId: string, contentType: string = 'audio/webm') {
+    return this.request<RecordingStatus>(`/api/recording/${userId}`, {
+      method: 'POST',
+      body: JSON.stringify({ content_type: contentType }),
+    })
+  }
+
+  async getRecordingStatus(userId: string, recordingId: string) {
+    return this.request<RecordingStatus>(`/api/recording/${userId}/${recordingId}`)
+  }
+
+  async uploadRecordingChunk(
+    userId: string,
+    recordingId: string,
+    index: number,
+    offset: number,
+    chunk: Blob
+  ) {
+    return this.request<RecordingStatus>(
+      `/api/recording/${userId}/${recordingId}/chunks/${index}`,
+      {
+        method: 'PUT',
+        params: { offset: String(offset) },
+        body: chunk,
+        headers: { 'Content-Type': 'application/octet-stream' },
+      }
+    )
+  }
+
+  async completeRecording(userId: string, recordingId: string, sha256: string) {
+    return this.request<RecordingStatus>(`/api/recording/${userId}/${recordingId}/complete`, {
+      method: 'POST',
+      body: JSON.stringify({ sha256 }),
+    })
+  }
+
   // Google API
-  async getGoogleAuthUrl() {
-    return this.request<{ auth_url: string }>('/api/google/auth/url')
+  async getGoogleAuthUrl(userId: string) {
+    return this.request<{ auth_url: string }>('/api/google/auth/url', { params: { user_id: userId } })
+  }
+
+  async getGoogleAuthStatus(userId: string) {
+    return this.request<{ user_id: string; authenticated: boolean }>(`/api/google/auth/status/${userId}`)
   }
 
-  async getGoogleAuthStatus() {
-    return this.request<{ authenticated: boolean }>('/api/google/auth/status')
+  async unlinkGoogleAccount(userId: string) {
+    return this.request<{ user_id: string; authenticated: boolean }>(`/api/google/auth/${userId}`, {
+      method: 'DELETE',
+    })
   }
 
   async getCalendarEvents(startDate?: string, endDate?: string) {